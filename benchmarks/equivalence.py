@@ -0,0 +1,454 @@
+"""
+Golden-output equivalence checker for the scoring and pricing engines
+
+Runs the same inputs through a reference scalar function (the calculators
+in utils/risk_calculator.py, PricingPipeline.quote() and detect_fraud())
+and an alternative engine (the batch scorers, price_arrays(), the quote
+cache, ...), and reports every case where their outputs differ, together
+with the simplest input that still fails.
+
+Inputs come from three sources:
+
+    grid       every combination of the boundary values in domains(), or an
+               evenly spread subset of them when there are more than --cases
+    random     each field drawn independently and uniformly from its domain
+    portfolio  realistic rows from data/synthetic_portfolio.py
+
+Cases are split into chunks and checked on every core.
+
+    python -m benchmarks.equivalence --cases 10000000
+    python -m benchmarks.equivalence --engines auto.batch,fraud.batch --modes grid
+    python -m benchmarks.equivalence --import mypackage.fast_engine   # registers more engines
+
+Exits with status 1 if any engine disagrees with its reference.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from data import synthetic_portfolio
+from utils.fraud_detector import CLAIM_TYPE_CHECKS, detect_fraud, detect_fraud_batch, render_alerts
+from utils.pricing import PIPELINES
+from utils.quote_cache import cached_quote
+from utils.rating_tables import rating_tables
+from utils.risk_calculator import RECOMMENDATIONS, risk_tier_batch
+
+MODES = ("grid", "random", "portfolio")
+
+# Failing inputs kept per engine by default, for the report and for shrinking
+KEEP_FAILURES = 5
+
+
+def _labels(choices, *tables):
+    """Page labels, rating table categories and one unknown label"""
+    labels = [label for label, _ in choices]
+    for table in tables:
+        labels += [category for category in rating_tables()[table].categories if category not in labels]
+    return tuple(labels) + ("Unknown",)
+
+
+def domains():
+    """Boundary values for every input field, by line, simplest value first"""
+    portfolio = synthetic_portfolio
+    flags = (False, True)
+    return {
+        "auto": {
+            "vehicle_age": tuple(range(0, 31)),
+            "driver_age": tuple(range(16, 91)),
+            "accident_history": tuple(range(0, 7)),
+            "mileage": tuple(range(0, 100001, 2500)),
+            "vehicle_type": _labels(portfolio.VEHICLE_TYPES, "auto.vehicle_multiplier"),
+            "city_tier": _labels(portfolio.CITY_TIERS, "auto.city_multiplier"),
+            "violations": tuple(range(0, 6)),
+        },
+        "property": {
+            "property_age": tuple(range(0, 101)),
+            "location_risk": _labels(portfolio.LOCATION_RISKS, "property.location_penalty"),
+            "construction_type": _labels(portfolio.CONSTRUCTION_TYPES, "property.construction_penalty"),
+            "flood_zone": flags,
+            "property_value": (0, 10, 49, 50, 51, 74, 75, 76, 99, 100, 101, 500, 1000),
+            "security_features": tuple(range(0, 10)),
+            "floor_level": _labels(portfolio.FLOOR_LEVELS),
+        },
+        "cyber": {
+            "num_employees": tuple(range(0, 1001, 25)) + (2500, 5000, 10000, 100000),
+            "has_security_policy": flags,
+            "past_incidents": tuple(range(0, 11)),
+            "uses_mfa": flags,
+            "business_type": _labels(portfolio.BUSINESS_TYPES, "cyber.business_risk"),
+            "annual_revenue": _labels(portfolio.ANNUAL_REVENUES, "cyber.revenue_multiplier"),
+            "security_measures": tuple(range(0, 11)),
+        },
+        "health": {
+            "age": tuple(range(18, 81)),
+            "bmi": tuple(round(14 + 0.1 * i, 1) for i in range(361)),
+            "smoking": flags,
+            "exercise_frequency": _labels(portfolio.EXERCISE_FREQUENCIES, "health.exercise_scores"),
+            "chronic_conditions": tuple(range(0, 9)),
+            "family_history": flags,
+            "smoking_habit": _labels(portfolio.SMOKING_HABITS),
+            "alcohol": _labels(portfolio.ALCOHOL),
+            "coverage_amount": _labels(portfolio.HEALTH_COVERAGES, "health.coverage_multiplier"),
+            "family_members": tuple(range(1, 9)),
+        },
+        "life": {
+            "age": tuple(range(18, 81)),
+            "gender": _labels(portfolio.GENDERS, "life.gender_adjustment"),
+            "occupation": _labels(portfolio.OCCUPATIONS, "life.occupation_risk", "life.occupation_adjustment"),
+            "lifestyle": _labels(portfolio.LIFESTYLES, "life.lifestyle_risk", "life.lifestyle_adjustment"),
+            "coverage_amount": (0, 500000, 1000000, 2500000, 5000000, 10000000, 25000000, 100000000),
+            "medical_exams": flags,
+            "health_conditions": tuple(range(0, 6)),
+        },
+        "claims": {
+            "claim_amount": (0, 1000, 100000, 200000, 200001, 300000, 300001, 500000, 500001,
+                             999999, 1000000, 1000001, 5000000, 100000000),
+            "claim_type": tuple(CLAIM_TYPE_CHECKS) + ("Other",),
+            "suspicious_docs": flags,
+            "prior_fraud": flags,
+        },
+    }
+
+
+class Engine:
+    """A reference scalar function and an alternative engine that must agree.
+
+    `reference(record)` takes one tuple of `columns` values and returns one
+    value per name in `outputs`; `candidate(data)` takes a DataFrame of
+    those columns and returns one array per output.
+    """
+
+    def __init__(self, name, line, columns, outputs, reference, candidate):
+        self.name = name
+        self.line = line
+        self.columns = tuple(columns)
+        self.outputs = tuple(outputs)
+        self.reference = reference
+        self.candidate = candidate
+
+
+ENGINES = {}
+
+
+def register(engine):
+    """Add an engine to check; modules passed with --import call this"""
+    ENGINES[engine.name] = engine
+    return engine
+
+
+def _batch_engine(line):
+    pipeline = PIPELINES[line]
+    tiers = {text: tier for tier, text in enumerate(RECOMMENDATIONS[line])}
+
+    def reference(record):
+        score, recommendation, premium, *extra = pipeline.calculator(*record)
+        return (score, tiers[recommendation], premium, *extra)
+
+    def candidate(data):
+        score, premium, *extra = pipeline.batch_scorer(data)
+        return (score, risk_tier_batch(score), premium, *extra)
+
+    outputs = ("risk_score", "risk_tier", "base_premium") + pipeline.extra_outputs
+    return Engine(f"{line}.batch", line, pipeline.inputs, outputs, reference, candidate)
+
+
+def _pricing_engine(line):
+    pipeline = PIPELINES[line]
+    outputs = ("risk_score", "risk_tier", "base_premium", "premium") + pipeline.extra_outputs
+
+    def reference(record):
+        quote = pipeline.quote(**dict(zip(pipeline.columns, record)))
+        return tuple(quote[name] for name in outputs)
+
+    def candidate(data):
+        arrays = pipeline.price_arrays(data)
+        return tuple(arrays[name] for name in outputs)
+
+    return Engine(f"{line}.pricing", line, pipeline.columns, outputs, reference, candidate)
+
+
+def _cached_engine(line):
+    pipeline = PIPELINES[line]
+    outputs = ("risk_score", "risk_tier", "base_premium", "premium") + pipeline.extra_outputs
+
+    def reference(record):
+        quote = pipeline.quote(**dict(zip(pipeline.columns, record)))
+        return tuple(quote[name] for name in outputs)
+
+    def candidate(data):
+        rows = zip(*(data[column].tolist() for column in pipeline.columns))
+        quotes = [cached_quote(pipeline, **dict(zip(pipeline.columns, row))) for row in rows]
+        return tuple(np.array([quote[name] for quote in quotes]) for name in outputs)
+
+    return Engine(f"{line}.cached", line, pipeline.columns, outputs, reference, candidate)
+
+
+def _fraud_engine():
+    def candidate(data):
+        score, alerts = detect_fraud_batch(data)
+        masks, inverse = np.unique(alerts, return_inverse=True)
+        texts = np.array([render_alerts(mask) for mask in masks.tolist()], dtype=object)
+        return score, texts[inverse]
+
+    return Engine("fraud.batch", "claims", ("claim_amount", "claim_type", "suspicious_docs", "prior_fraud"),
+                  ("fraud_score", "alerts"), lambda record: detect_fraud(*record), candidate)
+
+
+for _line in PIPELINES:
+    register(_batch_engine(_line))
+    register(_pricing_engine(_line))
+    register(_cached_engine(_line))
+register(_fraud_engine())
+
+# The quote cache engine is slow per row and mostly checks the cache key, so it is opt-in
+DEFAULT_ENGINES = tuple(name for name in ENGINES if not name.endswith(".cached"))
+
+
+def grid_size(engine):
+    fields = domains()[engine.line]
+    return math.prod(len(fields[column]) for column in engine.columns)
+
+
+def _grid_stride(size, cases):
+    """A stride coprime to `size` that spreads `cases` indices over the whole grid"""
+    if cases >= size:
+        return 1
+    stride = max(1, size // cases) | 1
+    while math.gcd(stride, size) != 1:
+        stride += 2
+    return stride
+
+
+def make_cases(engine, mode, start, count, seed, total):
+    """Build cases [start, start + count) of one mode as a DataFrame"""
+    fields = domains()[engine.line]
+    columns = {}
+    if mode == "grid":
+        size = grid_size(engine)
+        index = np.arange(start, start + count, dtype=np.int64)
+        stride = _grid_stride(size, total)
+        if stride > 1:
+            index = index * stride % size
+        shape = [len(fields[column]) for column in engine.columns]
+        positions = np.unravel_index(index, shape)
+        for column, codes in zip(engine.columns, positions):
+            columns[column] = _values(fields[column], codes)
+    elif mode == "random":
+        rng = np.random.default_rng([seed, start])
+        for column in engine.columns:
+            domain = fields[column]
+            columns[column] = _values(domain, rng.integers(0, len(domain), count))
+    else:
+        rng = np.random.default_rng([seed, start])
+        generated = synthetic_portfolio.GENERATORS[engine.line]
+        portfolio = generated(rng, count, start) if engine.line == "claims" else generated(rng, count)
+        columns = {column: portfolio[column] for column in engine.columns}
+    return pd.DataFrame(columns)
+
+
+def _values(domain, codes):
+    if isinstance(domain[0], str):
+        return pd.Categorical.from_codes(codes, domain)
+    return np.array(domain)[codes]
+
+
+def _records(data, columns):
+    return list(zip(*(data[column].tolist() for column in columns)))
+
+
+def _differs(expected, actual):
+    """Rows where two output columns disagree; NaN equals NaN"""
+    expected = np.asarray(expected)
+    actual = np.asarray(actual)
+    if expected.dtype.kind in "fiub" and actual.dtype.kind in "fiub":
+        expected = expected.astype(np.float64)
+        actual = actual.astype(np.float64)
+        return ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+    return np.array([e != a for e, a in zip(expected.tolist(), actual.tolist())], dtype=bool)
+
+
+def compare(engine, data):
+    """Check one DataFrame of cases; returns (mismatch mask, expected, actual)"""
+    records = _records(data, engine.columns)
+    expected = list(zip(*(engine.reference(record) for record in records)))
+    actual = engine.candidate(data)
+    mismatch = np.zeros(len(records), dtype=bool)
+    for name, want, got in zip(engine.outputs, expected, actual):
+        if len(got) != len(records):
+            raise ValueError(f"{engine.name}: {name} has {len(got)} rows for {len(records)} cases")
+        mismatch |= _differs(want, got)
+    return mismatch, expected, actual
+
+
+def fails(engine, record):
+    """Does one input still make the engine disagree with its reference (or raise)?"""
+    data = pd.DataFrame({column: [value] for column, value in zip(engine.columns, record)})
+    try:
+        return bool(compare(engine, data)[0][0])
+    except Exception:
+        return True
+
+
+def shrink(engine, record):
+    """Greedily replace fields with simpler domain values while the input still fails"""
+    fields = domains()[engine.line]
+    record = list(record)
+    changed = True
+    while changed:
+        changed = False
+        for i, column in enumerate(engine.columns):
+            domain = fields[column]
+            simpler = domain[:domain.index(record[i])] if record[i] in domain else domain
+            for value in simpler:
+                candidate = record[:i] + [value] + record[i + 1:]
+                if fails(engine, candidate):
+                    record = candidate
+                    changed = True
+                    break
+    return tuple(record)
+
+
+def _describe(engine, record):
+    """Input plus expected/actual outputs for one record"""
+    data = pd.DataFrame({column: [value] for column, value in zip(engine.columns, record)})
+    try:
+        expected = engine.reference(tuple(record))
+        actual = [np.asarray(column).tolist()[0] for column in engine.candidate(data)]
+    except Exception as e:
+        return {"input": dict(zip(engine.columns, record)), "diff": {}, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "input": dict(zip(engine.columns, record)),
+        "diff": {
+            name: {"expected": want, "actual": got}
+            for name, want, got in zip(engine.outputs, expected, actual)
+            if _differs([want], [got])[0]
+        },
+    }
+
+
+def _load_plugins(modules):
+    for module in modules:
+        importlib.import_module(module)
+
+
+def check_chunk(name, mode, start, count, seed, total, keep=KEEP_FAILURES):
+    """Check one chunk of cases in a worker process"""
+    engine = ENGINES[name]
+    started = time.perf_counter()
+    data = make_cases(engine, mode, start, count, seed, total)
+    try:
+        mismatch, _, _ = compare(engine, data)
+    except Exception as e:
+        return {"cases": count, "mismatches": count, "failures": [], "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - started}
+    rows = np.flatnonzero(mismatch)[:keep]
+    failures = [tuple(data[column].iloc[row] for column in engine.columns) for row in rows]
+    failures = [tuple(value.item() if hasattr(value, "item") else value for value in record) for record in failures]
+    return {"cases": count, "mismatches": int(mismatch.sum()), "failures": failures, "error": None,
+            "seconds": time.perf_counter() - started}
+
+
+def run(engines, modes, cases, chunk_size, seed=0, workers=None, plugins=(), keep=KEEP_FAILURES, log=sys.stderr):
+    """Check every engine in every mode, returning a report per engine"""
+    tasks = []
+    for name, mode in itertools.product(engines, modes):
+        total = min(cases, grid_size(ENGINES[name])) if mode == "grid" else cases
+        for start in range(0, total, chunk_size):
+            tasks.append((name, mode, start, min(chunk_size, total - start), seed, total, keep))
+
+    report = {name: {"cases": 0, "mismatches": 0, "failures": [], "errors": [], "modes": {}} for name in engines}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_plugins, initargs=(tuple(plugins),)) as pool:
+        futures = {pool.submit(check_chunk, *task): task for task in tasks}
+        for future in as_completed(futures):
+            name, mode = futures[future][:2]
+            result = future.result()
+            entry = report[name]
+            entry["cases"] += result["cases"]
+            entry["mismatches"] += result["mismatches"]
+            entry["modes"][mode] = entry["modes"].get(mode, 0) + result["mismatches"]
+            entry["failures"] += result["failures"][:keep - len(entry["failures"])]
+            if result["error"] and result["error"] not in entry["errors"]:
+                entry["errors"].append(result["error"])
+    elapsed = time.perf_counter() - started
+
+    checked = sum(entry["cases"] for entry in report.values())
+    print(f"Checked {checked:,} cases in {elapsed:.1f}s ({checked / elapsed:,.0f} cases/sec)", file=log)
+    for name, entry in report.items():
+        engine = ENGINES[name]
+        grid = grid_size(engine)
+        if "grid" in modes and grid > cases:
+            print(f"  {name}: grid covers an even spread of {cases:,} of its {grid:,} points", file=log)
+        if entry["failures"]:
+            entry["minimal"] = _describe(engine, shrink(engine, entry["failures"][0]))
+            entry["examples"] = [_describe(engine, record) for record in entry["failures"]]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check alternative engines against the scalar reference functions")
+    parser.add_argument("--engines", help="comma-separated engines (default: " + ",".join(DEFAULT_ENGINES) + ")")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated input modes (default: all)")
+    parser.add_argument("--cases", type=int, default=1000000, help="cases per engine and mode (default: 1000000)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="cases per worker task (default: 50000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--import", dest="plugins", action="append", default=[],
+                        help="module that registers extra engines with register()")
+    parser.add_argument("--keep", type=int, default=KEEP_FAILURES,
+                        help=f"failing inputs to keep and show per engine (default: {KEEP_FAILURES})")
+    parser.add_argument("--output", help="write the full report, with every kept failure, to this JSON file")
+    parser.add_argument("--list", action="store_true", help="list the engines and exit")
+    args = parser.parse_args(argv)
+
+    _load_plugins(args.plugins)
+    if args.list:
+        for name, engine in ENGINES.items():
+            print(f"{name:<20}{grid_size(engine):>16,} grid points   outputs: {', '.join(engine.outputs)}")
+        return
+    engines = args.engines.split(",") if args.engines else list(DEFAULT_ENGINES)
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)} (see --list)")
+    modes = args.modes.split(",")
+    if not set(modes) <= set(MODES):
+        parser.error(f"modes must be among {', '.join(MODES)}")
+
+    report = run(engines, modes, args.cases, args.chunk_size, args.seed, args.workers, args.plugins, args.keep)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    failed = False
+    for name, entry in report.items():
+        status = "OK" if not entry["mismatches"] else f"{entry['mismatches']:,} MISMATCHES"
+        print(f"{name:<20}{entry['cases']:>14,} cases   {status}")
+        for error in entry["errors"]:
+            print(f"    error: {error}")
+        if entry["mismatches"]:
+            failed = True
+            by_mode = ", ".join(f"{mode} {count:,}" for mode, count in entry["modes"].items() if count)
+            print(f"    by mode: {by_mode}")
+            if "minimal" in entry:
+                print(f"    minimal failing input: {entry['minimal']['input']}")
+                if "error" in entry["minimal"]:
+                    print(f"      error: {entry['minimal']['error']}")
+                for output, diff in entry["minimal"]["diff"].items():
+                    print(f"      {output}: expected {diff['expected']!r}, got {diff['actual']!r}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Run through the imported module, where --import plugins register their engines
+    from benchmarks.equivalence import main
+    main()
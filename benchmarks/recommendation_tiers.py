@@ -0,0 +1,69 @@
+"""
+Benchmark: recommendation tier codes vs per-row recommendation text
+
+Scores a million auto policies with score_auto_batch, then compares the
+ways of attaching a recommendation to every row: per-row text from a Python
+loop, per-row tier codes from a Python loop, an object column of text and
+a uint8 column of tier codes. Time and peak traced allocation are measured
+in separate runs so tracing does not skew the timings.
+
+    python -m benchmarks.recommendation_tiers --rows 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.risk_calculator import RECOMMENDATIONS, recommend, risk_tier, risk_tier_batch, score_auto_batch
+
+
+def portfolio(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "vehicle_age": rng.integers(0, 31, rows),
+        "driver_age": rng.integers(18, 91, rows),
+        "accident_history": rng.integers(0, 6, rows),
+        "mileage": rng.integers(1000, 100001, rows),
+    }
+
+
+def cases(scores):
+    score_list = scores.tolist()
+    texts = np.array(RECOMMENDATIONS["auto"], dtype=object)
+    return {
+        "text per row (loop)": lambda: [recommend("auto", score) for score in score_list],
+        "tier per row (loop)": lambda: [risk_tier(score) for score in score_list],
+        "text column (vectorized)": lambda: texts[risk_tier_batch(scores)],
+        "tier codes (vectorized)": lambda: risk_tier_batch(scores),
+    }
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark recommendation tier codes against per-row text")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="policies to score (default: 1,000,000)")
+    args = parser.parse_args(argv)
+
+    scores, _ = score_auto_batch(portfolio(args.rows))
+    print(f"{args.rows:,} auto policies")
+    print(f"{'case':<28}{'time (ms)':>12}{'rows/sec':>16}{'peak alloc (MB)':>18}")
+    for name, fn in cases(scores).items():
+        elapsed, peak = measure(fn)
+        print(f"{name:<28}{elapsed * 1000:>12.1f}{args.rows / elapsed:>16,.0f}{peak / 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark suite for the scoring, pricing and fraud hot paths
+
+Expands the demo scenarios in data/demo_scenarios.py into synthetic
+portfolios of any size, then times the scalar functions (one call per row)
+and the batch functions (one call per --batch-size rows) for every line
+and for fraud. Each case runs in its own process, so peak RSS is that
+case's alone.
+
+    python -m benchmarks.suite --rows 200000 --output baseline.json
+    python -m benchmarks.suite --rows 200000 --compare baseline.json
+
+Compare mode exits with status 1 if any case lost more than --tolerance of
+its throughput or its p99 latency grew by more than that.
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from data import demo_scenarios
+from utils.fraud_detector import detect_fraud, detect_fraud_batch
+from utils.risk_calculator import (
+    calculate_auto_risk,
+    calculate_cyber_risk,
+    calculate_health_risk,
+    calculate_life_risk,
+    calculate_property_risk,
+    score_auto_batch,
+    score_cyber_batch,
+    score_health_batch,
+    score_life_batch,
+    score_property_batch,
+)
+
+SCENARIOS = {
+    "auto": demo_scenarios.auto_scenarios,
+    "property": demo_scenarios.property_scenarios,
+    "cyber": demo_scenarios.cyber_scenarios,
+    "health": demo_scenarios.health_scenarios,
+    "life": demo_scenarios.life_scenarios,
+    "fraud": demo_scenarios.fraud_scenarios,
+}
+
+SCALAR = {
+    "auto": calculate_auto_risk,
+    "property": calculate_property_risk,
+    "cyber": calculate_cyber_risk,
+    "health": calculate_health_risk,
+    "life": calculate_life_risk,
+    "fraud": detect_fraud,
+}
+
+BATCH = {
+    "auto": score_auto_batch,
+    "property": score_property_batch,
+    "cyber": score_cyber_batch,
+    "health": score_health_batch,
+    "life": score_life_batch,
+    "fraud": detect_fraud_batch,
+}
+
+# Scenario keys that describe the scenario rather than an input
+META_FIELDS = {"name", "expected_risk", "expected_fraud_score", "notes"}
+
+
+def expand(scenarios, rows, seed=0):
+    """Expand a handful of scenarios into a `rows`-row synthetic portfolio.
+
+    Each row starts from a random scenario. Numbers are scaled by lognormal
+    noise (integers stay integers), flags flip 10% of the time and
+    categories switch to another scenario's value 20% of the time.
+    """
+    rng = np.random.default_rng(seed)
+    fields = [field for field in scenarios[0] if field not in META_FIELDS]
+    base = rng.integers(0, len(scenarios), rows)
+    data = {}
+    for field in fields:
+        values = [scenario[field] for scenario in scenarios]
+        column = np.array(values)[base]
+        if isinstance(values[0], bool):
+            column ^= rng.random(rows) < 0.1
+        elif isinstance(values[0], (int, float)):
+            column = column * rng.lognormal(0, 0.25, rows)
+            if isinstance(values[0], int):
+                column = np.rint(column).astype(np.int64)
+        else:
+            vocabulary = sorted(set(values))
+            switch = rng.random(rows) < 0.2
+            column[switch] = np.array(vocabulary)[rng.integers(0, len(vocabulary), switch.sum())]
+            column = pd.Categorical(column, categories=vocabulary)
+        data[field] = column
+    return pd.DataFrame(data)
+
+
+def _latencies(timings_ns):
+    timings = np.asarray(timings_ns, dtype=np.float64) / 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def run_case(line, path, rows, batch_size, seed):
+    """Time one (line, path) case in the current process, returning its results"""
+    portfolio = expand(SCENARIOS[line], rows, seed)
+    if path == "scalar":
+        fn = SCALAR[line]
+        records = list(zip(*(portfolio[column].tolist() for column in portfolio.columns)))
+        timings = []
+        start = time.perf_counter()
+        for record in records:
+            call_start = time.perf_counter_ns()
+            fn(*record)
+            timings.append(time.perf_counter_ns() - call_start)
+        elapsed = time.perf_counter() - start
+    else:
+        fn = BATCH[line]
+        chunks = [portfolio.iloc[i:i + batch_size] for i in range(0, rows, batch_size)]
+        timings = []
+        start = time.perf_counter()
+        for chunk in chunks:
+            call_start = time.perf_counter_ns()
+            fn(chunk)
+            timings.append(time.perf_counter_ns() - call_start)
+        elapsed = time.perf_counter() - start
+    p50, p99 = _latencies(timings)
+    return {
+        "rows": rows,
+        "calls": len(timings),
+        "seconds": elapsed,
+        "ops_per_sec": rows / elapsed,
+        "p50_us": p50,
+        "p99_us": p99,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_suite(rows, scalar_rows, batch_size, seed=0, lines=None, log=sys.stderr):
+    """Run every case, each in a fresh worker process"""
+    results = {}
+    for line in lines or SCENARIOS:
+        for path, path_rows in (("scalar", min(rows, scalar_rows)), ("batch", rows)):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_case, line, path, path_rows, batch_size, seed).result()
+            name = f"{line}.{path}"
+            results[name] = result
+            print(f"{name:<16}{result['ops_per_sec']:>14,.0f} ops/s   p50 {result['p50_us']:>10.1f} us   "
+                  f"p99 {result['p99_us']:>10.1f} us   peak RSS {result['peak_rss_mb']:>7.1f} MB", file=log)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """List regressions of `results` against `baseline` beyond `tolerance`"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["ops_per_sec"] < before["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['ops_per_sec']:,.0f} -> {result['ops_per_sec']:,.0f} ops/s")
+        if result["p99_us"] > before["p99_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before['p99_us']:.1f} -> {result['p99_us']:.1f} us")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scoring, pricing and fraud hot paths")
+    parser.add_argument("--rows", type=int, default=100000, help="portfolio rows per batch case (default: 100000)")
+    parser.add_argument("--scalar-rows", type=int, default=20000, help="rows per scalar case (default: 20000)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per batch call (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="portfolio random seed (default: 0)")
+    parser.add_argument("--lines", help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    lines = args.lines.split(",") if args.lines else None
+    results = run_suite(args.rows, args.scalar_rows, args.batch_size, args.seed, lines)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "rows": args.rows,
+            "scalar_rows": args.scalar_rows,
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Synthetic portfolio generator for load and scale testing
+
+Generates applicants for every line of business, and claims, with the
+field names the pricing pipelines (utils/pricing.py) and the fraud rules
+take and the category labels the pages offer. Columns are drawn from
+realistic marginal distributions (driver ages around 38, lognormal mileage,
+BMI and claim amounts, heavy-tailed company sizes) in vectorized chunks and
+streamed to CSV or Parquet, so memory stays bounded by the chunk size
+however many rows are written.
+
+The same seed and chunk size always produce the same rows.
+
+    python -m data.synthetic_portfolio auto 50000000 auto.parquet --chunk-size 1000000 --seed 7
+    python -m data.synthetic_portfolio claims 1000000 claims.csv
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+VEHICLE_TYPES = (("Hatchback", 0.35), ("Sedan", 0.25), ("SUV", 0.25), ("Luxury Car", 0.05), ("Commercial Vehicle", 0.10))
+CITY_TIERS = (("Tier 1 (Metro)", 0.35), ("Tier 2 (Major City)", 0.30), ("Tier 3 (Small City)", 0.20), ("Rural", 0.15))
+LOCATION_RISKS = (("Low", 0.5), ("Medium", 0.35), ("High", 0.15))
+CONSTRUCTION_TYPES = (
+    ("RCC (Reinforced Concrete)", 0.55), ("Brick & Mortar", 0.30), ("Steel Frame", 0.05),
+    ("Wood Frame", 0.05), ("Other", 0.05),
+)
+FLOOR_LEVELS = (("Ground Floor", 0.30), ("1st-3rd Floor", 0.40), ("4th-7th Floor", 0.20), ("8th Floor & Above", 0.10))
+BUSINESS_TYPES = (
+    ("IT Services", 0.20), ("E-commerce", 0.12), ("Financial Services", 0.10), ("Healthcare", 0.10),
+    ("Manufacturing", 0.15), ("Education", 0.08), ("Government", 0.05), ("Retail", 0.15), ("Other", 0.05),
+)
+ANNUAL_REVENUES = (("< 1 Crore", 0.40), ("1-5 Crores", 0.30), ("5-25 Crores", 0.18), ("25-100 Crores", 0.08), ("> 100 Crores", 0.04))
+SMOKING_HABITS = (
+    ("Never smoked", 0.70), ("Former smoker (quit >2 years)", 0.08), ("Former smoker (quit <2 years)", 0.04),
+    ("Occasional smoker", 0.08), ("Regular smoker", 0.10),
+)
+ALCOHOL = (
+    ("Never", 0.40), ("Occasionally (social)", 0.30), ("Moderate (2-3 times/week)", 0.15),
+    ("Regular (daily)", 0.10), ("Heavy drinking", 0.05),
+)
+EXERCISE_FREQUENCIES = (
+    ("Never", 0.20), ("Rarely (monthly)", 0.25), ("Sometimes (weekly)", 0.25),
+    ("Often (3-4 times/week)", 0.20), ("Daily", 0.10),
+)
+HEALTH_COVERAGES = (("₹5 Lakhs", 0.35), ("₹10 Lakhs", 0.30), ("₹15 Lakhs", 0.12), ("₹25 Lakhs", 0.12), ("₹50 Lakhs", 0.08), ("₹1 Crore+", 0.03))
+GENDERS = (("Male", 0.52), ("Female", 0.47), ("Other", 0.01))
+OCCUPATIONS = (("Low Risk (Office job)", 0.60), ("Medium Risk (Field work)", 0.30), ("High Risk (Hazardous work)", 0.10))
+LIFESTYLES = (("Very Healthy", 0.10), ("Healthy", 0.35), ("Average", 0.35), ("Risky", 0.15), ("High Risk", 0.05))
+LIFE_COVERAGES = ((500000, 0.10), (1000000, 0.20), (2500000, 0.20), (5000000, 0.25), (10000000, 0.15), (25000000, 0.10))
+CLAIM_TYPES = (("Auto", 0.40), ("Property", 0.20), ("Cyber", 0.05), ("Health", 0.30), ("Life", 0.05))
+
+
+def _choice(rng, choices, rows):
+    """Draw `rows` labels from (label, weight) pairs as a pandas Categorical"""
+    labels = [label for label, _ in choices]
+    weights = np.array([weight for _, weight in choices])
+    codes = rng.choice(len(labels), rows, p=weights / weights.sum())
+    if isinstance(labels[0], str):
+        return pd.Categorical.from_codes(codes, labels)
+    return np.array(labels)[codes]
+
+
+def _normal_int(rng, mean, sd, low, high, rows):
+    return np.clip(np.rint(rng.normal(mean, sd, rows)), low, high).astype(np.int64)
+
+
+def _lognormal_int(rng, median, sigma, low, high, rows):
+    return np.clip(np.rint(rng.lognormal(np.log(median), sigma, rows)), low, high).astype(np.int64)
+
+
+def _counts(rng, mean, high, rows):
+    return np.minimum(rng.poisson(mean, rows), high)
+
+
+def auto_portfolio(rng, rows):
+    return {
+        "vehicle_age": np.minimum(np.rint(rng.gamma(2.0, 2.5, rows)), 30).astype(np.int64),
+        "driver_age": _normal_int(rng, 38, 12, 18, 80, rows),
+        "accident_history": _counts(rng, 0.3, 5, rows),
+        "mileage": _lognormal_int(rng, 12000, 0.5, 1000, 100000, rows),
+        "vehicle_type": _choice(rng, VEHICLE_TYPES, rows),
+        "city_tier": _choice(rng, CITY_TIERS, rows),
+        "violations": _counts(rng, 0.4, 5, rows),
+    }
+
+
+def property_portfolio(rng, rows):
+    return {
+        "property_age": np.minimum(np.rint(rng.gamma(2.0, 8.0, rows)), 100).astype(np.int64),
+        "location_risk": _choice(rng, LOCATION_RISKS, rows),
+        "construction_type": _choice(rng, CONSTRUCTION_TYPES, rows),
+        "flood_zone": rng.random(rows) < 0.15,
+        "property_value": _lognormal_int(rng, 60, 0.6, 5, 1000, rows),  # ₹ lakhs
+        "security_features": rng.binomial(6, 0.35, rows),
+        "floor_level": _choice(rng, FLOOR_LEVELS, rows),
+    }
+
+
+def cyber_portfolio(rng, rows):
+    has_security_policy = rng.random(rows) < 0.55
+    uses_mfa = rng.random(rows) < 0.45
+    return {
+        "num_employees": _lognormal_int(rng, 40, 1.3, 1, 100000, rows),
+        "has_security_policy": has_security_policy,
+        "past_incidents": _counts(rng, 0.3, 10, rows),
+        "uses_mfa": uses_mfa,
+        "business_type": _choice(rng, BUSINESS_TYPES, rows),
+        "annual_revenue": _choice(rng, ANNUAL_REVENUES, rows),
+        # Policy and MFA plus firewall, antivirus and backups
+        "security_measures": has_security_policy + uses_mfa + rng.binomial(3, 0.5, rows),
+    }
+
+
+def health_portfolio(rng, rows):
+    smoking_habit = _choice(rng, SMOKING_HABITS, rows)
+    age = _normal_int(rng, 40, 13, 18, 80, rows)
+    return {
+        "age": age,
+        "bmi": np.round(np.clip(rng.lognormal(np.log(24.5), 0.17, rows), 14.0, 50.0), 1),
+        "smoking": np.asarray(smoking_habit.isin(["Occasional smoker", "Regular smoker"])),
+        "exercise_frequency": _choice(rng, EXERCISE_FREQUENCIES, rows),
+        # Chronic conditions become more common with age
+        "chronic_conditions": np.minimum(rng.poisson(np.maximum(age - 30, 0) * 0.02), 8),
+        "family_history": rng.random(rows) < 0.35,
+        "smoking_habit": smoking_habit,
+        "alcohol": _choice(rng, ALCOHOL, rows),
+        "coverage_amount": _choice(rng, HEALTH_COVERAGES, rows),
+        "family_members": 1 + _counts(rng, 1.5, 7, rows),
+    }
+
+
+def life_portfolio(rng, rows):
+    return {
+        "age": _normal_int(rng, 38, 10, 18, 70, rows),
+        "gender": _choice(rng, GENDERS, rows),
+        "occupation": _choice(rng, OCCUPATIONS, rows),
+        "lifestyle": _choice(rng, LIFESTYLES, rows),
+        "coverage_amount": _choice(rng, LIFE_COVERAGES, rows),
+        "medical_exams": rng.random(rows) < 0.6,
+        "health_conditions": _counts(rng, 0.4, 5, rows),
+    }
+
+
+def claims_portfolio(rng, rows, start=0):
+    return {
+        "claim_id": np.arange(start, start + rows, dtype=np.int64),
+        "claim_amount": _lognormal_int(rng, 150000, 1.0, 1000, 100000000, rows),
+        "claim_type": _choice(rng, CLAIM_TYPES, rows),
+        "suspicious_docs": rng.random(rows) < 0.08,
+        "prior_fraud": rng.random(rows) < 0.03,
+    }
+
+
+GENERATORS = {
+    "auto": auto_portfolio,
+    "property": property_portfolio,
+    "cyber": cyber_portfolio,
+    "health": health_portfolio,
+    "life": life_portfolio,
+    "claims": claims_portfolio,
+}
+
+
+def generate(line, rows, chunk_size=1000000, seed=0):
+    """Yield the portfolio for `line` as DataFrames of at most `chunk_size` rows"""
+    generator = GENERATORS[line]
+    for index, start in enumerate(range(0, rows, chunk_size)):
+        # One independent stream per chunk keeps chunks reproducible on their own
+        rng = np.random.default_rng([seed, index])
+        size = min(chunk_size, rows - start)
+        columns = generator(rng, size, start) if line == "claims" else generator(rng, size)
+        yield pd.DataFrame(columns)
+
+
+def write(chunks, path, log=sys.stderr):
+    """Stream DataFrame chunks to a CSV or Parquet file, returning the row count"""
+    rows = 0
+    start = time.perf_counter()
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Writing Parquet needs pyarrow (pip install pyarrow); write a .csv instead") from None
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+                print(f"Wrote {rows:,} rows ({rows / (time.perf_counter() - start):,.0f} rows/sec)", file=log)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            for chunk in chunks:
+                chunk.to_csv(f, header=rows == 0, index=False)
+                rows += len(chunk)
+                print(f"Wrote {rows:,} rows ({rows / (time.perf_counter() - start):,.0f} rows/sec)", file=log)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic portfolio or claims file")
+    parser.add_argument("line", choices=sorted(GENERATORS), help="line of business, or claims")
+    parser.add_argument("rows", type=int, help="number of rows")
+    parser.add_argument("output", help="output file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=1000000, help="rows per chunk (default: 1000000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    write(generate(args.line, args.rows, args.chunk_size, args.seed), args.output)
+
+
+if __name__ == "__main__":
+    main()
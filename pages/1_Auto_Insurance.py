@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils.risk_calculator import calculate_auto_risk
+from utils.pricing import AUTO_PRICING
+from utils.latency import LatencyBudget
+from utils.quote_cache import QUOTE_CACHE, cached
+from utils.assessment_store import record_assessment
 
 st.set_page_config(page_title="Auto Insurance Assessment", page_icon="🚗", layout="wide")
 
@@ -166,14 +169,17 @@ with st.form("auto_insurance_form"):
     st.markdown('</div>', unsafe_allow_html=True)
 
 if submitted:
+    budget = LatencyBudget("Auto quote")
+    
     # Input validation with friendly messages
-    errors = []
-    if driver_age < 18:
-        errors.append("🚫 Driver must be at least 18 years old to get insurance.")
-    if mileage < 1000:
-        errors.append("🚫 Annual mileage seems too low. Please check your input.")
-    if driving_experience > (driver_age - 18):
-        errors.append("🚫 Driving experience cannot exceed years since legal driving age.")
+    with budget.stage("validation"):
+        errors = []
+        if driver_age < 18:
+            errors.append("🚫 Driver must be at least 18 years old to get insurance.")
+        if mileage < 1000:
+            errors.append("🚫 Annual mileage seems too low. Please check your input.")
+        if driving_experience > (driver_age - 18):
+            errors.append("🚫 Driving experience cannot exceed years since legal driving age.")
     
     if errors:
         st.error("Please correct the following issues:")
@@ -182,27 +188,30 @@ if submitted:
     else:
         # Show loading state
         with st.spinner("🔄 Calculating your personalized insurance quote..."):
-            import time
-            time.sleep(1)  # Simulate processing time
-            
-            # Calculate risk with enhanced factors
-            base_vehicle_age = vehicle_age
-            enhanced_mileage = mileage
-            
-            # Adjust for additional factors
-            vehicle_multiplier = {"Hatchback": 1.0, "Sedan": 1.1, "SUV": 1.2, "Luxury Car": 1.5, "Commercial Vehicle": 1.3}
-            city_multiplier = {"Tier 1 (Metro)": 1.3, "Tier 2 (Major City)": 1.1, "Tier 3 (Small City)": 1.0, "Rural": 0.9}
+            quote_inputs = {
+                "vehicle_age": vehicle_age,
+                "driver_age": driver_age,
+                "accident_history": accident_history,
+                "mileage": mileage,
+                "vehicle_type": vehicle_type,
+                "city_tier": city_tier,
+                "violations": violations
+            }
             
             # Calculate base risk
-            risk_score, recommendation, base_premium = calculate_auto_risk(base_vehicle_age, driver_age, accident_history, enhanced_mileage)
-            
-            # Adjust premium for additional factors
-            adjusted_premium = base_premium * vehicle_multiplier.get(vehicle_type, 1.0) * city_multiplier.get(city_tier, 1.0)
-            
-            if violations > 0:
-                adjusted_premium *= (1 + violations * 0.1)
+            with budget.stage("scoring"):
+                risk_score, recommendation, base_premium = cached(
+                    "auto.score", lambda: AUTO_PRICING.score(**quote_inputs), **quote_inputs
+                )
             
-            adjusted_premium = int(adjusted_premium)
+            # Adjust premium for vehicle, city and violations
+            with budget.stage("adjustment"):
+                adjusted_premium = cached(
+                    "auto.adjust", lambda: AUTO_PRICING.adjust(base_premium, quote_inputs),
+                    base_premium=base_premium, **quote_inputs
+                )
+        
+        budget.start("rendering")
         
         # Results section with enhanced styling
         st.markdown('<div class="result-container">', unsafe_allow_html=True)
@@ -278,18 +287,19 @@ if submitted:
         # Comparison table
         st.markdown("#### 🏆 Quick Insurer Comparison")
         
-        import pandas as pd
-        comparison_data = {
-            "Insurer": ["HDFC ERGO", "ICICI Lombard", "Bajaj Allianz", "TATA AIG"],
-            "Premium Range": [f"₹{adjusted_premium-2000:,} - ₹{adjusted_premium+1000:,}",
-                            f"₹{adjusted_premium-1500:,} - ₹{adjusted_premium+1500:,}",
-                            f"₹{adjusted_premium-1000:,} - ₹{adjusted_premium+2000:,}",
-                            f"₹{adjusted_premium-500:,} - ₹{adjusted_premium+2500:,}"],
-            "Rating": ["4.5/5", "4.3/5", "4.2/5", "4.0/5"],
-            "Best For": ["Digital services", "Comprehensive coverage", "Competitive rates", "Customer service"]
-        }
+        def insurer_comparison():
+            comparison_data = {
+                "Insurer": ["HDFC ERGO", "ICICI Lombard", "Bajaj Allianz", "TATA AIG"],
+                "Premium Range": [f"₹{adjusted_premium-2000:,} - ₹{adjusted_premium+1000:,}",
+                                f"₹{adjusted_premium-1500:,} - ₹{adjusted_premium+1500:,}",
+                                f"₹{adjusted_premium-1000:,} - ₹{adjusted_premium+2000:,}",
+                                f"₹{adjusted_premium-500:,} - ₹{adjusted_premium+2500:,}"],
+                "Rating": ["4.5/5", "4.3/5", "4.2/5", "4.0/5"],
+                "Best For": ["Digital services", "Comprehensive coverage", "Competitive rates", "Customer service"]
+            }
+            return pd.DataFrame(comparison_data)
         
-        df = pd.DataFrame(comparison_data)
+        df = cached("auto.insurers", insurer_comparison, premium=adjusted_premium)
         st.dataframe(df, use_container_width=True)
         
         # Save to session state
@@ -305,6 +315,7 @@ if submitted:
             "city_tier": city_tier,
             "fuel_type": fuel_type
         }
+        record_assessment("auto", risk_score=risk_score, premium=adjusted_premium, details=st.session_state["auto_risk"])
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -323,3 +334,14 @@ if submitted:
         with col_c:
             if st.button("💾 Save Quote", use_container_width=True):
                 st.success("Quote saved! Check your email for details.")
+        
+        budget.stop("rendering")
+        
+        # Latency debug panel
+        with st.expander("🛠️ Quote Latency (debug)", expanded=bool(budget.over_budget())):
+            st.dataframe(pd.DataFrame(budget.report()), use_container_width=True, hide_index=True)
+            stats = QUOTE_CACHE.stats()
+            st.caption(
+                f"Quote cache: {stats['entries']:,} entries, {stats['hits']:,} hits, "
+                f"{stats['misses']:,} misses ({stats['hit_rate']:.0%} hit rate)"
+            )
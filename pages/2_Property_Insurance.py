@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.risk_calculator import calculate_property_risk
+from utils.pricing import PROPERTY_PRICING
+from utils.quote_cache import cached, cached_quote
+from utils.assessment_store import record_assessment
 
 st.set_page_config(page_title="Property Insurance Assessment", page_icon="🏠", layout="wide")
 
@@ -208,35 +210,20 @@ with st.form("property_form"):
 
 if submitted:
     # Enhanced risk calculation with additional parameters
-    risk_score, recommendation, premium_estimate = calculate_property_risk(
-        property_age, 
-        location_risk.split(" ")[0], 
-        construction_type, 
-        flood_zone
+    # Premium includes property value, security discount and floor level adjustments
+    quote = cached_quote(
+        PROPERTY_PRICING,
+        property_age=property_age,
+        location_risk=location_risk.split(" ")[0],
+        construction_type=construction_type,
+        flood_zone=flood_zone,
+        property_value=property_value,
+        security_features=len(security_features),
+        floor_level=floor_level
     )
-    
-    # Adjust premium based on additional factors
-    base_premium = premium_estimate
-    
-    # Property value adjustment
-    if property_value > 100:
-        base_premium *= 1.3
-    elif property_value > 75:
-        base_premium *= 1.2
-    elif property_value > 50:
-        base_premium *= 1.1
-    
-    # Security features discount
-    security_discount = len(security_features) * 0.02  # 2% per feature
-    base_premium *= (1 - min(security_discount, 0.15))  # Max 15% discount
-    
-    # Floor level adjustment
-    if "Ground Floor" in floor_level:
-        base_premium *= 1.1  # Higher risk
-    elif "8th Floor" in floor_level:
-        base_premium *= 1.05  # Slightly higher risk
-    
-    final_premium = int(base_premium)
+    risk_score = quote["risk_score"]
+    recommendation = quote["recommendation"]
+    final_premium = quote["premium"]
     
     # Display results with enhanced UI
     st.success("🎯 Property Risk Assessment Complete!", icon="✅")
@@ -299,16 +286,18 @@ if submitted:
     # Top insurers for property insurance
     st.markdown("### 🏢 Top Property Insurance Providers in India")
     
-    insurers_data = [
-        ["HDFC ERGO General", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.6⭐", "Quick Claim Settlement", "Online & Offline"],
-        ["ICICI Lombard", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.4⭐", "24x7 Customer Support", "Digital First"],
-        ["Bajaj Allianz", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.5⭐", "Wide Network", "Comprehensive Coverage"],
-        ["New India Assurance", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.0:,.0f}", "4.2⭐", "Government Backed", "Trusted Brand"],
-        ["Tata AIG", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.3⭐", "Smart Claims Process", "Innovation Focus"],
-        ["Oriental Insurance", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.1⭐", "Affordable Premiums", "PSU Reliability"]
-    ]
-    
-    df = pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Key Strength", "Service Type"])
+    def insurer_comparison():
+        insurers_data = [
+            ["HDFC ERGO General", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.6⭐", "Quick Claim Settlement", "Online & Offline"],
+            ["ICICI Lombard", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.4⭐", "24x7 Customer Support", "Digital First"],
+            ["Bajaj Allianz", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.5⭐", "Wide Network", "Comprehensive Coverage"],
+            ["New India Assurance", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.0:,.0f}", "4.2⭐", "Government Backed", "Trusted Brand"],
+            ["Tata AIG", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.3⭐", "Smart Claims Process", "Innovation Focus"],
+            ["Oriental Insurance", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.1⭐", "Affordable Premiums", "PSU Reliability"]
+        ]
+        return pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Key Strength", "Service Type"])
+    
+    df = cached("property.insurers", insurer_comparison, premium=final_premium)
     st.dataframe(df, use_container_width=True)
     
     # Coverage breakdown
@@ -345,3 +334,4 @@ if submitted:
         "premium_estimate": final_premium,
         "coverage_percent": coverage_percent
     }
+    record_assessment("property", risk_score=risk_score, premium=final_premium, details=st.session_state["property_risk"])
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.risk_calculator import calculate_cyber_risk
+from utils.pricing import CYBER_PRICING
+from utils.quote_cache import cached, cached_quote
+from utils.assessment_store import record_assessment
 
 st.set_page_config(page_title="Cyber Insurance Assessment", page_icon="🔒", layout="wide")
 
@@ -231,32 +233,7 @@ with st.form("cyber_form"):
 
 if submitted:
     # Enhanced risk calculation
-    risk_score, recommendation, premium_estimate = calculate_cyber_risk(
-        num_employees, 
-        has_security_policy, 
-        past_incidents, 
-        uses_mfa
-    )
-    
-    # Advanced premium calculation based on additional factors
-    base_premium = premium_estimate
-    
-    # Business type risk multiplier
-    business_risk = {
-        "Financial Services": 1.5, "Healthcare": 1.4, "E-commerce": 1.3,
-        "IT Services": 1.2, "Government": 1.4, "Education": 1.1,
-        "Manufacturing": 1.0, "Retail": 1.1, "Other": 1.0
-    }
-    base_premium *= business_risk.get(business_type, 1.0)
-    
-    # Revenue-based adjustment
-    revenue_multiplier = {
-        "< 1 Crore": 0.7, "1-5 Crores": 1.0, "5-25 Crores": 1.3,
-        "25-100 Crores": 1.6, "> 100 Crores": 2.0
-    }
-    base_premium *= revenue_multiplier.get(annual_revenue, 1.0)
-    
-    # Security posture discount
+    # Security posture score
     security_score = 0
     security_score += 1 if has_security_policy else 0
     security_score += 1 if uses_mfa else 0
@@ -264,14 +241,20 @@ if submitted:
     security_score += 1 if has_antivirus else 0
     security_score += 1 if has_backup else 0
     
-    security_discount = security_score * 0.03  # 3% per security measure
-    base_premium *= (1 - min(security_discount, 0.20))  # Max 20% discount
-    
-    # Past incidents penalty
-    if past_incidents > 0:
-        base_premium *= (1 + past_incidents * 0.15)  # 15% increase per incident
-    
-    final_premium = int(base_premium)
+    # Premium includes business type, revenue, security discount and incident adjustments
+    quote = cached_quote(
+        CYBER_PRICING,
+        num_employees=num_employees,
+        has_security_policy=has_security_policy,
+        past_incidents=past_incidents,
+        uses_mfa=uses_mfa,
+        business_type=business_type,
+        annual_revenue=annual_revenue,
+        security_measures=security_score
+    )
+    risk_score = quote["risk_score"]
+    recommendation = quote["recommendation"]
+    final_premium = quote["premium"]
     
     # Calculate risk level
     total_risk_factors = past_incidents + (0 if has_security_policy else 2) + (0 if uses_mfa else 1)
@@ -386,16 +369,18 @@ if submitted:
     # Insurance providers
     st.markdown("### 🏢 Top Cyber Insurance Providers in India")
     
-    insurers_data = [
-        ["HDFC ERGO Cyber Sachet", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.1:,.0f}", "4.5⭐", "SME Focused", "₹1-50 Cr Coverage"],
-        ["ICICI Lombard CyberSafe", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "24x7 Support", "Incident Response"],
-        ["Bajaj Allianz CyberEdge", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.2:,.0f}", "4.3⭐", "Comprehensive Cover", "Legal Support"],
-        ["Tata AIG Cyber Secure", f"₹{final_premium*0.88:,.0f} - ₹{final_premium*1.1:,.0f}", "4.4⭐", "Risk Assessment", "Prevention Focus"],
-        ["New India Cyber Protect", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.05:,.0f}", "4.1⭐", "Government Backing", "Affordable Rates"],
-        ["Oriental Cyber Shield", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.08:,.0f}", "4.2⭐", "PSU Trust", "Quick Claims"]
-    ]
-    
-    df = pd.DataFrame(insurers_data, columns=["Insurance Product", "Premium Range", "Rating", "Key Feature", "Coverage"])
+    def insurer_comparison():
+        insurers_data = [
+            ["HDFC ERGO Cyber Sachet", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.1:,.0f}", "4.5⭐", "SME Focused", "₹1-50 Cr Coverage"],
+            ["ICICI Lombard CyberSafe", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "24x7 Support", "Incident Response"],
+            ["Bajaj Allianz CyberEdge", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.2:,.0f}", "4.3⭐", "Comprehensive Cover", "Legal Support"],
+            ["Tata AIG Cyber Secure", f"₹{final_premium*0.88:,.0f} - ₹{final_premium*1.1:,.0f}", "4.4⭐", "Risk Assessment", "Prevention Focus"],
+            ["New India Cyber Protect", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.05:,.0f}", "4.1⭐", "Government Backing", "Affordable Rates"],
+            ["Oriental Cyber Shield", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.08:,.0f}", "4.2⭐", "PSU Trust", "Quick Claims"]
+        ]
+        return pd.DataFrame(insurers_data, columns=["Insurance Product", "Premium Range", "Rating", "Key Feature", "Coverage"])
+    
+    df = cached("cyber.insurers", insurer_comparison, premium=final_premium)
     st.dataframe(df, use_container_width=True)
     
     # Coverage details
@@ -434,3 +419,4 @@ if submitted:
         "coverage_amount": coverage_amount,
         "risk_level": risk_level
     }
+    record_assessment("cyber", risk_score=adjusted_risk_score, premium=final_premium, details=st.session_state["cyber_risk"])
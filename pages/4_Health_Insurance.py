@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.risk_calculator import calculate_health_risk
+from utils.pricing import HEALTH_PRICING
+from utils.quote_cache import cached, cached_quote
+from utils.assessment_store import record_assessment
 
 st.set_page_config(page_title="Health Insurance Assessment", page_icon="🏥", layout="wide")
 
@@ -306,55 +308,23 @@ if submitted:
     chronic_count = len([c for c in chronic_conditions if c != "None"])
     family_history_binary = len([f for f in family_history if f != "None"]) > 0
     
-    risk_score, recommendation, premium_estimate = calculate_health_risk(
-        age, 
-        bmi, 
-        smoking_binary, 
-        exercise_frequency, 
-        chronic_count, 
-        family_history_binary
+    # Premium includes age, lifestyle, coverage and family size adjustments
+    quote = cached_quote(
+        HEALTH_PRICING,
+        age=age,
+        bmi=bmi,
+        smoking=smoking_binary,
+        exercise_frequency=exercise_frequency,
+        chronic_conditions=chronic_count,
+        family_history=family_history_binary,
+        smoking_habit=smoking,
+        alcohol=alcohol,
+        coverage_amount=coverage_amount,
+        family_members=family_members
     )
-    
-    # Advanced premium calculation
-    base_premium = premium_estimate
-    
-    # Age-based adjustment
-    if age > 60:
-        base_premium *= 2.0
-    elif age > 45:
-        base_premium *= 1.5
-    elif age > 35:
-        base_premium *= 1.2
-    
-    # Lifestyle adjustments
-    if "Regular smoker" in smoking:
-        base_premium *= 1.5
-    elif "Occasional smoker" in smoking:
-        base_premium *= 1.3
-    
-    if "Heavy drinking" in alcohol:
-        base_premium *= 1.3
-    elif "Regular" in alcohol:
-        base_premium *= 1.1
-    
-    # Exercise discount
-    if "Daily" in exercise_frequency:
-        base_premium *= 0.9
-    elif "Often" in exercise_frequency:
-        base_premium *= 0.95
-    
-    # Coverage amount adjustment
-    coverage_multiplier = {
-        "₹5 Lakhs": 1.0, "₹10 Lakhs": 1.8, "₹15 Lakhs": 2.5,
-        "₹25 Lakhs": 3.8, "₹50 Lakhs": 7.0, "₹1 Crore+": 12.0
-    }
-    base_premium *= coverage_multiplier.get(coverage_amount, 1.0)
-    
-    # Family members adjustment
-    if family_members > 1:
-        base_premium *= (1 + (family_members - 1) * 0.7)  # 70% for each additional member
-    
-    final_premium = int(base_premium)
+    risk_score = quote["risk_score"]
+    recommendation = quote["recommendation"]
+    final_premium = quote["premium"]
     
     # Display results
     st.success("🎯 Health Insurance Assessment Complete!", icon="✅")
@@ -481,16 +451,18 @@ if submitted:
     # Top health insurance providers
     st.markdown("### 🏥 Top Health Insurance Providers in India")
     
-    insurers_data = [
-        ["Star Health Insurance", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.3⭐", "Health Specialist", "No Room Rent Limit"],
-        ["HDFC ERGO Health", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.5⭐", "Wide Network", "Quick Claim Settlement"],
-        ["ICICI Lombard Health", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "Digital First", "24x7 Support"],
-        ["Bajaj Allianz Health", f"₹{final_premium*1.0:,.0f} - ₹{final_premium*1.2:,.0f}", "4.2⭐", "Comprehensive Cover", "Health Coaching"],
-        ["New India Mediclaim", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.0:,.0f}", "4.1⭐", "Government Backed", "Affordable Premium"],
-        ["Max Bupa Health", f"₹{final_premium*1.05:,.0f} - ₹{final_premium*1.25:,.0f}", "4.4⭐", "Premium Care", "International Coverage"]
-    ]
-    
-    df = pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Specialty", "Key Feature"])
+    def insurer_comparison():
+        insurers_data = [
+            ["Star Health Insurance", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.3⭐", "Health Specialist", "No Room Rent Limit"],
+            ["HDFC ERGO Health", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.05:,.0f}", "4.5⭐", "Wide Network", "Quick Claim Settlement"],
+            ["ICICI Lombard Health", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "Digital First", "24x7 Support"],
+            ["Bajaj Allianz Health", f"₹{final_premium*1.0:,.0f} - ₹{final_premium*1.2:,.0f}", "4.2⭐", "Comprehensive Cover", "Health Coaching"],
+            ["New India Mediclaim", f"₹{final_premium*0.8:,.0f} - ₹{final_premium*1.0:,.0f}", "4.1⭐", "Government Backed", "Affordable Premium"],
+            ["Max Bupa Health", f"₹{final_premium*1.05:,.0f} - ₹{final_premium*1.25:,.0f}", "4.4⭐", "Premium Care", "International Coverage"]
+        ]
+        return pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Specialty", "Key Feature"])
+    
+    df = cached("health.insurers", insurer_comparison, premium=final_premium)
     st.dataframe(df, use_container_width=True)
     
     # Save to session state
@@ -508,3 +480,4 @@ if submitted:
         "health_status": health_status,
         "wellness_score": wellness_score
     }
+    record_assessment("health", risk_score=risk_score, premium=final_premium, details=st.session_state["health_risk"])
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.risk_calculator import calculate_life_risk
+from utils.pricing import LIFE_PRICING
+from utils.quote_cache import cached, cached_quote
+from utils.assessment_store import record_assessment
 
 st.set_page_config(page_title="Life Insurance Assessment", page_icon="👨‍👩‍👧‍👦", layout="wide")
 
@@ -338,40 +340,22 @@ with st.form("life_form"):
 
 if submitted:
     # Enhanced risk calculation
-    risk_score, recommendation, premium_estimate, mortality_rate = calculate_life_risk(
-        age, 
-        gender, 
-        occupation_risk, 
-        lifestyle, 
-        coverage_amount, 
-        medical_exams
-    )
-    
-    # Advanced premium calculation
-    base_premium = premium_estimate
-    
-    # Age and gender adjustments
-    if gender == "Female":
-        base_premium *= 0.9  # Lower risk for females
-    
-    # Occupation risk adjustment
-    occupation_multiplier = {"Low Risk (Office job)": 1.0, "Medium Risk (Field work)": 1.2, "High Risk (Hazardous work)": 1.5}
-    base_premium *= occupation_multiplier.get(occupation_risk, 1.0)
-    
-    # Health conditions adjustment
+    # Premium includes gender, occupation, health condition, medical exam and lifestyle adjustments
     health_risk_count = len([h for h in health_conditions if h != "None"])
-    if health_risk_count > 0:
-        base_premium *= (1 + health_risk_count * 0.2)
-    
-    # Medical exam discount
-    if medical_exams:
-        base_premium *= 0.9
-    
-    # Lifestyle adjustment
-    lifestyle_multiplier = {"Very Healthy": 0.85, "Healthy": 0.95, "Average": 1.0, "Risky": 1.3, "High Risk": 1.6}
-    base_premium *= lifestyle_multiplier.get(lifestyle, 1.0)
-    
-    final_premium = int(base_premium)
+    quote = cached_quote(
+        LIFE_PRICING,
+        age=age,
+        gender=gender,
+        occupation=occupation_risk,
+        lifestyle=lifestyle,
+        coverage_amount=coverage_amount,
+        medical_exams=medical_exams,
+        health_conditions=health_risk_count
+    )
+    risk_score = quote["risk_score"]
+    recommendation = quote["recommendation"]
+    mortality_rate = quote["mortality_rate"]
+    final_premium = quote["premium"]
     
     # Display results
     st.success("🎯 Life Insurance Assessment Complete!", icon="✅")
@@ -479,16 +463,18 @@ if submitted:
     # Top life insurance providers
     st.markdown("### 🏢 Top Life Insurance Providers in India")
     
-    insurers_data = [
-        ["LIC of India", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.0:,.0f}", "4.2⭐", "Market Leader", "Guaranteed Claims"],
-        ["HDFC Life", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.5⭐", "Digital Excellence", "Quick Processing"],
-        ["ICICI Prudential", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "Product Innovation", "Online Services"],
-        ["SBI Life", f"₹{final_premium*0.88:,.0f} - ₹{final_premium*1.08:,.0f}", "4.3⭐", "Bank Backing", "Wide Reach"],
-        ["Max Life", f"₹{final_premium*1.0:,.0f} - ₹{final_premium*1.2:,.0f}", "4.4⭐", "Customer Service", "Flexible Plans"],
-        ["Bajaj Allianz Life", f"₹{final_premium*0.92:,.0f} - ₹{final_premium*1.12:,.0f}", "4.3⭐", "Comprehensive Cover", "Health Benefits"]
-    ]
-    
-    df = pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Strength", "Key Feature"])
+    def insurer_comparison():
+        insurers_data = [
+            ["LIC of India", f"₹{final_premium*0.85:,.0f} - ₹{final_premium*1.0:,.0f}", "4.2⭐", "Market Leader", "Guaranteed Claims"],
+            ["HDFC Life", f"₹{final_premium*0.9:,.0f} - ₹{final_premium*1.1:,.0f}", "4.5⭐", "Digital Excellence", "Quick Processing"],
+            ["ICICI Prudential", f"₹{final_premium*0.95:,.0f} - ₹{final_premium*1.15:,.0f}", "4.4⭐", "Product Innovation", "Online Services"],
+            ["SBI Life", f"₹{final_premium*0.88:,.0f} - ₹{final_premium*1.08:,.0f}", "4.3⭐", "Bank Backing", "Wide Reach"],
+            ["Max Life", f"₹{final_premium*1.0:,.0f} - ₹{final_premium*1.2:,.0f}", "4.4⭐", "Customer Service", "Flexible Plans"],
+            ["Bajaj Allianz Life", f"₹{final_premium*0.92:,.0f} - ₹{final_premium*1.12:,.0f}", "4.3⭐", "Comprehensive Cover", "Health Benefits"]
+        ]
+        return pd.DataFrame(insurers_data, columns=["Insurance Provider", "Premium Range", "Rating", "Strength", "Key Feature"])
+    
+    df = cached("life.insurers", insurer_comparison, premium=final_premium)
     st.dataframe(df, use_container_width=True)
     
     # Product recommendations
@@ -531,3 +517,4 @@ if submitted:
         "insurance_gap": insurance_gap,
         "protection_ratio": protection_ratio
     }
+    record_assessment("life", risk_score=risk_score, premium=final_premium, details=st.session_state["life_risk"])
@@ -1,5 +1,10 @@
+import time
+
 import streamlit as st
 from utils.fraud_detector import detect_fraud
+from utils.assessment_store import record_assessment
+from utils.claim_index import ClaimVelocity, claim_index
+from utils.fraud_rings import RingFeatures, claim_graph
 
 st.set_page_config(page_title="Fraud Detection", page_icon="🕵️")
 st.markdown("<h1 style='color:#d35400;'>🕵️ Fraud Detection System</h1>", unsafe_allow_html=True)
@@ -16,6 +21,11 @@ with st.form("fraud_form"):
     suspicious_docs = st.checkbox("Suspicious Documents?", help="Are any documents flagged as suspicious?")
     prior_fraud = st.checkbox("Prior Fraud History?")
     prior_fraud = st.checkbox("Prior Fraud History?", help="Has the claimant been involved in fraud before?")
+    claimant_id = st.text_input("Claimant ID (optional)", help="Enables duplicate and claim velocity checks against recent claims.")
+    policy_number = st.text_input("Policy Number (optional)", help="Counts recent claims on the same policy.")
+    provider = st.text_input("Garage / Hospital (optional)", help="Links claimants who use the same garage or hospital.")
+    phone = st.text_input("Phone Number (optional)", help="Links claimants who share a phone number.")
+    bank_account = st.text_input("Bank Account (optional)", help="Links claimants paid into the same bank account.")
     submitted = st.form_submit_button("Analyze Fraud Risk")
 
 if submitted:
@@ -26,14 +36,32 @@ if submitted:
         for e in errors:
             st.error(e)
     else:
-        fraud_score, alerts = detect_fraud(claim_amount, claim_type, suspicious_docs, prior_fraud)
+        velocity = ClaimVelocity()
+        ring = RingFeatures()
+        if claimant_id.strip():
+            velocity = claim_index().add(claimant_id.strip(), claim_amount, time.time(), policy_number.strip() or None)
+            ring = claim_graph().add(claimant_id.strip(), policy_number.strip() or None, provider.strip() or None,
+                                     phone.strip() or None, bank_account.strip() or None)
+        fraud_score, alerts = detect_fraud(claim_amount, claim_type, suspicious_docs, prior_fraud,
+                                           **velocity._asdict(), **ring._asdict())
         st.metric("Fraud Score", f"{fraud_score}/10")
         st.warning(alerts)
+        if claimant_id.strip():
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Claimant Claims (7 days)", velocity.claims_7d)
+            col2.metric("Policy Claims (30 days)", velocity.policy_claims_30d)
+            col3.metric("Near-Duplicate Amounts", velocity.duplicate_amounts)
+            col1, col2 = st.columns(2)
+            col1.metric("Linked Claimants", ring.ring_size)
+            col2.metric("Ring Density", f"{ring.ring_density:.2f}")
         st.session_state["fraud_detection"] = {
             "claim_amount": claim_amount,
             "claim_type": claim_type,
             "suspicious_docs": suspicious_docs,
             "prior_fraud": prior_fraud,
+            **velocity._asdict(),
+            **ring._asdict(),
             "fraud_score": fraud_score,
             "alerts": alerts
         }
+        record_assessment("fraud", fraud_score=fraud_score, claim_amount=claim_amount, details=st.session_state["fraud_detection"])
@@ -4,10 +4,121 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
+from utils.assessment_store import DOCUMENT, FRAUD, FRAUD_SCORED, amount_bucket_label, assessment_store
+from utils.chart_data import portfolio_hexbin, portfolio_quantiles, portfolio_volume
+from utils.export import FORMATS, TempExport, assessment_schema, available_formats, export
+from utils.fraud_detector import FRAUD_RULES
+
 st.set_page_config(page_title="Risk Analytics Dashboard", page_icon="📊")
 st.markdown("<h1 style='color:#1f77b4;'>📊 Risk Analytics Dashboard</h1>", unsafe_allow_html=True)
 st.markdown("<span style='color:#555;'>Business intelligence, predictive analytics, and portfolio risk analysis.</span>", unsafe_allow_html=True)
 
+LINE_NAMES = {
+    "auto": "Auto", "property": "Property", "cyber": "Cyber", "health": "Health", "life": "Life",
+    FRAUD: "Fraud", DOCUMENT: "Documents",
+}
+BAND_NAMES = {0: "High Risk", 1: "Moderate Risk", 2: "Low Risk"}
+BAND_COLORS = {"High Risk": "#e74c3c", "Moderate Risk": "#f39c12", "Low Risk": "#27ae60"}
+
+# Portfolio view, from the aggregates the assessment store maintains
+st.subheader("🏦 Portfolio Overview")
+store = assessment_store()
+aggregates = store.aggregates()
+aggregates["Line"] = aggregates["line"].map(LINE_NAMES)
+aggregates["Risk Band"] = aggregates["risk_band"].map(BAND_NAMES)
+portfolio = aggregates[~aggregates["line"].isin(FRAUD_SCORED)]
+claims = aggregates[aggregates["line"] == FRAUD]
+
+if portfolio.empty and claims.empty:
+    st.info("No assessments have been recorded yet. To explore the dashboard at scale, load a synthetic "
+            "book of business with `python -m utils.assessment_store load auto 1000000`.")
+else:
+    assessments = int(portfolio["count"].sum())
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Assessments", f"{assessments:,}")
+    with col2:
+        st.metric("Annual Premium", f"₹{portfolio['amount_sum'].sum():,.0f}")
+    with col3:
+        st.metric("Average Risk Score", f"{portfolio['score_sum'].sum() / assessments:.1f}/10" if assessments else "N/A")
+    with col4:
+        st.metric("Fraud Checks", f"{int(claims['count'].sum()):,}")
+
+    # Charts built from raw assessments are binned or downsampled server side
+    # (utils/chart_data.py), so their size does not grow with the book
+    volume = portfolio_volume(store)
+    if len(volume) > 1:
+        fig = px.line(volume, x="x", y="y", title="Assessments per Minute",
+                      labels={"x": "Time", "y": "Assessments"})
+        st.plotly_chart(fig, use_container_width=True)
+
+    if not portfolio.empty:
+        lines = [LINE_NAMES[line] for line in LINE_NAMES if line in set(portfolio["line"])]
+        by_band = portfolio.groupby(["Line", "Risk Band"], as_index=False)["count"].sum()
+        fig = px.bar(by_band, x="Line", y="count", color="Risk Band", title="Assessments by Line and Risk Band",
+                     labels={"count": "Assessments"}, category_orders={"Line": lines, "Risk Band": list(BAND_NAMES.values())},
+                     color_discrete_map=BAND_COLORS)
+        st.plotly_chart(fig, use_container_width=True)
+
+        selected = st.selectbox("Distribution for", ["All Lines"] + lines)
+        selection = portfolio if selected == "All Lines" else portfolio[portfolio["Line"] == selected]
+
+        col1, col2 = st.columns(2)
+        with col1:
+            scores = selection.groupby("score", as_index=False)["count"].sum()
+            fig = px.bar(scores, x="score", y="count", title="Risk Score Distribution",
+                         labels={"score": "Risk Score", "count": "Assessments"})
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            buckets = selection.groupby(["amount_bucket", "Line"], as_index=False)["count"].sum()
+            buckets["Premium"] = buckets["amount_bucket"].map(amount_bucket_label)
+            fig = px.bar(buckets, x="Premium", y="count", color="Line", title="Premium Distribution",
+                         labels={"count": "Assessments"},
+                         category_orders={"Premium": [amount_bucket_label(b) for b in sorted(buckets["amount_bucket"].unique())]})
+            st.plotly_chart(fig, use_container_width=True)
+
+        if selected != "All Lines":
+            line = next(code for code, name in LINE_NAMES.items() if name == selected)
+            col1, col2 = st.columns(2)
+            with col1:
+                density = portfolio_hexbin(store, line)
+                fig = px.scatter(density, x="x", y="premium", color="count", log_y=True,
+                                 title="Risk Score vs Premium Density", color_continuous_scale="Viridis",
+                                 labels={"x": "Risk Score", "premium": "Premium (₹)", "count": "Assessments"})
+                fig.update_traces(marker=dict(symbol="hexagon", size=11))
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                quantiles = portfolio_quantiles(store, line)
+                fig = go.Figure(go.Bar(
+                    x=(quantiles["left"] + quantiles["right"]) / 2,
+                    y=quantiles["density"],
+                    width=quantiles["right"] - quantiles["left"],
+                    customdata=quantiles[["left", "right"]],
+                    hovertemplate="₹%{customdata[0]:,.0f} - ₹%{customdata[1]:,.0f}<extra></extra>",
+                ))
+                fig.update_layout(title="Premium Quantile Histogram", xaxis_title="Premium (₹)", yaxis_title="Density")
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.caption("Pick a line to see its risk score vs premium density.")
+
+        summary = portfolio.groupby("Line").agg(
+            Assessments=("count", "sum"), score_sum=("score_sum", "sum"), amount_sum=("amount_sum", "sum"))
+        high_risk = portfolio[portfolio["risk_band"] == 0].groupby("Line")["count"].sum()
+        summary["Average Risk Score"] = (summary["score_sum"] / summary["Assessments"]).round(2)
+        summary["Average Premium"] = (summary["amount_sum"] / summary["Assessments"]).map(lambda x: f"₹{x:,.0f}")
+        summary["Total Premium"] = summary["amount_sum"].map(lambda x: f"₹{x:,.0f}")
+        summary["High Risk Share"] = (high_risk.reindex(summary.index, fill_value=0) / summary["Assessments"]).map(lambda x: f"{x:.1%}")
+        st.dataframe(summary.drop(columns=["score_sum", "amount_sum"]).reindex(lines), use_container_width=True)
+
+    if not claims.empty:
+        fraud_scores = claims.groupby(["score", "Risk Band"], as_index=False)["count"].sum()
+        fig = px.bar(fraud_scores, x="score", y="count", color="Risk Band", title="Fraud Score Distribution",
+                     labels={"score": "Fraud Score", "count": "Claims"},
+                     color_discrete_map=BAND_COLORS)
+        st.plotly_chart(fig, use_container_width=True)
+
+st.subheader("🧾 Your Session")
+
 # Collect session state data
 auto = st.session_state.get("auto_risk", {})
 property_ = st.session_state.get("property_risk", {})
@@ -77,7 +188,7 @@ if data:
         fig3.update_traces(textposition="top center")
         st.plotly_chart(fig3, use_container_width=True)
 
-else:
+elif portfolio.empty:
     st.info("No risk assessment data available. Complete an assessment to view analytics.")
     
     # Show sample analytics for demo
@@ -102,6 +213,8 @@ else:
         fig2 = px.line(sample_data, x='Insurance Type', y='Claims Count',
                       title='Claims Volume by Insurance Type', markers=True)
         st.plotly_chart(fig2, use_container_width=True)
+else:
+    st.info("Complete an assessment to compare it with the portfolio.")
 
 # Fraud detection results
 if fraud:
@@ -117,6 +230,11 @@ if fraud:
     
     st.warning(fraud.get('alerts', 'No alerts'))
 
+rule_stats = FRAUD_RULES.stats()
+if any(row["Evaluated"] for row in rule_stats):
+    with st.expander("🧮 Fraud Rule Hits"):
+        st.dataframe(pd.DataFrame(rule_stats), use_container_width=True, hide_index=True)
+
 # Business insights
 st.subheader("💡 Business Insights")
 
@@ -140,13 +258,55 @@ with col2:
     - **Customer Retention**: 91%
     """)
 
-# Export functionality
-if data:
+# Export functionality: streamed from the assessment store a chunk at a time
+# into a temporary file, so exporting the whole book never builds it in memory
+if store.count():
     st.subheader("📥 Export Data")
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="Download Assessment Data as CSV",
-        data=csv,
-        file_name="risk_assessment_data.csv",
-        mime="text/csv"
-    )
+    formats = available_formats()
+    col1, col2 = st.columns(2)
+    with col1:
+        export_line = st.selectbox("Assessments", [None, *LINE_NAMES],
+                                   format_func=lambda line: "All lines" if line is None else LINE_NAMES[line])
+    with col2:
+        export_format = st.selectbox("Format", formats, format_func=lambda fmt: FORMATS[fmt][0])
+    if len(formats) < len(FORMATS):
+        st.caption("Install pyarrow to export Parquet or Arrow IPC.")
+    include_details = st.checkbox("Include assessment details (JSON)")
+
+    if st.button("Prepare Export"):
+        previous = st.session_state.pop("export", None)
+        if previous:
+            previous["file"].remove()
+        label, mime, extension = FORMATS[export_format]
+        # Deleted when replaced by the next export or when the session ends
+        file = TempExport(extension)
+        bar = st.progress(0.0, text="Exporting...")
+        total = max(1, store.count(export_line))
+
+        def progress(rows, size):
+            bar.progress(min(rows / total, 1.0), text=f"Exported {rows:,} rows ({size / 1e6:,.1f} MB)")
+
+        schema = assessment_schema(include_details) if export_format != "csv" else None
+        stats = export(store.iter_assessments(export_line, details=include_details),
+                       export_format, file.path, schema=schema, progress=progress)
+        bar.empty()
+        name = "all" if export_line is None else export_line
+        st.session_state.export = {**stats, "file": file, "mime": mime,
+                                   "file_name": f"risk_assessments_{name}{extension}"}
+
+    result = st.session_state.get("export")
+    if result and result["file"].exists():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Rows", f"{result['rows']:,}")
+        with col2:
+            st.metric("Size", f"{result['bytes'] / 1e6:,.1f} MB")
+        with col3:
+            st.metric("Throughput", f"{result['bytes_per_sec'] / 1e6:,.1f} MB/s")
+        with open(result["file"].path, "rb") as f:
+            st.download_button(
+                label=f"Download {result['file_name']}",
+                data=f,
+                file_name=result["file_name"],
+                mime=result["mime"]
+            )
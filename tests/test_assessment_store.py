@@ -0,0 +1,43 @@
+import sqlite3
+
+import numpy as np
+
+from utils.assessment_store import AssessmentStore
+
+
+def _add(store, times):
+    store.add_batch("auto", {"risk_score": np.full(len(times), 50.0), "premium": np.full(len(times), 9000)},
+                    created_at=times)
+
+
+def test_volume_is_kept_per_minute(tmp_path):
+    store = AssessmentStore(str(tmp_path / "assessments.db"))
+    _add(store, [0.5, 59.9, 60.0, 185.0])
+    _add(store, [61.0, 3600.0])
+    store.add("fraud", fraud_score=7, claim_amount=50000)
+
+    times, counts = store.volume()
+    assert times[:4].tolist() == [0, 60, 180, 3600]
+    assert counts.tolist() == [2, 2, 1, 1, 1]
+    times, counts = store.volume(bucket_seconds=3600)
+    assert times[:2].tolist() == [0, 3600]
+    assert counts[:2].tolist() == [5, 1]
+    store.close()
+
+
+def test_volume_of_a_store_from_before_it_was_kept(tmp_path):
+    path = str(tmp_path / "assessments.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE assessments (id INTEGER PRIMARY KEY, line TEXT NOT NULL, created_at REAL NOT NULL, "
+                 "risk_score REAL, premium INTEGER, fraud_score REAL, claim_amount INTEGER, details TEXT)")
+    conn.executemany("INSERT INTO assessments (line, created_at, risk_score) VALUES ('auto', ?, 50)",
+                     [(1.0,), (30.0,), (200.0,)])
+    conn.commit()
+    conn.close()
+
+    store = AssessmentStore(path)
+    _add(store, [210.0])
+    times, counts = store.volume()
+    assert times.tolist() == [0, 180]
+    assert counts.tolist() == [2, 2]
+    store.close()
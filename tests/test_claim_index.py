@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from utils.claim_index import DAY, WINDOWS, ClaimIndex, ClaimVelocity, amount_buckets
+
+
+def _expected(claimants, amounts, times, policies):
+    """Velocity features by brute force over every earlier claim"""
+    clock = np.maximum.accumulate(times)
+    buckets = amount_buckets(amounts)
+    rows = []
+    for i in range(len(times)):
+        same = claimants[:i] == claimants[i]
+        age = clock[i] - clock[:i]
+        row = [int(np.sum(same & (age < window))) for window in WINDOWS]
+        policy = np.array([p is not None and p == policies[i] for p in policies[:i]], dtype=bool)
+        row.append(int(np.sum(policy & (age < WINDOWS[-1]))))
+        row.append(int(np.sum(same & (age < WINDOWS[-1]) & (np.abs(buckets[:i] - buckets[i]) <= 1))))
+        rows.append(row)
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("batch", [1, 7, 600])
+def test_windows_match_brute_force(batch):
+    rng = np.random.default_rng(7)
+    n = 600
+    claimants = rng.integers(0, 20, n)
+    policies = [None if rng.random() < 0.2 else f"P{c}" for c in claimants]
+    amounts = rng.choice([1000, 5000, 5100, 20000], n).astype(float)
+    times = np.sort(rng.uniform(0, 90 * DAY, n))
+    times[rng.random(n) < 0.05] -= 3 * DAY
+    index = ClaimIndex(capacity=4)
+    found = []
+    for start in range(0, n, batch):
+        stop = start + batch
+        # A lookup must not move the windows the next batch starts from
+        index.lookup(int(claimants[start]), amounts[start], times[start] + 40 * DAY)
+        columns = index.add_batch(claimants[start:stop], amounts[start:stop], times[start:stop], policies[start:stop])
+        found.append(np.stack([columns[field] for field in ClaimVelocity._fields], axis=1))
+    np.testing.assert_array_equal(np.concatenate(found), _expected(claimants, amounts, times, policies))
@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+
+from utils.claims_scorer import score_file
+
+CLAIMS = (
+    'claim_id,claim_amount,claim_type,suspicious_docs,prior_fraud,notes\n'
+    '1,600000,Auto,True,False,5" dent in the rear door\n'
+    '2,1000\n'
+    '3,250000,Health,False,True,"two visits,\nsame day"\n'
+    '4,90000,Auto,False,False,"said ""rear-ended"""\n'
+    '5,750000,Property,True,True,12" crack\n'
+)
+
+
+def test_literal_quotes_quoted_newlines_and_ragged_rows(tmp_path):
+    source = tmp_path / "claims.csv"
+    source.write_text(CLAIMS)
+    scored = tmp_path / "scored.csv"
+    log = io.StringIO()
+    assert score_file(str(source), str(scored), chunk_size=2, log=log) == 4
+    assert "Skipped record 2: 2 field(s), expected 6" in log.getvalue()
+
+    expected = pd.read_csv(source)
+    expected = expected[expected["claim_id"] != 2]
+    result = pd.read_csv(scored)
+    assert result["claim_id"].tolist() == [1, 3, 4, 5]
+    assert result["notes"].tolist() == expected["notes"].tolist()
+    assert result["notes"][1] == "two visits,\nsame day"
+    assert result["fraud_score"].notna().all()
@@ -0,0 +1,37 @@
+import io
+
+from PIL import Image
+
+from utils.document_index import DocumentIndex
+from utils.document_ingest import Document
+from utils.document_processor import process_document
+
+
+def _upload(data, file_id):
+    """A JPEG upload as Streamlit hands it over, with the id of that upload"""
+    upload = Document(data, "claim.jpg")
+    upload.file_id = file_id
+    return upload
+
+
+def _photo():
+    image = Image.linear_gradient("L").resize((320, 240)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def test_rerun_does_not_match_the_upload_itself(tmp_path):
+    index = DocumentIndex(str(tmp_path / "documents.db"))
+    data = _photo()
+    first = process_document(_upload(data, "upload-1"), index)
+    # Streamlit processes the same upload again on every rerun of the page
+    rerun = process_document(_upload(data, "upload-1"), index)
+    assert rerun["Duplicate Check"] == first["Duplicate Check"] == "No earlier upload matches"
+    assert rerun["Risk Score"] == first["Risk Score"]
+    assert len(index) == 1
+
+    resubmitted = process_document(_upload(data, "upload-2"), index)
+    assert resubmitted["Duplicate Check"].startswith("Exact resubmission: uploaded 1 time(s) before")
+    assert resubmitted["Risk Score"] > first["Risk Score"]
+    index.close()
@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.document_risk import ELA_MIN_TILES, content_findings, error_levels, jpeg_quality
+
+
+def _texture(rng, height, width, scale):
+    """Noise with features about `scale` pixels across"""
+    small = rng.normal(0, 1, (height // scale + 2, width // scale + 2)).astype(np.float32)
+    noise = Image.fromarray(small, "F").resize((width + 2 * scale, height + 2 * scale), Image.Resampling.BICUBIC)
+    return np.asarray(noise)[:height, :width]
+
+
+def _photo(seed, width=800, height=600):
+    """A claim photo: smooth sky over textured ground, with sensor noise"""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(0, 1, height)[:, None, None]
+    sky = np.array([200, 220, 250]) - np.array([80, 60, 20]) * rows
+    grain = sum(_texture(rng, height, width, scale) * amplitude
+                for scale, amplitude in ((1, 18), (2, 14), (4, 10), (16, 14), (64, 18)))
+    ground = np.array([90, 80, 60]) + grain[..., None] * np.array([1, 0.9, 0.7])
+    pixels = np.where(rows < 0.4, sky, ground) + rng.normal(0, 2, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def _jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("quality", [95, 92, 85, 75])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_unedited_textured_photo_has_no_error_level_finding(seed, quality):
+    file = _jpeg(_photo(seed), quality)
+    image = Image.open(file)
+    assert error_levels(image, jpeg_quality(image.quantization)) == 0
+    size = len(file.getvalue())
+    metadata = {"Image Size": image.size, "Camera Make": "Canon"}
+    assert not any("Error level" in finding for _, finding in content_findings(file, "image/jpeg", size, metadata))
+
+
+@pytest.mark.parametrize("original, final", [(75, 95), (60, 85), (85, 92), (80, 92)])
+def test_area_pasted_after_the_first_save_is_flagged(original, final):
+    photo = Image.open(_jpeg(_photo(0), original)).convert("RGB")
+    photo.paste(_photo(1).crop((300, 300, 460, 460)), (400, 250))
+    image = Image.open(_jpeg(photo, final))
+    assert error_levels(image, jpeg_quality(image.quantization)) >= ELA_MIN_TILES
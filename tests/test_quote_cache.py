@@ -0,0 +1,15 @@
+from utils.quote_cache import QuoteCache
+
+
+def test_invalidate_during_compute_is_not_lost():
+    cache = QuoteCache()
+
+    def compute():
+        # Rating tables reloaded while this quote was being priced
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_compute("key", compute) == "stale"
+    assert len(cache) == 0
+    assert cache.get_or_compute("key", lambda: "fresh") == "fresh"
+    assert cache.get_or_compute("key", lambda: "unused") == "fresh"
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import pytest
+
+from utils.quote_service import BatchingQuoteService, QuoteService, RequestError, _read_request
+
+AUTO = {"vehicle_age": 3, "driver_age": 35, "accident_history": 0, "mileage": 12000,
+        "vehicle_type": "SUV", "city_tier": "Tier 1 (Metro)", "violations": 1}
+CLAIM = {"claim_amount": 600000, "claim_type": "Auto", "suspicious_docs": True, "prior_fraud": False}
+
+
+def post(service, path, payload):
+    return asyncio.run(service.handle("POST", path, json.dumps(payload).encode()))
+
+
+@pytest.mark.parametrize("service", [QuoteService, BatchingQuoteService])
+def test_post_quote(service):
+    status, quote = post(service(), "/quote/auto", AUTO)
+    assert status == 200
+    assert quote["premium"] > 0
+
+
+@pytest.mark.parametrize("service", [QuoteService, BatchingQuoteService])
+def test_post_fraud_score(service):
+    status, result = post(service(), "/fraud/score", CLAIM)
+    assert status == 200
+    assert result["fraud_score"] > 0
+
+
+def test_rejects_get_and_bad_json():
+    service = QuoteService()
+    with pytest.raises(RequestError) as error:
+        asyncio.run(service.handle("GET", "/quote/auto", b""))
+    assert error.value.status == 405
+    with pytest.raises(RequestError) as error:
+        asyncio.run(service.handle("POST", "/fraud/score", b"{not json"))
+    assert error.value.status == 400
+
+
+def read(data, timeout):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        return await _read_request(reader, timeout)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("data", [
+    b"POST /fraud/score HTTP/1.1\r\nContent-Len",
+    b"POST /fraud/score HTTP/1.1\r\nContent-Length: 100\r\n\r\n{\"claim",
+])
+def test_stalled_request_times_out(data):
+    assert read(data, timeout=0.05) is None
+
+
+def test_complete_request_is_read():
+    method, path, headers, body = read(b"POST /fraud/score?x=1 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}", 0.05)
+    assert (method, path, body) == ("POST", "/fraud/score", b"{}")
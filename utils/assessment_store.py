@@ -0,0 +1,492 @@
+"""
+Assessment Store Utility - persisted assessments with running aggregates
+
+Every risk assessment and fraud check is appended to a local SQLite
+database. Alongside the raw rows the store keeps assessment_aggregates:
+one row per (line, risk band, score, amount bucket) holding a count and
+the sums of scores and amounts. Each batch of new assessments is folded
+into those rows with an upsert in the same transaction, so the analytics
+dashboard reads a few thousand aggregate rows instead of scanning
+millions of assessments, and nothing is ever recomputed. The assessments
+per minute are kept the same way, in assessment_volume.
+
+Pages record assessments with record_assessment(), which only queues them:
+a background AssessmentWriter drains the queue and writes whole batches in
+one transaction, so a page never waits on the disk. The database runs in
+WAL mode, so the dashboard keeps reading while batches are written.
+
+Set RISKSHIELD_ASSESSMENT_STORE to use a different database file.
+
+    python -m utils.assessment_store load auto 1000000   # synthetic assessments
+    python -m utils.assessment_store stats
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.risk_calculator import risk_tier_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "assessments.db")
+
+FRAUD = "fraud"
+DOCUMENT = "document"
+
+# Lines scored for fraud (fraud_score and claim_amount) rather than for risk
+# (risk_score and premium)
+FRAUD_SCORED = (FRAUD, DOCUMENT)
+
+# Upper bounds of the amount buckets in ₹ (premiums, or claim amounts for
+# fraud checks); the last bucket holds everything above
+AMOUNT_BUCKETS = (5000, 10000, 20000, 30000, 50000, 75000, 100000, 150000, 250000, 500000, 1000000, 2500000)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    line TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    risk_score REAL,
+    premium INTEGER,
+    fraud_score REAL,
+    claim_amount INTEGER,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS assessment_aggregates (
+    line TEXT NOT NULL,
+    risk_band INTEGER NOT NULL,
+    score_x10 INTEGER NOT NULL,
+    amount_bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    amount_sum REAL NOT NULL,
+    PRIMARY KEY (line, risk_band, score_x10, amount_bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assessment_volume (
+    minute INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assessments_line ON assessments (line, created_at);
+CREATE INDEX IF NOT EXISTS assessments_created_at ON assessments (created_at);
+CREATE INDEX IF NOT EXISTS assessments_risk_score ON assessments (risk_score) WHERE risk_score IS NOT NULL;
+CREATE INDEX IF NOT EXISTS assessments_fraud_score ON assessments (fraud_score) WHERE fraud_score IS NOT NULL;
+"""
+
+# Numeric columns of the assessments table that can be read back in bulk
+COLUMNS = ("created_at", "risk_score", "premium", "fraud_score", "claim_amount")
+
+INSERT = """
+INSERT INTO assessments (line, created_at, risk_score, premium, fraud_score, claim_amount, details)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_AGGREGATE = """
+INSERT INTO assessment_aggregates (line, risk_band, score_x10, amount_bucket, count, score_sum, amount_sum)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (line, risk_band, score_x10, amount_bucket) DO UPDATE SET
+    count = count + excluded.count,
+    score_sum = score_sum + excluded.score_sum,
+    amount_sum = amount_sum + excluded.amount_sum
+"""
+
+# Seconds in a bucket of assessment_volume
+VOLUME_SECONDS = 60
+
+UPSERT_VOLUME = """
+INSERT INTO assessment_volume (minute, count) VALUES (?, ?)
+ON CONFLICT (minute) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def amount_bucket_label(bucket):
+    """Display label for an amount bucket index"""
+    def short(amount):
+        if amount >= 100000:
+            return f"₹{amount / 100000:g}L"
+        return f"₹{amount / 1000:g}k"
+    if bucket == 0:
+        return f"< {short(AMOUNT_BUCKETS[0])}"
+    if bucket >= len(AMOUNT_BUCKETS):
+        return f"> {short(AMOUNT_BUCKETS[-1])}"
+    return f"{short(AMOUNT_BUCKETS[bucket - 1])}-{short(AMOUNT_BUCKETS[bucket])}"
+
+
+def fraud_band_batch(scores):
+    """Risk band codes for fraud scores: 0 high (8+), 1 moderate (6-7), 2 low"""
+    return np.select([scores >= 8, scores >= 6], [0, 1], 2).astype(np.uint8)
+
+
+def _aggregate(line, scores, amounts):
+    """Fold a batch into (line, band, score_x10, bucket, count, score_sum, amount_sum) rows"""
+    bands = fraud_band_batch(scores) if line in FRAUD_SCORED else risk_tier_batch(scores)
+    score_x10 = np.rint(scores * 10).astype(np.int64)
+    buckets = np.searchsorted(AMOUNT_BUCKETS, amounts, side="right")
+    keys = np.stack([bands.astype(np.int64), score_x10, buckets])
+    groups, inverse, counts = np.unique(keys, axis=1, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    score_sums = np.bincount(inverse, weights=scores)
+    amount_sums = np.bincount(inverse, weights=amounts)
+    return [
+        (line, band, score, bucket, count, score_sum, amount_sum)
+        for (band, score, bucket), count, score_sum, amount_sum
+        in zip(groups.T.tolist(), counts.tolist(), score_sums.tolist(), amount_sums.tolist())
+    ]
+
+
+class AssessmentStore:
+    """SQLite-backed assessment log with incrementally maintained aggregates"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("RISKSHIELD_ASSESSMENT_STORE") or DEFAULT_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            # WAL lets the dashboard read while the writer commits; NORMAL
+            # sync is durable across application crashes, which is enough here
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            tables = {name for (name,) in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self._conn.executescript(SCHEMA)
+            if "assessments" in tables and "assessment_volume" not in tables:
+                # A store from before assessment_volume: count its assessments once
+                self._conn.execute(
+                    "INSERT INTO assessment_volume (minute, count) "
+                    "SELECT CAST(created_at / ? AS INTEGER), COUNT(*) FROM assessments GROUP BY 1",
+                    (VOLUME_SECONDS,))
+
+    def add(self, line, risk_score=None, premium=None, fraud_score=None, claim_amount=None, details=None):
+        """Record one assessment (risk_score and premium) or fraud check (fraud_score and claim_amount)"""
+        columns = {
+            "risk_score": [risk_score], "premium": [premium],
+            "fraud_score": [fraud_score], "claim_amount": [claim_amount],
+            "details": [details],
+        }
+        self.add_batch(line, {name: values for name, values in columns.items() if values[0] is not None})
+
+    def add_batch(self, line, columns, created_at=None):
+        """Record many assessments of one line at once.
+
+        `columns` maps risk_score and premium (or, for fraud checks and
+        documents, fraud_score and claim_amount) to equal-length sequences,
+        with an optional details column of JSON-serializable dicts. A missing
+        amount counts as 0. `created_at` is one timestamp for the whole batch
+        or one per row, and defaults to now.
+        """
+        score_column, amount_column = ("fraud_score", "claim_amount") if line in FRAUD_SCORED else ("risk_score", "premium")
+        scores = np.asarray(columns[score_column], dtype=np.float64)
+        rows = len(scores)
+        if not rows:
+            return 0
+        if np.isnan(scores).any():
+            raise ValueError(f"Every {line} assessment needs a {score_column}")
+        amounts = columns.get(amount_column)
+        amounts = np.zeros(rows) if amounts is None else np.nan_to_num(np.asarray(amounts, dtype=np.float64))
+        created_at = time.time() if created_at is None else created_at
+        created_at = [created_at] * rows if np.isscalar(created_at) else list(created_at)
+        empty = [None] * rows
+
+        def column(name):
+            values = columns.get(name)
+            if values is None:
+                return empty
+            values = np.asarray(values)
+            if values.dtype == object:
+                # Rows queued one by one may mix None and NumPy scalars
+                return [value.item() if hasattr(value, "item") else value for value in values.tolist()]
+            return values.tolist()
+
+        details = columns.get("details")
+        details = empty if details is None else [None if d is None else json.dumps(d, default=str) for d in details]
+        records = zip(
+            [line] * rows, created_at,
+            column("risk_score"), column("premium"), column("fraud_score"), column("claim_amount"),
+            details,
+        )
+        aggregates = _aggregate(line, scores, amounts)
+        minutes, minute_counts = np.unique(
+            np.floor(np.asarray(created_at, dtype=np.float64) / VOLUME_SECONDS).astype(np.int64), return_counts=True)
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT, records)
+            self._conn.executemany(UPSERT_AGGREGATE, aggregates)
+            self._conn.executemany(UPSERT_VOLUME, zip(minutes.tolist(), minute_counts.tolist()))
+        return rows
+
+    def aggregates(self):
+        """Every aggregate row as a DataFrame, with the score as a float column"""
+        with self._lock:
+            data = pd.read_sql_query("SELECT * FROM assessment_aggregates", self._conn)
+        data["score"] = data["score_x10"] / 10
+        return data
+
+    def count(self, line=None):
+        """Assessments stored, of every line or of one"""
+        sql = "SELECT COALESCE(SUM(count), 0) FROM assessment_aggregates"
+        params = ()
+        if line is not None:
+            sql += " WHERE line = ?"
+            params = (line,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def iter_columns(self, line, names, chunk_size=100000, every=1):
+        """Yield `names` columns of one line's assessments as NumPy arrays, a chunk at a time.
+
+        Reads through a connection of its own, so the writer is never
+        blocked while a large scan is running. `every` keeps only every
+        n-th assessment, for a sample of a large line.
+        """
+        unknown = set(names) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown assessment columns: {', '.join(sorted(unknown))}")
+        sql = f"SELECT {', '.join(names)} FROM assessments WHERE line = ?"
+        params = [line]
+        if every > 1:
+            sql += " AND id % ? = 0"
+            params.append(every)
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield tuple(np.array(column, dtype=np.float64) for column in zip(*rows))
+        finally:
+            conn.close()
+
+    def iter_assessments(self, line=None, chunk_size=100000, details=False):
+        """Yield stored assessments as DataFrames of at most `chunk_size` rows, in id order.
+
+        For exports: like iter_columns(), reads through a connection of its
+        own and never holds more than one chunk. Column types are the same
+        in every chunk, however sparse its optional columns, and a query
+        with no assessments yields one empty chunk, so that an export still
+        gets its columns.
+        """
+        columns = ["id", "line", *COLUMNS] + (["details"] if details else [])
+        sql = f"SELECT {', '.join(columns)} FROM assessments"
+        params = []
+        if line is not None:
+            sql += " WHERE line = ?"
+            params.append(line)
+        sql += " ORDER BY id"
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchmany(chunk_size)
+            while True:
+                chunk = pd.DataFrame.from_records(rows, columns=columns)
+                chunk["created_at"] = pd.to_datetime(chunk["created_at"], unit="s", utc=True)
+                yield chunk.astype({
+                    "line": "object",
+                    "risk_score": "float64",
+                    "premium": "Int64",
+                    "fraud_score": "float64",
+                    "claim_amount": "Int64",
+                })
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+        finally:
+            conn.close()
+
+    def volume(self, bucket_seconds=VOLUME_SECONDS):
+        """Assessments per time bucket, as (bucket start, count) arrays.
+
+        Read from assessment_volume, so `bucket_seconds` must be a multiple
+        of VOLUME_SECONDS.
+        """
+        if bucket_seconds % VOLUME_SECONDS:
+            raise ValueError(f"bucket_seconds must be a multiple of {VOLUME_SECONDS}")
+        minutes = bucket_seconds // VOLUME_SECONDS
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT minute / ? AS bucket, SUM(count) FROM assessment_volume GROUP BY bucket ORDER BY bucket",
+                (minutes,),
+            ).fetchall()
+        buckets, counts = (np.array(column, dtype=np.float64) for column in zip(*rows)) if rows else (np.empty(0), np.empty(0))
+        return buckets * bucket_seconds, counts
+
+    def recent(self, limit=20):
+        """The latest assessments, newest first"""
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT * FROM assessments ORDER BY id DESC LIMIT ?", self._conn, params=(limit,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AssessmentWriter:
+    """Write-behind queue in front of an AssessmentStore.
+
+    submit() only enqueues. A daemon thread takes whatever has queued up
+    (up to `max_batch` records, lingering `max_wait` seconds for more) and
+    writes it with one add_batch() per line, in a single pass. If the queue
+    is full because the disk has stalled, new records are dropped and
+    counted rather than blocking the page.
+    """
+
+    def __init__(self, store, max_batch=1000, max_wait=0.05, max_queue=100000):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="assessment-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, line, **fields):
+        """Queue one assessment; see AssessmentStore.add() for the fields"""
+        try:
+            self._queue.put_nowait((line, time.time(), fields))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Assessment queue full, dropped a %s assessment (%d dropped so far)", line, self.dropped)
+
+    def flush(self):
+        """Block until everything submitted so far is written"""
+        self._queue.join()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        by_line = {}
+        for line, created_at, fields in batch:
+            by_line.setdefault(line, []).append((created_at, fields))
+        for line, records in by_line.items():
+            columns = {
+                name: [fields.get(name) for _, fields in records]
+                for name in ("risk_score", "premium", "fraud_score", "claim_amount", "details")
+                if any(name in fields for _, fields in records)
+            }
+            try:
+                self.written += self.store.add_batch(line, columns, [created_at for created_at, _ in records])
+            except Exception:
+                self.failed += len(records)
+                logger.exception("Could not write %d %s assessments", len(records), line)
+        self.batches += 1
+
+
+_store = None
+_writer = None
+_store_lock = threading.Lock()
+
+
+def assessment_store():
+    """The process-wide assessment store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AssessmentStore()
+    return _store
+
+
+def assessment_writer():
+    """The process-wide write-behind queue for assessment_store()"""
+    global _writer
+    if _writer is None:
+        store = assessment_store()
+        with _store_lock:
+            if _writer is None:
+                _writer = AssessmentWriter(store)
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def record_assessment(line, **fields):
+    """Queue an assessment for the store without waiting for the write.
+
+    Pass risk_score and premium for a quote, or fraud_score (and
+    claim_amount) for a fraud check or document, plus a details dict.
+    """
+    assessment_writer().submit(line, **fields)
+
+
+def load_synthetic(store, line, rows, chunk_size=100000, seed=0, log=sys.stderr):
+    """Price a synthetic portfolio (or score synthetic claims) into the store"""
+    from data.synthetic_portfolio import generate
+    from utils.fraud_detector import detect_fraud_batch
+    from utils.pricing import PIPELINES
+
+    start = time.perf_counter()
+    loaded = 0
+    for chunk in generate("claims" if line == FRAUD else line, rows, chunk_size, seed):
+        if line == FRAUD:
+            scores, _ = detect_fraud_batch(chunk)
+            columns = {"fraud_score": scores, "claim_amount": chunk["claim_amount"]}
+        else:
+            priced = PIPELINES[line].price_arrays(chunk)
+            columns = {"risk_score": priced["risk_score"], "premium": priced["premium"]}
+        loaded += store.add_batch(line, columns)
+        print(f"Loaded {loaded:,} {line} assessments ({loaded / (time.perf_counter() - start):,.0f} rows/sec)", file=log)
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or load the assessment store")
+    parser.add_argument("--path", help="database file (default: data/assessments.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="add synthetic assessments")
+    load.add_argument("line", choices=["auto", "property", "cyber", "health", "life", FRAUD])
+    load.add_argument("rows", type=int)
+    load.add_argument("--chunk-size", type=int, default=100000, help="rows per transaction (default: 100000)")
+    load.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    commands.add_parser("stats", help="assessments per line and risk band")
+    args = parser.parse_args(argv)
+
+    store = AssessmentStore(args.path)
+    if args.command == "load":
+        load_synthetic(store, args.line, args.rows, args.chunk_size, args.seed)
+    else:
+        data = store.aggregates()
+        if data.empty:
+            print(f"{store.path} is empty")
+            return
+        summary = data.groupby(["line", "risk_band"])[["count", "score_sum", "amount_sum"]].sum()
+        summary["mean_score"] = summary["score_sum"] / summary["count"]
+        summary["mean_amount"] = summary["amount_sum"] / summary["count"]
+        print(summary[["count", "mean_score", "mean_amount"]].to_string())
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Chart Data Utility - server-side binning and downsampling for Plotly charts
+
+Plotly serializes every point of a figure into the page, so charting a
+portfolio directly means megabytes of JSON on every rerun. The helpers
+here reduce the data before a figure is built, to a size that depends on
+the chart rather than on the number of assessments:
+
+    hexbin()              counts on a hexagonal grid, for dense scatters
+    quantile_histogram()  equal-count bins, for skewed distributions
+    lttb()                Largest-Triangle-Three-Buckets, for long series
+
+The portfolio_* functions read an evenly spread sample of at most
+SAMPLE_SIZE assessments from the store in chunks, so their cost does not
+grow with the book either, and keep their results in CHART_CACHE, so
+reruns within CHART_TTL seconds reuse them.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.quote_cache import QuoteCache, cache_key
+
+# Upper bound on the points any one trace sends to the browser
+MAX_POINTS = 2000
+
+# Assessments sampled from a line for its hexbin and quantile histogram
+SAMPLE_SIZE = 200000
+
+CHART_TTL = 60  # seconds
+CHART_CACHE = QuoteCache(maxsize=256, ttl=CHART_TTL)
+
+
+def cached_chart(name, compute, **params):
+    """Memoize compute() in CHART_CACHE under `name` and its parameters"""
+    return CHART_CACHE.get_or_compute(cache_key(name, **params), compute)
+
+
+class HexBins:
+    """Hexagonal bin counts over a fixed extent, filled one chunk at a time.
+
+    The grid is the two offset rectangular lattices matplotlib's hexbin
+    uses; each point goes to the nearer of its two candidate centres.
+    Points outside the extent are clipped to its edge.
+    """
+
+    def __init__(self, extent, gridsize=40):
+        self.xmin, self.xmax, self.ymin, self.ymax = extent
+        self.nx = gridsize
+        self.ny = max(1, int(gridsize / math.sqrt(3)))
+        self.sx = (self.xmax - self.xmin) / self.nx or 1.0
+        self.sy = (self.ymax - self.ymin) / self.ny or 1.0
+        self.lattice1 = np.zeros((self.nx + 1) * (self.ny + 1), dtype=np.int64)
+        self.lattice2 = np.zeros(self.nx * self.ny, dtype=np.int64)
+
+    def add(self, x, y):
+        ix = np.clip((np.asarray(x, dtype=np.float64) - self.xmin) / self.sx, 0, self.nx)
+        iy = np.clip((np.asarray(y, dtype=np.float64) - self.ymin) / self.sy, 0, self.ny)
+        i1, j1 = np.rint(ix), np.rint(iy)
+        i2 = np.minimum(np.floor(ix), self.nx - 1)
+        j2 = np.minimum(np.floor(iy), self.ny - 1)
+        d1 = (ix - i1) ** 2 + 3 * (iy - j1) ** 2
+        d2 = (ix - i2 - 0.5) ** 2 + 3 * (iy - j2 - 0.5) ** 2
+        first = d1 <= d2
+        keys1 = (i1[first] * (self.ny + 1) + j1[first]).astype(np.intp)
+        keys2 = (i2[~first] * self.ny + j2[~first]).astype(np.intp)
+        self.lattice1 += np.bincount(keys1, minlength=len(self.lattice1))
+        self.lattice2 += np.bincount(keys2, minlength=len(self.lattice2))
+
+    def frame(self):
+        """Occupied hexagons as a DataFrame of centre x, y and count"""
+        i1, j1 = np.divmod(np.arange(len(self.lattice1)), self.ny + 1)
+        i2, j2 = np.divmod(np.arange(len(self.lattice2)), self.ny)
+        x = np.concatenate([self.xmin + i1 * self.sx, self.xmin + (i2 + 0.5) * self.sx])
+        y = np.concatenate([self.ymin + j1 * self.sy, self.ymin + (j2 + 0.5) * self.sy])
+        count = np.concatenate([self.lattice1, self.lattice2])
+        occupied = count > 0
+        return pd.DataFrame({"x": x[occupied], "y": y[occupied], "count": count[occupied]})
+
+
+def hexbin(x, y, gridsize=40, extent=None):
+    """Hexagonal bin counts of a scatter, at most about gridsize**2 / 0.87 rows"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if extent is None:
+        extent = (x.min(), x.max(), y.min(), y.max()) if len(x) else (0, 1, 0, 1)
+    bins = HexBins(extent, gridsize)
+    bins.add(x, y)
+    return bins.frame()
+
+
+def quantile_histogram(values, bins=20):
+    """Histogram with bin edges at quantiles, so every bin holds about the same count.
+
+    Returns left and right edges, count and density (share per unit of
+    value, comparable across bins of different widths).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return pd.DataFrame(columns=["left", "right", "count", "density"])
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+    if len(edges) == 1:
+        edges = np.array([edges[0], edges[0] + 1])
+    counts, edges = np.histogram(values, edges)
+    widths = np.diff(edges)
+    return pd.DataFrame({
+        "left": edges[:-1],
+        "right": edges[1:],
+        "count": counts,
+        "density": counts / widths / counts.sum(),
+    })
+
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps from a series.
+
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Peaks and
+    troughs survive, unlike plain striding.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0] = a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_end <= end:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+
+def downsample_series(x, y, max_points=MAX_POINTS):
+    """A series reduced to at most max_points with LTTB, as a DataFrame of x and y"""
+    kept = lttb(x, y, max_points)
+    return pd.DataFrame({"x": np.asarray(x)[kept], "y": np.asarray(y)[kept]})
+
+
+def _sample_every(store, line):
+    """Stride that samples at most about SAMPLE_SIZE of a line's assessments"""
+    aggregates = store.aggregates()
+    return max(1, int(aggregates.loc[aggregates["line"] == line, "count"].sum()) // SAMPLE_SIZE)
+
+
+def portfolio_hexbin(store, line, gridsize=40):
+    """Risk score vs premium of one line, hex-binned with premiums on a log10 scale.
+
+    Counts are estimated from the sample, scaled back up to the whole line.
+    """
+    def compute():
+        every = _sample_every(store, line)
+        chunks = list(store.iter_columns(line, ("risk_score", "premium"), every=every))
+        if not chunks:
+            return pd.DataFrame(columns=["x", "y", "count", "premium"])
+        score = np.concatenate([chunk[0] for chunk in chunks])
+        premium = np.log10(np.maximum(np.concatenate([chunk[1] for chunk in chunks]), 1))
+        frame = hexbin(score, premium, gridsize)
+        frame["count"] *= every
+        frame["premium"] = 10 ** frame["y"]
+        return frame
+    return cached_chart("portfolio.hexbin", compute, path=store.path, line=line, gridsize=gridsize)
+
+
+def portfolio_quantiles(store, line, column="premium", bins=20):
+    """Quantile histogram of one column of a line, from an evenly spread sample"""
+    def compute():
+        every = _sample_every(store, line)
+        chunks = [values for (values,) in store.iter_columns(line, (column,), every=every)]
+        return quantile_histogram(np.concatenate(chunks) if chunks else [], bins)
+    return cached_chart("portfolio.quantiles", compute, path=store.path, line=line, column=column, bins=bins)
+
+
+def portfolio_volume(store, bucket_seconds=60, max_points=MAX_POINTS):
+    """Assessments per time bucket, downsampled with LTTB"""
+    def compute():
+        times, counts = store.volume(bucket_seconds)
+        series = downsample_series(times, counts, max_points)
+        series["x"] = pd.to_datetime(series["x"], unit="s")
+        return series
+    return cached_chart("portfolio.volume", compute, path=store.path, bucket_seconds=bucket_seconds, max_points=max_points)
@@ -0,0 +1,321 @@
+"""
+Claim Index - duplicate and velocity features for the fraud rules
+
+detect_fraud() sees one claim at a time, so it cannot tell that the same
+claimant filed five similar claims this week. ClaimIndex remembers recent
+claims, keyed by claimant, by policy and by claimant plus amount bucket,
+and reports for every new claim how many earlier claims each of its keys
+saw in the last day, week and 30 days. Those counts go straight into
+detect_fraud() and detect_fraud_batch() as velocity features.
+
+The index is array-backed so that it holds tens of millions of claims:
+
+    claims   one time and, per key kind, a link to the next claim with the
+             same key (20 bytes a claim)
+    keys     a KeyTable (utils/key_table.py) of 64-bit key hashes holding,
+             per window, the oldest claim still inside it and a running
+             count, plus the newest claim to link the next one from
+
+A batch starts every window of its keys from the stored oldest claim and
+count, walks it forward past the claims that have left it by the end of
+the batch, and stores where it stopped. Windows only ever move forward and
+each claim leaves each window once, so recording costs O(1) amortized per
+claim plus a sort of its batch, and does not grow with the size of the
+index or of a key's history; a lookup walks the same way without storing,
+so it also passes the claims that left since the last recorded batch.
+Batches are processed with vectorized NumPy: the windows are walked a step
+at a time for all keys at once and counted with searchsorted.
+
+The index clock never goes back: a claim older than the latest one seen
+is recorded at the latest time, so every chain stays in time order.
+"""
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.key_table import KeyTable, id_hashes, table_keys
+
+DAY = 24 * 3600
+WINDOWS = (DAY, 7 * DAY, 30 * DAY)
+
+# Amounts within about this ratio of each other count as near duplicates
+AMOUNT_TOLERANCE = 0.05
+
+# Key kinds; every claim has one chain link per kind
+CLAIMANT, POLICY, DUPLICATE = range(3)
+_SALTS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+class ClaimVelocity(NamedTuple):
+    """Earlier claims inside each window, as detect_fraud() keyword arguments"""
+    claims_24h: int = 0
+    claims_7d: int = 0
+    claims_30d: int = 0
+    policy_claims_30d: int = 0
+    duplicate_amounts: int = 0
+
+
+def amount_buckets(amounts, tolerance=AMOUNT_TOLERANCE):
+    """Logarithmic amount buckets; neighbouring buckets are within about `tolerance`"""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buckets = np.floor(np.log(amounts) / np.log1p(tolerance))
+    return np.where(amounts >= 1, buckets, -1).astype(np.int64)
+
+
+def _search(haystack, needles, side="left"):
+    """np.searchsorted, with the needles sorted first: far fewer cache misses on large arrays"""
+    order = np.argsort(needles, kind="stable")
+    found = np.empty(len(needles), dtype=np.int64)
+    found[order] = np.searchsorted(haystack, needles[order], side)
+    return found
+
+
+class ClaimIndex:
+    """Sliding-window claim counts by claimant, policy and near-duplicate amount.
+
+    add() and add_batch() report the velocity of claims against every claim
+    before them and then record them; lookup() only reports. Thread-safe.
+    """
+
+    def __init__(self, capacity=1 << 16, tolerance=AMOUNT_TOLERANCE):
+        self.tolerance = tolerance
+        self.size = 0
+        self.now = -np.inf
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.links = np.full((capacity, 3), -1, dtype=np.int32)
+        self.table = KeyTable({
+            "tails": (np.int32, -1, None),
+            "heads": (np.int32, -1, len(WINDOWS)),
+            "counts": (np.int32, 0, len(WINDOWS)),
+        })
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def nbytes(self):
+        """Memory held by the index arrays"""
+        return self.times.nbytes + self.links.nbytes + self.table.nbytes()
+
+    def _reserve(self, claims, keys):
+        """Room for `claims` more claims and `keys` more keys"""
+        needed = self.size + claims
+        if needed > len(self.times):
+            capacity = max(needed, 2 * len(self.times))
+            self.times = np.resize(self.times, capacity)
+            links = np.full((capacity, 3), -1, dtype=np.int32)
+            links[:self.size] = self.links[:self.size]
+            self.links = links
+        # Keys whose newest claim has left the widest window will never
+        # count anything again, so a rebuild drops them
+        self.table.reserve(keys, keep=lambda slots: self.times[self.table["tails"][slots]] > self.now - WINDOWS[-1])
+
+    def _expire(self, kind, slots, cutoffs):
+        """Walk the windows of keys at `slots` past the claims no later than each window's cutoff.
+
+        Returns the first claim left in each window and the claims in it as
+        (keys, windows) arrays, and the claims walked past as flat
+        (key * windows + window) pair numbers with their times.
+        """
+        heads = self.table["heads"][slots].astype(np.int64).ravel()
+        counts = self.table["counts"][slots].astype(np.int64).ravel()
+        limits = np.tile(cutoffs, len(slots))
+        pairs, times = [], []
+        active = np.flatnonzero(heads >= 0)
+        while len(active):
+            claim_times = self.times[heads[active]]
+            active = active[claim_times <= limits[active]]
+            if not len(active):
+                break
+            pairs.append(active)
+            times.append(self.times[heads[active]])
+            heads[active] = self.links[heads[active], kind]
+            active = active[heads[active] >= 0]
+        pairs = np.concatenate(pairs) if pairs else np.empty(0, dtype=np.int64)
+        times = np.concatenate(times) if times else np.empty(0)
+        counts -= np.bincount(pairs, minlength=len(counts))
+        shape = (len(slots), len(WINDOWS))
+        return heads.reshape(shape), counts.reshape(shape), pairs, times
+
+    def _kind(self, kind, clock, rows, keys, record, neighbours=()):
+        """Claims before each claim of a batch with the same key, in every window.
+
+        `rows` are the batch rows with a key of this kind and `keys` their
+        hashes. Returns a (rows, windows) array of counts and, for each array
+        of `neighbours` keys, the counts for those keys in the widest
+        window. With `record` the claims are recorded as well.
+        """
+        if not len(rows):
+            return np.zeros((0, len(WINDOWS)), dtype=np.int64), [np.zeros(0, dtype=np.int64) for _ in neighbours]
+        distinct, inverse = np.unique(np.concatenate([keys, *neighbours]), return_inverse=True)
+        if record:
+            self._reserve(0, len(distinct))
+        slots = self.table.find(distinct)
+        windows = len(WINDOWS)
+        times = clock[rows]
+        cutoffs = times[:, None] - np.array(WINDOWS, dtype=np.float64)
+        # Every window is walked to where it stands at the end of the batch,
+        # which is as far as any claim of the batch needs
+        final = cutoffs[-1]
+
+        # The index's claims: each window's stored count, less the claims
+        # that left it before a row's cutoff
+        found = np.flatnonzero(slots >= 0)
+        heads, remaining, walked_pairs, walked_times = self._expire(kind, slots[found], final)
+        stored = np.zeros((len(distinct), windows), dtype=np.int64)
+        stored[found] = remaining
+        walked = np.bincount(walked_pairs, minlength=len(found) * windows).reshape(-1, windows)
+        stored[found] += walked
+        walked_pairs = found[walked_pairs // windows] * windows + walked_pairs % windows
+
+        # The batch's own claims, by key and then row; rows are in time order
+        own = inverse[:len(rows)]
+        batch = np.argsort(own, kind="stable") if record else np.empty(0, dtype=np.int64)
+        batch_groups = own[batch]
+
+        # Times and cutoffs are ranked together so that every count is a
+        # search of integer keys
+        ranked, rank = np.unique(np.concatenate([walked_times, times, cutoffs.ravel()]), return_inverse=True)
+        scale = len(ranked)
+        walked_rank, time_rank = rank[:len(walked_times)], rank[len(walked_times):len(walked_times) + len(rows)]
+        cutoff_rank = rank[len(walked_times) + len(rows):].reshape(cutoffs.shape)
+        by_walked = np.sort(walked_pairs * scale + walked_rank)
+        by_row = batch_groups * len(rows) + batch
+        by_time = batch_groups * scale + time_rank[batch]
+
+        def count(group, batch_rows, window):
+            cutoff = cutoff_rank[batch_rows, window]
+            pair = group * windows + window
+            left = _search(by_walked, pair * scale + cutoff, "right") - _search(by_walked, pair * scale)
+            counts = stored[group, window] - left
+            if record:
+                earlier = _search(by_row, group * len(rows) + batch_rows)
+                counts += earlier - _search(by_time, group * scale + cutoff, "right")
+            return counts
+
+        batch_rows = np.arange(len(rows))
+        counts = np.stack([count(own, batch_rows, window) for window in range(windows)], axis=1)
+        near = []
+        offset = len(rows)
+        for _ in neighbours:
+            near.append(count(inverse[offset:offset + len(rows)], batch_rows, windows - 1))
+            offset += len(rows)
+        if record:
+            self._link(kind, distinct, slots, found, heads, remaining, batch_groups, rows[batch],
+                       np.searchsorted(by_time, batch_groups[:, None] * scale + cutoff_rank[-1], "right"))
+        return counts, near
+
+    def _link(self, kind, distinct, slots, found, heads, remaining, groups, rows, first_inside):
+        """Append a batch's claims to their chains and store every window as of the end of the batch.
+
+        `heads` and `remaining` are the walked windows of the `found` keys;
+        `groups` and `rows` the batch's claims by key, and `first_inside`,
+        for each, the position of its key's first claim still inside each
+        window at the end of the batch.
+        """
+        windows = len(WINDOWS)
+        claims = self.size + rows
+        new_groups = np.unique(groups)
+        missing = new_groups[slots[new_groups] < 0]
+        slots[missing] = self.table.find(distinct[missing], insert=True)
+
+        # Each new claim follows the previous claim of its key: the one
+        # before it in the batch, or else the key's current tail
+        follows = np.r_[False, groups[1:] == groups[:-1]]
+        self.links[claims[:-1][follows[1:]], kind] = claims[1:][follows[1:]]
+        first = ~follows
+        tails = self.table["tails"][slots[groups[first]]]
+        linked = tails >= 0
+        self.links[tails[linked], kind] = claims[first][linked]
+        last = np.r_[groups[1:] != groups[:-1], True] if len(groups) else np.empty(0, dtype=bool)
+        self.table["tails"][slots[groups[last]]] = claims[last]
+
+        # The windows of keys the batch walked keep where the walk stopped;
+        # a window with none of the index's claims left starts at the
+        # batch's first claim inside it
+        head = np.full((len(distinct), windows), -1, dtype=np.int64)
+        count = np.zeros((len(distinct), windows), dtype=np.int64)
+        head[found], count[found] = heads, remaining
+        ends = np.flatnonzero(last)
+        inside = ends[:, None] + 1 - first_inside[ends]
+        key = groups[ends]
+        empty = (count[key] == 0) & (inside > 0)
+        head[key] = np.where(empty, claims[np.minimum(first_inside[ends], len(claims) - 1)], head[key])
+        count[key] += inside
+        keys = np.union1d(found, new_groups)
+        self.table["heads"][slots[keys]] = head[keys]
+        self.table["counts"][slots[keys]] = count[keys]
+
+    def _velocity(self, claimants, amounts, times, policies, record):
+        times = np.asarray(times, dtype=np.float64)
+        rows = np.arange(len(times))
+        clock = np.maximum.accumulate(np.maximum(times, self.now)) if len(times) else times
+        buckets = amount_buckets(amounts, self.tolerance)
+        claimant = id_hashes(claimants)
+        if policies is None:
+            policy_rows = rows[:0]
+        else:
+            policy_rows = rows[pd.notna(pd.Series(policies, dtype=object)).to_numpy()]
+
+        if record:
+            self._reserve(len(times), 0)
+            self.times[self.size:self.size + len(times)] = clock
+        counts, _ = self._kind(CLAIMANT, clock, rows, table_keys(_SALTS[CLAIMANT], claimant), record)
+        duplicate, near = self._kind(DUPLICATE, clock, rows, table_keys(_SALTS[DUPLICATE], claimant, buckets), record,
+                                     [table_keys(_SALTS[DUPLICATE], claimant, buckets + step) for step in (-1, 1)])
+        policy = np.zeros(len(times), dtype=np.int64)
+        if len(policy_rows):
+            policy_keys = table_keys(_SALTS[POLICY], id_hashes(np.asarray(policies, dtype=object)[policy_rows]))
+            policy[policy_rows] = self._kind(POLICY, clock, policy_rows, policy_keys, record)[0][:, -1]
+        if record and len(times):
+            self.size += len(times)
+            self.now = clock[-1]
+        return {
+            "claims_24h": counts[:, 0],
+            "claims_7d": counts[:, 1],
+            "claims_30d": counts[:, 2],
+            "policy_claims_30d": policy,
+            "duplicate_amounts": duplicate[:, -1] + sum(near),
+        }
+
+    def add_batch(self, claimants, amounts, times, policies=None):
+        """Record claims in order, returning their velocity features as arrays.
+
+        Each claim counts the claims before it, in the index or earlier in
+        the batch. The result maps every ClaimVelocity field to an array,
+        ready to add to the columns passed to detect_fraud_batch().
+        `policies` may be omitted or hold None for claims without one.
+        """
+        with self._lock:
+            return self._velocity(claimants, amounts, times, policies, record=True)
+
+    def lookup_batch(self, claimants, amounts, times, policies=None):
+        """Velocity features of claims against the index, without recording them"""
+        with self._lock:
+            return self._velocity(claimants, amounts, times, policies, record=False)
+
+    def add(self, claimant, amount, time, policy=None):
+        """Record one claim, returning its ClaimVelocity"""
+        columns = self.add_batch([claimant], [amount], [time], [policy])
+        return ClaimVelocity(*(int(columns[field][0]) for field in ClaimVelocity._fields))
+
+    def lookup(self, claimant, amount, time, policy=None):
+        """ClaimVelocity of one claim, without recording it"""
+        columns = self.lookup_batch([claimant], [amount], [time], [policy])
+        return ClaimVelocity(*(int(columns[field][0]) for field in ClaimVelocity._fields))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def claim_index():
+    """The process-wide ClaimIndex the Fraud Detection page records claims in"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ClaimIndex()
+        return _index
@@ -0,0 +1,257 @@
+"""
+Claims Scorer - stream large claim extracts through the fraud rules
+
+Reads a CSV or JSONL claims file in fixed-size chunks, scores every chunk
+with detect_fraud_batch and appends the results to the output file, so
+memory stays bounded by the chunk size whatever the size of the input.
+A checkpoint is written after each chunk; rerun with --resume to continue
+an interrupted run.
+
+    python -m utils.claims_scorer claims.csv scored.csv --chunk-size 100000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from utils.fraud_detector import detect_fraud_batch
+
+CLAIM_FIELDS = ("claim_amount", "claim_type", "suspicious_docs", "prior_fraud")
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+
+
+def is_jsonl(path):
+    return path.lower().endswith((".jsonl", ".ndjson"))
+
+
+class MissingColumnsError(ValueError):
+    """A CSV claims file without every column the fraud rules read"""
+
+
+def _ends_quoted(line, quoted):
+    """Whether a CSV line ends inside a quoted field, given whether it starts inside one.
+
+    As in the csv module, a quote only opens a field at the start of the
+    field; anywhere else, as in `5" dent`, it is an ordinary character.
+    Inside a quoted field a doubled quote stands for one.
+    """
+    i = line.find(b'"')
+    while i >= 0:
+        if quoted:
+            if line[i + 1:i + 2] == b'"':
+                i = line.find(b'"', i + 2)
+                continue
+            quoted = False
+        elif i == 0 or line[i - 1:i] == b",":
+            quoted = True
+        i = line.find(b'"', i + 1)
+    return quoted
+
+
+def _records(f):
+    """Raw CSV records from a binary file, each possibly several physical lines.
+
+    A quoted field may hold newlines, so a line that ends inside one
+    continues on the next, as the csv module reads it.
+    """
+    record = b""
+    quoted = False
+    for line in f:
+        record += line
+        quoted = _ends_quoted(line, quoted)
+        if not quoted:
+            yield record
+            record = b""
+    if record:
+        yield record
+
+
+def read_header(path):
+    """The CSV header row of `path` (None for JSONL), checked for the claim columns"""
+    if is_jsonl(path):
+        return None
+    with open(path, "rb") as f:
+        first = next(_records(f), b"")
+    header = next(csv.reader([first.decode("utf-8-sig").rstrip("\r\n")]), [])
+    missing = [field for field in CLAIM_FIELDS if field not in header]
+    if missing:
+        raise MissingColumnsError(f"{path} is missing required column(s): {', '.join(missing)}")
+    return header
+
+
+def read_chunks(path, chunk_size, offset=None):
+    """Yield (header, lines, end_offset) for every `chunk_size` input records.
+
+    Lines are raw record bytes without their trailing newline; a CSV record
+    with a quoted newline stays one line. `header` is the CSV header row
+    (None for JSONL) and `end_offset` the byte offset just past the chunk,
+    which is where a resumed run picks up.
+    """
+    header = read_header(path)
+    with open(path, "rb") as f:
+        if header is not None:
+            next(_records(f))
+        if offset is not None:
+            f.seek(offset)
+        records = _records(f) if header is not None else iter(f)
+        while True:
+            lines = [line.rstrip(b"\r\n") for line in islice(records, chunk_size)]
+            lines = [line for line in lines if line]
+            end_offset = f.tell()
+            if not lines:
+                if end_offset >= os.fstat(f.fileno()).st_size:
+                    return
+                continue
+            yield header, lines, end_offset
+
+
+def parse_chunk(header, lines):
+    """Turn raw chunk lines into a dict of claim columns (plus JSONL records).
+
+    Returns (columns, records, ragged); `ragged` lists (position, fields)
+    of the CSV rows without as many fields as the header, which are left
+    out of the columns.
+    """
+    ragged = []
+    if header is None:
+        records = [json.loads(line) for line in lines]
+        columns = {field: [record.get(field) for record in records] for field in CLAIM_FIELDS}
+    else:
+        records = None
+        rows = list(csv.reader(line.decode("utf-8") for line in lines))
+        ragged = [(i, len(row)) for i, row in enumerate(rows) if len(row) != len(header)]
+        if ragged:
+            rows = [row for row in rows if len(row) == len(header)]
+        index = {name: i for i, name in enumerate(header)}
+        columns = {field: [row[index[field]] for row in rows] for field in CLAIM_FIELDS}
+    amounts = pd.to_numeric(pd.Series(columns["claim_amount"], dtype=object), errors="coerce")
+    columns["claim_amount"] = np.nan_to_num(amounts.to_numpy(dtype=np.float64))
+    columns["suspicious_docs"] = parse_flags(columns["suspicious_docs"])
+    columns["prior_fraud"] = parse_flags(columns["prior_fraud"])
+    return columns, records, ragged
+
+
+def parse_flags(values):
+    """Parse a column of CSV/JSON truthy values into a bool array"""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    truth = [v if isinstance(v, bool) else str(v).strip().lower() in TRUE_VALUES for v in uniques]
+    return np.array(truth + [False])[codes]
+
+
+def score_chunks(chunks):
+    """Score each chunk, yielding (header, lines, records, scores, alerts, end_offset, ragged).
+
+    `lines` are the chunk's scored lines; the ragged rows parse_chunk()
+    left out are dropped from them too.
+    """
+    for header, lines, end_offset in chunks:
+        columns, records, ragged = parse_chunk(header, lines)
+        if ragged:
+            skipped = {i for i, _ in ragged}
+            lines = [line for i, line in enumerate(lines) if i not in skipped]
+        scores, alerts = detect_fraud_batch(columns)
+        yield header, lines, records, scores, alerts, end_offset, ragged
+
+
+def format_chunk(header, lines, records, scores, alerts):
+    """Render one scored chunk as output bytes"""
+    if header is None:
+        out = []
+        for record, score, mask in zip(records, scores.tolist(), alerts.tolist()):
+            record["fraud_score"] = score
+            record["fraud_alerts"] = mask
+            out.append(json.dumps(record, ensure_ascii=False))
+        return ("\n".join(out) + "\n").encode("utf-8")
+    suffixes = [f",{score},{mask}".encode() for score, mask in zip(scores.tolist(), alerts.tolist())]
+    return b"\n".join(line + suffix for line, suffix in zip(lines, suffixes)) + b"\n"
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def score_file(input_path, output_path, chunk_size=100000, resume=False, log=sys.stderr):
+    """Score `input_path` into `output_path`, returning the number of rows scored.
+
+    Raises MissingColumnsError, before writing anything, for a CSV without
+    the claim columns. CSV rows without as many fields as the header are
+    skipped and reported to `log` by record number.
+    """
+    read_header(input_path)
+    checkpoint_path = output_path + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is None:
+        checkpoint = {"input_offset": None, "output_offset": 0, "rows": 0, "skipped": 0}
+        mode = "wb"
+    else:
+        mode = "r+b"
+        print(f"Resuming at row {checkpoint['rows']:,}", file=log)
+
+    start = time.perf_counter()
+    rows_this_run = 0
+    with open(output_path, mode) as out:
+        out.seek(checkpoint["output_offset"])
+        out.truncate()
+        chunks = read_chunks(input_path, chunk_size, checkpoint["input_offset"])
+        for header, lines, records, scores, alerts, end_offset, ragged in score_chunks(chunks):
+            if out.tell() == 0 and header is not None:
+                out.write((",".join(header + ["fraud_score", "fraud_alerts"]) + "\n").encode("utf-8"))
+            skipped = checkpoint.get("skipped", 0)
+            for position, fields in ragged:
+                number = checkpoint["rows"] + skipped + position + 1
+                print(f"Skipped record {number:,}: {fields} field(s), expected {len(header)}", file=log)
+            if lines:
+                out.write(format_chunk(header, lines, records, scores, alerts))
+                out.flush()
+            rows_this_run += len(lines)
+            checkpoint = {
+                "input_offset": end_offset,
+                "output_offset": out.tell(),
+                "rows": checkpoint["rows"] + len(lines),
+                "skipped": skipped + len(ragged),
+            }
+            save_checkpoint(checkpoint_path, checkpoint)
+            elapsed = time.perf_counter() - start
+            print(f"Scored {checkpoint['rows']:,} rows ({rows_this_run / elapsed:,.0f} rows/sec)", file=log)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    elapsed = time.perf_counter() - start
+    rate = rows_this_run / elapsed if elapsed else 0
+    print(f"Done: {checkpoint['rows']:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)", file=log)
+    if checkpoint.get("skipped"):
+        print(f"Skipped {checkpoint['skipped']:,} malformed record(s)", file=log)
+    return checkpoint["rows"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL claims file with the fraud rules")
+    parser.add_argument("input", help="claims file (.csv, or .jsonl/.ndjson)")
+    parser.add_argument("output", help="scored output file, same format as the input")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="rows per chunk (default: 100000)")
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    args = parser.parse_args(argv)
+    try:
+        score_file(args.input, args.output, args.chunk_size, args.resume)
+    except MissingColumnsError as e:
+        parser.exit(2, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Coalescer Utility - micro-batching for concurrent scoring requests
+
+A Coalescer sits in front of a batch scoring function. Concurrent callers
+submit() single items; the coalescer holds them until it has `max_batch`
+items or the oldest has waited `max_wait_us` microseconds, scores them as
+one batch and hands each caller its own result. Under burst load this
+turns thousands of scalar calls into a few vectorized ones.
+
+Batch size and queue wait are recorded in CoalescerMetrics.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_WAIT_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Counts of observations per upper bucket bound, plus an overflow bucket"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class CoalescerMetrics:
+    """Batch size and queue wait statistics for one coalescer"""
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_us = Histogram(QUEUE_WAIT_BUCKETS_US)
+
+    def record(self, size, waits_us):
+        self.batches += 1
+        self.items += size
+        self.batch_size.observe(size)
+        for wait in waits_us:
+            self.queue_wait_us.observe(wait)
+
+    def snapshot(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "fallbacks": self.fallbacks,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_us": self.queue_wait_us.snapshot(),
+        }
+
+
+class Coalescer:
+    """Collect concurrent submit() calls into batches for `score_batch`.
+
+    `score_batch(items)` returns one result per item, in order. If it
+    raises, the batch is retried item by item so only the bad items fail.
+    `score_one(item)`, when given, is used for batches of a single item,
+    where the scalar path is cheaper than the vectorized one.
+    """
+
+    def __init__(self, score_batch, max_batch=64, max_wait_us=200, score_one=None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.score_batch = score_batch
+        self.score_one = score_one
+        self.max_batch = max_batch
+        self.max_wait_us = max_wait_us
+        self.metrics = CoalescerMetrics()
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        """Queue `item` and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_us / 1e6, self.flush)
+        return await future
+
+    def flush(self):
+        """Score everything queued so far"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        now = time.perf_counter()
+        self.metrics.record(len(pending), [(now - queued) * 1e6 for _, _, queued in pending])
+
+        items = [item for item, _, _ in pending]
+        try:
+            if len(items) == 1 and self.score_one is not None:
+                results = [self.score_one(items[0])]
+            else:
+                results = self.score_batch(items)
+        except Exception:
+            self.metrics.fallbacks += 1
+            for item, future, _ in pending:
+                self._score_alone(item, future)
+            return
+        for (_, future, _), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _score_alone(self, item, future):
+        try:
+            result = self.score_one(item) if self.score_one is not None else self.score_batch([item])[0]
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
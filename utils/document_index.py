@@ -0,0 +1,286 @@
+"""
+Document Index - exact and near-duplicate lookup for uploaded documents
+
+Resubmitted or lightly edited claim photos are a common fraud signal, so
+process_document() fingerprints every upload and looks it up among all
+earlier ones:
+
+    sha256   SHA-256 of the file bytes, read in chunks, for exact resubmissions
+    ahash    64-bit average hash: which pixels of an 8x8 grayscale
+             thumbnail are brighter than its mean
+    dhash    64-bit difference hash: which pixels of a 9x8 grayscale
+             thumbnail are brighter than their right neighbour
+
+Resaving, resizing, recompressing or retouching a photo changes its
+SHA-256 but only a few bits of its perceptual hashes, so images whose
+dHash and aHash are both within NEAR_DISTANCE bits of an earlier upload
+are reported as near duplicates.
+
+Fingerprints are kept in a SQLite database, where exact lookups use an
+index on sha256. Near-duplicate lookups use multi-index hashing over the
+dHashes held in memory: each hash is split into four 16-bit blocks and the
+hashes are kept sorted by every block. Two hashes within 10 bits of each
+other are within 2 bits in at least one block, so a lookup searches each
+block's sorted values for the 137 values within 2 bits of the query's
+block, and only compares the hashes found there. With millions of
+documents that is a few thousand candidates instead of a full scan.
+Documents added since the blocks were last sorted sit in a short tail that
+is scanned directly.
+
+An upload is recorded once: check() given the upload_id of an upload it
+has already recorded, as on a Streamlit rerun, reports the matches that
+upload had when it was recorded instead of matching it against itself.
+Uploading the same file again gets a new id and is an exact resubmission.
+
+Set RISKSHIELD_DOCUMENT_INDEX to use a different database file.
+"""
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "documents.db")
+
+# Perceptual hashes within this many bits of each other are near duplicates
+NEAR_DISTANCE = 10
+BLOCKS = 4
+BLOCK_BITS = 64 // BLOCKS
+BLOCK_RADIUS = NEAR_DISTANCE // BLOCKS
+
+# Documents added before the sorted blocks are rebuilt
+MERGE_EVERY = 4096
+
+# Bytes hashed per read, so that a large upload is never held twice
+CHUNK_SIZE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 BLOB NOT NULL,
+    ahash INTEGER,
+    dhash INTEGER,
+    filename TEXT,
+    file_type TEXT,
+    size INTEGER,
+    created_at REAL NOT NULL,
+    upload_id TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+"""
+
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Every BLOCK_BITS-bit value with at most BLOCK_RADIUS bits set
+_FLIPS = np.array(sorted(
+    sum(1 << bit for bit in bits)
+    for radius in range(BLOCK_RADIUS + 1)
+    for bits in itertools.combinations(range(BLOCK_BITS), radius)
+), dtype=np.uint64)
+
+
+class Fingerprint(NamedTuple):
+    """What a document is looked up by; the perceptual hashes are None for non-images"""
+    sha256: str
+    ahash: int = None
+    dhash: int = None
+
+
+def file_sha256(file, chunk_size=CHUNK_SIZE):
+    """Hex SHA-256 of a binary file object, read in chunks from the start and rewound after"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _bits(pixels):
+    """A boolean array as an integer, first element in the highest bit"""
+    return int.from_bytes(np.packbits(pixels.ravel()).tobytes(), "big")
+
+
+def image_hashes(image):
+    """(ahash, dhash) of a PIL image.
+
+    A JPEG that is not loaded yet is decoded in grayscale at up to 1/8
+    scale (draft mode), which is all a 9x8 thumbnail needs.
+    """
+    image.draft("L", (64, 64))
+    gray = image.convert("L")
+    small = np.asarray(gray.resize((8, 8), Image.Resampling.LANCZOS), dtype=np.float64)
+    wide = np.asarray(gray.resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits(small > small.mean()), _bits(wide[:, 1:] > wide[:, :-1])
+
+
+def popcount(values):
+    """Bits set in each value of a uint64 array"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _signed(value):
+    """A 64-bit hash as the signed integer SQLite stores"""
+    return None if value is None else value - (1 << 64) if value >= 1 << 63 else value
+
+
+class DocumentIndex:
+    """Persisted document fingerprints with exact and near-duplicate lookups. Thread-safe."""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("RISKSHIELD_DOCUMENT_INDEX") or DEFAULT_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            # Databases created before uploads were tracked lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            if "upload_id" not in columns:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN upload_id TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_upload ON documents (upload_id)")
+            rows = self._conn.execute(
+                "SELECT id, dhash, ahash FROM documents WHERE dhash IS NOT NULL ORDER BY id").fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        self.size = len(data)
+        self.ids = data[:, 0].copy()
+        self.dhashes = data[:, 1].view(np.uint64).copy()
+        self.ahashes = data[:, 2].view(np.uint64).copy()
+        self._sort()
+
+    def __len__(self):
+        """Documents with perceptual hashes held for near-duplicate lookups"""
+        return self.size
+
+    def _sort(self):
+        """Sort every block of the hashes added so far; the tail becomes empty"""
+        self.sorted = self.size
+        self.blocks = []
+        hashes = self.dhashes[:self.size]
+        for block in range(BLOCKS):
+            values = ((hashes >> np.uint64(block * BLOCK_BITS)) & np.uint64((1 << BLOCK_BITS) - 1)).astype(np.uint16)
+            order = np.argsort(values, kind="stable").astype(np.int32)
+            self.blocks.append((values[order], order))
+
+    def _candidates(self, dhash):
+        """Positions of every hash that may be within NEAR_DISTANCE bits of `dhash`"""
+        found = [np.arange(self.sorted, self.size)]
+        for block, (values, order) in enumerate(self.blocks):
+            query = (dhash >> (block * BLOCK_BITS)) & ((1 << BLOCK_BITS) - 1)
+            probes = (np.uint64(query) ^ _FLIPS).astype(np.uint16)
+            start = np.searchsorted(values, probes, "left")
+            count = np.searchsorted(values, probes, "right") - start
+            total = int(count.sum())
+            if total:
+                # Every position of every [start, start + count) range
+                offsets = np.repeat(start - np.cumsum(count) + count, count)
+                found.append(order[offsets + np.arange(total)])
+        return np.unique(np.concatenate(found))
+
+    def _append(self, document_id, ahash, dhash):
+        if self.size == len(self.ids):
+            capacity = max(1024, 2 * self.size)
+            self.ids = np.resize(self.ids, capacity)
+            self.dhashes = np.resize(self.dhashes, capacity)
+            self.ahashes = np.resize(self.ahashes, capacity)
+        self.ids[self.size] = document_id
+        self.dhashes[self.size] = dhash
+        self.ahashes[self.size] = ahash
+        self.size += 1
+        if self.size - self.sorted >= MERGE_EVERY:
+            self._sort()
+
+    def lookup(self, fingerprint, limit=5):
+        """Earlier documents matching a Fingerprint.
+
+        Returns a dict with `exact`, the number of earlier uploads with the
+        same SHA-256, `first_seen` (a Unix time, or None), and `near`, up to
+        `limit` near duplicates as dicts of id, filename, created_at and the
+        dhash and ahash distances, closest first.
+        """
+        with self._lock:
+            return self._lookup(fingerprint, limit)
+
+    def _lookup(self, fingerprint, limit, before=None):
+        """Matches among the documents recorded before id `before`, or among all of them"""
+        before = (1 << 63) - 1 if before is None else before
+        exact, first_seen = self._conn.execute(
+            "SELECT COUNT(*), MIN(created_at) FROM documents WHERE sha256 = ? AND id < ?",
+            (bytes.fromhex(fingerprint.sha256), before)).fetchone()
+        near = []
+        if fingerprint.dhash is not None and self.size:
+            positions = self._candidates(fingerprint.dhash)
+            positions = positions[self.ids[positions] < before]
+            dhash_distance = popcount(self.dhashes[positions] ^ np.uint64(fingerprint.dhash))
+            ahash_distance = popcount(self.ahashes[positions] ^ np.uint64(fingerprint.ahash))
+            close = (dhash_distance <= NEAR_DISTANCE) & (ahash_distance <= NEAR_DISTANCE)
+            positions, dhash_distance, ahash_distance = positions[close], dhash_distance[close], ahash_distance[close]
+            best = np.lexsort((ahash_distance, dhash_distance))[:limit]
+            for position, d, a in zip(positions[best], dhash_distance[best], ahash_distance[best]):
+                filename, created_at = self._conn.execute(
+                    "SELECT filename, created_at FROM documents WHERE id = ?", (int(self.ids[position]),)).fetchone()
+                near.append({
+                    "id": int(self.ids[position]),
+                    "filename": filename,
+                    "created_at": created_at,
+                    "dhash_distance": int(d),
+                    "ahash_distance": int(a),
+                })
+        return {"exact": exact, "first_seen": first_seen, "near": near}
+
+    def add(self, fingerprint, filename=None, file_type=None, size=None, created_at=None, upload_id=None):
+        """Record a document, returning its id"""
+        with self._lock:
+            return self._add(fingerprint, filename, file_type, size, created_at, upload_id)
+
+    def _add(self, fingerprint, filename, file_type, size, created_at, upload_id):
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO documents (sha256, ahash, dhash, filename, file_type, size, created_at, upload_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (bytes.fromhex(fingerprint.sha256), _signed(fingerprint.ahash), _signed(fingerprint.dhash),
+                 filename, file_type, size, time.time() if created_at is None else created_at, upload_id))
+        if fingerprint.dhash is not None:
+            self._append(cursor.lastrowid, fingerprint.ahash, fingerprint.dhash)
+        return cursor.lastrowid
+
+    def check(self, fingerprint, filename=None, file_type=None, size=None, limit=5, upload_id=None):
+        """lookup() a document against the earlier ones, then add() it.
+
+        An `upload_id` already recorded is not added again; its matches are
+        those it had when it was.
+        """
+        with self._lock:
+            if upload_id is not None:
+                recorded = self._conn.execute(
+                    "SELECT MIN(id) FROM documents WHERE upload_id = ?", (upload_id,)).fetchone()[0]
+                if recorded is not None:
+                    return self._lookup(fingerprint, limit, before=recorded)
+            matches = self._lookup(fingerprint, limit)
+            self._add(fingerprint, filename, file_type, size, None, upload_id)
+            return matches
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def document_index():
+    """The process-wide document index, opened on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = DocumentIndex()
+    return _index
@@ -0,0 +1,214 @@
+"""
+Document Ingest - bulk processing of claim evidence on a worker pool
+
+Adjusters hand over whole folders or ZIP archives of photos and forms.
+iter_documents() lists every document in a set of uploads, paths,
+directories and ZIP archives as (name, open) pairs without reading any of
+them: archive members are read straight out of the archive, one at a time
+and only when opened, so nothing is extracted to disk.
+
+ingest() runs process_document() over those documents on a thread pool
+and yields each result as soon as it completes. At most `max_pending`
+documents are opened and waiting or in progress at once; the next one is
+only read once a worker frees up, so a multi-gigabyte archive is ingested
+in bounded memory. Threads rather than processes, because all workers
+check against the one process-wide DocumentIndex (so duplicates within a
+batch are caught too) and the heavy parts of processing a document, image
+decoding, SHA-256 and SQLite, run without the GIL and so on every core.
+
+    python -m utils.document_ingest claims_evidence.zip scans/ --workers 8
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import NamedTuple
+
+from utils.document_processor import process_document
+
+# The formats SmartAuditAI accepts, by extension
+SUPPORTED_TYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+ARCHIVE_TYPES = {"application/zip", "application/x-zip-compressed"}
+MAX_DOCUMENT_BYTES = 200 << 20
+
+
+class Document(io.BytesIO):
+    """A document read into memory, with the name, type and size of a Streamlit upload"""
+
+    def __init__(self, data, name, type=None):
+        super().__init__(data)
+        self.name = name
+        self.type = type or document_type(name)
+        self.size = len(data)
+
+    def __repr__(self):
+        return f"<Document {self.name!r}>"
+
+
+class Ingested(NamedTuple):
+    """The outcome of one document: process_document()'s result, or the error that stopped it"""
+    name: str
+    result: dict = None
+    error: str = None
+    seconds: float = 0.0
+
+
+def document_type(name):
+    """MIME type of a supported document name, or None"""
+    return SUPPORTED_TYPES.get(os.path.splitext(name)[1].lower())
+
+
+def _is_archive(name, file_type=None):
+    return file_type in ARCHIVE_TYPES or name.lower().endswith(".zip")
+
+
+def _checked(name, size):
+    if document_type(name) is None:
+        raise ValueError("Unsupported file type")
+    if size > MAX_DOCUMENT_BYTES:
+        raise ValueError(f"File too large ({size / 1e6:,.0f} MB)")
+
+
+def _open_path(path, name):
+    _checked(name, os.path.getsize(path))
+    with open(path, "rb") as f:
+        return Document(f.read(), name)
+
+
+def _open_member(archive, info, name):
+    _checked(name, info.file_size)
+    return Document(archive.read(info), name)
+
+
+def _open_upload(upload):
+    _checked(upload.name, upload.size)
+    upload.seek(0)
+    return upload
+
+
+def _unreadable(error):
+    raise error
+
+
+def _archive_documents(file, name):
+    try:
+        # Not closed here: the members are read from it after this generator
+        # has moved on, and it closes once the last of them is garbage
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile as e:
+        yield name, partial(_unreadable, ValueError(f"Unreadable archive: {e}"))
+        return
+    for info in archive.infolist():
+        base = os.path.basename(info.filename)
+        if info.is_dir() or base.startswith(".") or info.filename.startswith("__MACOSX/"):
+            continue
+        yield f"{name}/{info.filename}", partial(_open_member, archive, info, f"{name}/{info.filename}")
+
+
+def _path_documents(path):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.startswith("."):
+                    yield from _path_documents(os.path.join(root, filename))
+    elif _is_archive(path):
+        yield from _archive_documents(path, path)
+    else:
+        yield path, partial(_open_path, path, path)
+
+
+def iter_documents(sources):
+    """(name, open) pairs for every document in `sources`, none of them read yet.
+
+    Each source is a path (a file, a directory, walked recursively, or a
+    .zip) or an uploaded file object with a name, type and size, as from
+    st.file_uploader; uploaded ZIPs are expanded too. Calling open()
+    returns the document as a file object for process_document(), or
+    raises ValueError for one of a type SmartAuditAI does not take.
+    """
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)):
+            yield from _path_documents(os.fspath(source))
+        elif _is_archive(source.name, getattr(source, "type", None)):
+            yield from _archive_documents(source, source.name)
+        else:
+            yield source.name, partial(_open_upload, source)
+
+
+def _process(process, document):
+    start = time.perf_counter()
+    result = process(document)
+    return result, time.perf_counter() - start
+
+
+def _outcome(name, future):
+    try:
+        result, seconds = future.result()
+    except Exception as e:
+        return Ingested(name, error=str(e) or type(e).__name__)
+    return Ingested(name, result, seconds=seconds)
+
+
+def ingest(documents, workers=None, max_pending=None, process=process_document):
+    """Process (name, open) pairs on a thread pool, yielding an Ingested for each as it completes.
+
+    Results come in completion order, not input order. A document is only
+    opened once fewer than `max_pending` (default: twice the workers) are
+    in flight.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        pending = {}
+        for name, open_document in documents:
+            while len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _outcome(pending.pop(future), future)
+            try:
+                document = open_document()
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                yield Ingested(name, error=str(e))
+                continue
+            pending[pool.submit(_process, process, document)] = name
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _outcome(pending.pop(future), future)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process folders and ZIP archives of claim documents")
+    parser.add_argument("paths", nargs="+", help="documents, directories or .zip archives")
+    parser.add_argument("--workers", type=int, default=None, help="worker threads (default: all cores)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="documents in memory at once (default: twice the workers)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    processed = failed = 0
+    for outcome in ingest(iter_documents(args.paths), args.workers, args.max_pending):
+        if outcome.error:
+            failed += 1
+            print(f"{outcome.name}: error: {outcome.error}")
+        else:
+            processed += 1
+            print(f"{outcome.name}: {outcome.result['Duplicate Check']} ({outcome.seconds * 1000:.0f} ms)")
+    elapsed = time.perf_counter() - start
+    print(f"Processed {processed:,} documents ({failed:,} failed) in {elapsed:.1f}s "
+          f"({processed / elapsed if elapsed else 0:,.1f} documents/sec)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
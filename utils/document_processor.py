@@ -1,10 +1,68 @@
 """
 Document Processor Utility
+
+Images are inspected from their header: Image.open() only parses the
+header and EXIF, so size, mode, format and camera metadata come without
+decoding any pixels. Pixels are decoded only for the perceptual hashes,
+and JPEGs are decoded for those at reduced scale (see image_hashes()), so
+a large photo costs about as much as a small one.
+
+Every document gets a deterministic Risk Score from 1 to 10 (see
+utils/document_risk.py), and the findings behind it join the duplicate
+check's in fraud_indicators.
 """
-from PIL import Image
-import io
+from datetime import datetime
+
+from PIL import ExifTags, Image
+
+from utils.document_index import Fingerprint, document_index, file_sha256, image_hashes
+from utils.document_risk import document_risk
+
+
+# EXIF tags reported for images, by result key
+EXIF_FIELDS = {
+    "Camera Make": ExifTags.Base.Make,
+    "Camera Model": ExifTags.Base.Model,
+    "Software": ExifTags.Base.Software,
+    "Modified": ExifTags.Base.DateTime,
+}
+EXIF_TAKEN = ExifTags.Base.DateTimeOriginal
+
+
+def inspect_image(file):
+    """Open an image lazily and read its metadata from the header alone.
+
+    Returns (image, metadata); the image has not decoded any pixels yet.
+    """
+    image = Image.open(file)
+    metadata = {"Image Size": image.size, "Mode": image.mode, "Format": image.format}
+    # A PNG may keep its EXIF after the pixel data, where reading it would
+    # mean decoding the whole image first
+    if image.format != "PNG" or "exif" in image.info:
+        exif = image.getexif()
+        for key, tag in EXIF_FIELDS.items():
+            if exif.get(tag):
+                metadata[key] = str(exif[tag]).strip("\x00 ")
+        taken = exif.get_ifd(ExifTags.IFD.Exif).get(EXIF_TAKEN)
+        if taken:
+            metadata["Taken"] = str(taken).strip("\x00 ")
+    return image, metadata
+
+
+def _duplicate_check(matches):
+    """Findings for the duplicate lookup of one upload, as (summary, fraud indicators)"""
+    indicators = []
+    if matches["exact"]:
+        first_seen = datetime.fromtimestamp(matches["first_seen"]).strftime("%Y-%m-%d %H:%M")
+        indicators.append(f"Exact resubmission: uploaded {matches['exact']} time(s) before, first on {first_seen}")
+    for match in matches["near"]:
+        if match["dhash_distance"] or not matches["exact"]:
+            indicators.append(f"Near duplicate of {match['filename'] or 'an earlier upload'} "
+                              f"({match['dhash_distance']} of 64 bits differ)")
+    return (indicators[0] if indicators else "No earlier upload matches"), indicators
+
 
-def process_document(uploaded_file):
+def process_document(uploaded_file, index=None):
     # Simple mock: check file type and size
     file_type = uploaded_file.type
     file_size = uploaded_file.size
@@ -12,15 +70,29 @@ def process_document(uploaded_file):
         "File Type": file_type,
         "File Size": f"{file_size/1024:.2f} KB"
     }
-    # If image, try to open and get dimensions
+    sha256 = file_sha256(uploaded_file)
+    ahash = dhash = None
+    metadata = {}
+    # If image, read its dimensions and EXIF from the header
     if file_type.startswith("image"):
-        image = Image.open(uploaded_file)
-        result["Image Size"] = image.size
-        result["Mode"] = image.mode
+        image, metadata = inspect_image(uploaded_file)
+        result.update(metadata)
+        ahash, dhash = image_hashes(image)
     # If PDF or DOCX, just show type
     if file_type == "application/pdf":
         result["PDF"] = "PDF file uploaded. (OCR not implemented in demo)"
     if file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
         result["Word"] = "Word document uploaded. (NLP not implemented in demo)"
+    # Look the upload up among earlier ones (see utils/document_index.py), then
+    # record it; a Streamlit upload processed again is recorded only once
+    matches = (document_index() if index is None else index).check(
+        Fingerprint(sha256, ahash, dhash), getattr(uploaded_file, "name", None), file_type, file_size,
+        upload_id=getattr(uploaded_file, "file_id", None))
+    result["SHA-256"] = sha256
+    result["Duplicate Check"], indicators = _duplicate_check(matches)
+    result["Risk Score"], findings = document_risk(uploaded_file, sha256, file_type, file_size, metadata, matches)
+    indicators += findings
+    if indicators:
+        result["fraud_indicators"] = indicators
     result["Verification"] = "Document processed. (Demo only)"
     return result
@@ -0,0 +1,230 @@
+"""
+Document Risk - deterministic fraud risk score for uploaded documents
+
+A document scores from 1 (nothing found) to 10, one point plus the points
+of every finding, from signals that are cheap to read:
+
+    editor        the EXIF Software tag names an image editor            3
+    modified      the EXIF modification time is after the capture time   1
+    no camera     a JPEG photo with no camera make or model              1
+    quality       quality estimated from the JPEG quantization tables
+                  below LOW_QUALITY, a sign of repeated recompression    1
+    error levels  error level analysis: resaved at lower qualities,
+                  some areas keep far more of their error than the
+                  rest, as when part of the photo was pasted in after
+                  it was first saved                                     3
+    resolution    longest side under LOW_RESOLUTION pixels               1
+    compression   a JPEG under LOW_BYTES_PER_PIXEL                       1
+    revisions     a PDF saved again after it was created                 2
+    duplicate     an exact resubmission (4) or near duplicate (3) of an
+                  earlier upload, from utils/document_index.py
+
+Metadata, quantization tables, dimensions and sizes come from the file
+header without decoding any pixels. Error level analysis needs the pixels
+at their native resolution, where the compression history it measures
+lives (a reduced-scale decode averages it away), so it runs only on JPEGs
+of up to ELA_MAX_PIXELS. It resaves at most ELA_SAMPLE_PIXELS of native
+pixels at three qualities, with the per-pixel work done inside PIL and
+NumPy left one value per 16x16 tile; a 2-megapixel photo takes about 40 ms.
+
+Everything but the duplicate check depends on the file's bytes alone, so
+those findings are cached by SHA-256 (DOCUMENT_RISK_CACHE) and a
+resubmitted document is not analysed again.
+"""
+import io
+import math
+
+import numpy as np
+from PIL import Image, ImageChops
+
+from utils.quote_cache import QuoteCache
+
+EDITORS = ("photoshop", "gimp", "lightroom", "snapseed", "pixelmator", "affinity", "paint.net",
+           "picsart", "canva", "facetune", "photoscape", "acdsee", "corel", "fotor")
+LOW_QUALITY = 70
+LOW_RESOLUTION = 640
+LOW_BYTES_PER_PIXEL = 0.05
+
+# Resaved at ELA_REFERENCE a tile loses its compression history; the
+# error it keeps at each of ELA_QUALITIES is taken as a share of that
+ELA_REFERENCE = 40
+ELA_QUALITIES = range(50, 95, 5)
+ELA_TILE = 16
+ELA_MAX_PIXELS = 3_000_000
+# Pixels, in ELA_PATCH squares spread over the image, resaved at every one
+# of ELA_QUALITIES to find the ELA_GHOSTS likeliest original qualities, and
+# resaved at those to find the tiles that stand out
+ELA_PATCH = 64
+ELA_PROBE_PIXELS = 65_536
+ELA_SAMPLE_PIXELS = 1_000_000
+ELA_GHOSTS = 2
+# Mean error at ELA_REFERENCE below which a tile is too flat to tell
+ELA_MIN_ERROR = 2.0
+# A tile stands out at a quality when its share is ELA_EXCESS above the
+# median tile's and ELA_RATIO times it, and ELA_MIN_TILES that stand out
+# flag an image
+ELA_EXCESS = 0.3
+ELA_RATIO = 2.0
+ELA_MIN_TILES = 8
+
+EXACT_DUPLICATE_POINTS = 4
+NEAR_DUPLICATE_POINTS = 3
+
+DOCUMENT_RISK_CACHE = QuoteCache(maxsize=4096, ttl=24 * 60 * 60)
+
+# The libjpeg luminance table that quality settings scale
+_LUMINANCE = np.array([
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+])
+
+
+def jpeg_quality(quantization):
+    """The libjpeg quality setting (1-100) closest to a JPEG's luminance quantization table"""
+    scale = 100 * np.sum(quantization[0]) / _LUMINANCE.sum()
+    quality = 5000 / scale if scale > 100 else (200 - scale) / 2
+    return int(np.clip(round(quality), 1, 100))
+
+
+def _resave_error(gray, quality, box):
+    """Mean change of each tile of a grayscale image resaved at `quality`"""
+    resaved = io.BytesIO()
+    gray.save(resaved, "JPEG", quality=quality)
+    return np.asarray(ImageChops.difference(gray, Image.open(resaved)).crop(box).convert("F").reduce(ELA_TILE))
+
+
+def _patches(gray, pixels):
+    """A mosaic of ELA_PATCH squares spread evenly over a grayscale image, about `pixels` in all.
+
+    The squares sit on the JPEG block grid, so each changes in a resaved
+    mosaic exactly as it would in the resaved image. An image of up to
+    `pixels` is returned whole.
+    """
+    width, height = gray.size
+    columns, rows = width // ELA_PATCH, height // ELA_PATCH
+    if width * height <= pixels or not columns or not rows:
+        return gray
+    step = math.ceil(math.sqrt(columns * rows * ELA_PATCH ** 2 / pixels))
+    xs = range((columns - 1) % step // 2, columns, step)
+    ys = range((rows - 1) % step // 2, rows, step)
+    mosaic = Image.new("L", (len(xs) * ELA_PATCH, len(ys) * ELA_PATCH))
+    for j, y in enumerate(ys):
+        for i, x in enumerate(xs):
+            patch = gray.crop((x * ELA_PATCH, y * ELA_PATCH, (x + 1) * ELA_PATCH, (y + 1) * ELA_PATCH))
+            mosaic.paste(patch, (i * ELA_PATCH, j * ELA_PATCH))
+    return mosaic
+
+
+def _shares(gray, qualities):
+    """(textured, shares): the tiles with ELA_MIN_ERROR at ELA_REFERENCE, and every tile's error at each quality as a share of that"""
+    width, height = gray.size
+    box = (0, 0, width // ELA_TILE * ELA_TILE, height // ELA_TILE * ELA_TILE)
+    reference = _resave_error(gray, ELA_REFERENCE, box)
+    scale = np.maximum(reference, ELA_MIN_ERROR)
+    return reference >= ELA_MIN_ERROR, [_resave_error(gray, quality, box) / scale for quality in qualities]
+
+
+def error_levels(image, quality):
+    """Tiles of a JPEG saved at `quality` whose compression history stands out from the rest.
+
+    Busy tiles change more than flat ones at any quality, so each tile's
+    error when resaved below the image's own quality is taken as a share
+    of its error at ELA_REFERENCE. A photo saved once has about the same
+    shares everywhere. One saved at a lower quality, edited and saved again
+    keeps little error at that quality, except where the edit pasted in
+    pixels that were never saved at it. A small probe of the image finds
+    the qualities of ELA_QUALITIES where the median tile keeps least, then
+    the tiles of a larger sample whose share there stands far above the
+    median tile's are counted. The per-pixel work runs in PIL, leaving
+    NumPy one value per tile.
+    """
+    gray = image.convert("L")
+    # Qualities this close to the image's own barely change any tile
+    qualities = [q for q in ELA_QUALITIES if q < quality - 2]
+    if min(gray.size) < ELA_TILE or not qualities:
+        return 0
+    textured, shares = _shares(_patches(gray, ELA_PROBE_PIXELS), qualities)
+    if not textured.any():
+        return 0
+    kept = [np.median(share[textured]) for share in shares]
+    qualities = [qualities[i] for i in np.argsort(kept)[:ELA_GHOSTS]]
+    textured, shares = _shares(_patches(gray, ELA_SAMPLE_PIXELS), qualities)
+    stands_out = np.zeros(textured.shape, dtype=bool)
+    if textured.any():
+        for share in shares:
+            typical = np.median(share[textured])
+            stands_out |= (share > typical + ELA_EXCESS) & (share > ELA_RATIO * typical)
+    return int(np.count_nonzero(stands_out & textured))
+
+
+def _pdf_revisions(file, chunk_size=1 << 20):
+    """Times a PDF was saved: its %%EOF markers, less the first-page one of a linearized file"""
+    file.seek(0)
+    head = file.read(1024)
+    count, tail = 0, b""
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        count += (tail + chunk).count(b"%%EOF")
+        tail = chunk[-4:]
+    file.seek(0)
+    return count - (b"/Linearized" in head and count > 1)
+
+
+def _image_findings(file, metadata, size):
+    findings = []
+    software = metadata.get("Software", "")
+    if any(editor in software.lower() for editor in EDITORS):
+        findings.append((3, f"Saved with image editing software ({software})"))
+    if metadata.get("Taken") and metadata.get("Modified", "") > metadata["Taken"]:
+        findings.append((1, f"Modified on {metadata['Modified']}, after it was taken on {metadata['Taken']}"))
+    width, height = metadata["Image Size"]
+    if max(width, height) < LOW_RESOLUTION:
+        findings.append((1, f"Low resolution for a claim photo ({width}x{height})"))
+    file.seek(0)
+    image = Image.open(file)
+    if image.format not in ("JPEG", "MPO"):
+        return findings
+    if not metadata.get("Camera Make") and not metadata.get("Camera Model"):
+        findings.append((1, "No camera make or model: metadata stripped or not a camera photo"))
+    quality = jpeg_quality(image.quantization)
+    if quality < LOW_QUALITY:
+        findings.append((1, f"Recompressed: JPEG quality about {quality}"))
+    if size / (width * height) < LOW_BYTES_PER_PIXEL:
+        findings.append((1, f"Heavily compressed ({size / (width * height):.3f} bytes per pixel)"))
+    if width * height <= ELA_MAX_PIXELS:
+        tiles = error_levels(image, quality)
+        if tiles >= ELA_MIN_TILES:
+            findings.append((3, f"Error level analysis: {tiles} areas of {ELA_TILE}x{ELA_TILE} "
+                                f"pixels have a different compression history from the rest"))
+    return findings
+
+
+def content_findings(file, file_type, size, metadata):
+    """(points, finding) pairs that depend only on a document's bytes.
+
+    `metadata` is what inspect_image() read for an image, else empty.
+    """
+    if file_type.startswith("image"):
+        return _image_findings(file, metadata, size)
+    if file_type == "application/pdf":
+        revisions = _pdf_revisions(file)
+        if revisions > 1:
+            return [(2, f"PDF saved {revisions} times: edited after it was created")]
+    return []
+
+
+def duplicate_points(matches):
+    """Points for a DocumentIndex lookup: exact resubmissions over near duplicates"""
+    if matches["exact"]:
+        return EXACT_DUPLICATE_POINTS
+    return NEAR_DUPLICATE_POINTS if matches["near"] else 0
+
+
+def document_risk(file, sha256, file_type, size, metadata, matches):
+    """(score from 1 to 10, findings) of a document, with the content findings cached by SHA-256"""
+    findings = DOCUMENT_RISK_CACHE.get_or_compute(
+        sha256, lambda: tuple(content_findings(file, file_type, size, metadata)))
+    points = sum(points for points, _ in findings) + duplicate_points(matches)
+    return min(10, 1 + points), [finding for _, finding in findings]
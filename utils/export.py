@@ -0,0 +1,155 @@
+"""
+Export Utility - streaming CSV, Parquet and Arrow IPC exports
+
+export() writes an iterator of DataFrame chunks (such as
+AssessmentStore.iter_assessments()) to a file one chunk at a time, so an
+export of the whole book never holds more than one chunk in memory. CSV
+needs nothing beyond pandas; Parquet and Arrow IPC need pyarrow and are
+only offered when it is installed.
+
+Exports for download go to a TempExport, a temporary file that is deleted
+once nothing refers to it any more, such as when the Streamlit session
+holding it ends, and at exit at the latest.
+"""
+import os
+import tempfile
+import time
+import weakref
+from contextlib import suppress
+
+import numpy as np
+import pandas as pd
+
+# Format key -> (label, MIME type, file extension)
+FORMATS = {
+    "csv": ("CSV", "text/csv", ".csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("Arrow IPC", "application/vnd.apache.arrow.file", ".arrow"),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def available_formats():
+    """Formats that can be written here; Parquet and Arrow need pyarrow"""
+    return [key for key in FORMATS if key == "csv" or _pyarrow() is not None]
+
+
+def assessment_schema(details=False):
+    """Arrow schema of AssessmentStore.iter_assessments() chunks.
+
+    Fixed up front so that chunks whose optional columns happen to be all
+    empty still write with the same types as the others.
+    """
+    pa = _pyarrow()
+    fields = [
+        ("id", pa.int64()),
+        ("line", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("risk_score", pa.float64()),
+        ("premium", pa.int64()),
+        ("fraud_score", pa.float64()),
+        ("claim_amount", pa.int64()),
+    ]
+    if details:
+        fields.append(("details", pa.string()))
+    return pa.schema(fields)
+
+
+def _remove_file(path):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+class TempExport:
+    """A temporary export file, deleted by remove(), once unreferenced or at exit"""
+
+    def __init__(self, extension):
+        fd, self.path = tempfile.mkstemp(suffix=extension, prefix="riskshield_export_")
+        os.close(fd)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def remove(self):
+        """Delete the file now; a file already gone (say, to a tmp cleaner) is fine"""
+        self._finalizer()
+
+
+def _csv_text(chunk, header):
+    """A chunk as CSV, with UTC timestamps as ISO 8601 strings.
+
+    pandas formats datetimes one Timestamp at a time, several times slower
+    than the rest of to_csv(); NumPy formats the whole column at once.
+    """
+    for name in chunk.columns:
+        if isinstance(chunk[name].dtype, pd.DatetimeTZDtype):
+            values = chunk[name].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+            chunk = chunk.assign(**{name: np.datetime_as_string(values, unit="us", timezone="UTC")})
+    return chunk.to_csv(index=False, header=header)
+
+
+def _arrow_writer(pa, fmt, f, schema):
+    return pa.parquet.ParquetWriter(f, schema) if fmt == "parquet" else pa.ipc.new_file(f, schema)
+
+
+def export(chunks, fmt, path, schema=None, progress=None):
+    """Stream DataFrame chunks to `path` as CSV, Parquet or Arrow IPC.
+
+    `schema` is the Arrow schema for Parquet and Arrow output (taken from
+    the first chunk when omitted). An export of no rows is still a valid
+    file: a CSV header from an empty chunk, or a Parquet or Arrow file of
+    the schema. `progress(rows, bytes)` is called after every chunk.
+    Returns rows, bytes, seconds and bytes_per_sec.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt != "csv" and _pyarrow() is None:
+        raise RuntimeError(f"{FORMATS[fmt][0]} export needs pyarrow (pip install pyarrow)")
+
+    start = time.perf_counter()
+    rows = 0
+    with open(path, "wb") as f:
+        if fmt == "csv":
+            header = True
+            for chunk in chunks:
+                f.write(_csv_text(chunk, header).encode("utf-8"))
+                header = False
+                rows += len(chunk)
+                if progress:
+                    progress(rows, f.tell())
+        else:
+            pa = _pyarrow()
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                    if writer is None:
+                        schema = table.schema
+                        writer = _arrow_writer(pa, fmt, f, schema)
+                    writer.write_table(table)
+                    rows += len(chunk)
+                    if progress:
+                        progress(rows, f.tell())
+                if writer is None and schema is not None:
+                    writer = _arrow_writer(pa, fmt, f, schema)
+            finally:
+                if writer is not None:
+                    writer.close()
+        size = f.tell()
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "bytes_per_sec": size / seconds if seconds else 0.0,
+    }
@@ -1,59 +1,175 @@
 """
 Fraud Detector Utility - Enhanced for Indian Market
 """
+from functools import lru_cache
 
-def detect_fraud(claim_amount, claim_type, suspicious_docs, prior_fraud):
-    score = 5
-    alerts = []
-    
-    # Adjust thresholds for Indian market (INR)
-    if claim_amount > 500000:  # ₹5 lakh threshold
-        score += 2
-        alerts.append("High claim amount detected (>₹5 lakhs).")
-    elif claim_amount > 200000:  # ₹2 lakh threshold
-        score += 1
-        alerts.append("Moderate claim amount (>₹2 lakhs) - requires review.")
-    
-    if suspicious_docs:
-        score += 2
-        alerts.append("Suspicious documents flagged for verification.")
-    
-    if prior_fraud:
-        score += 1
-        alerts.append("Prior fraud history found in records.")
-    
-    if claim_type == "Cyber":
-        score += 1
-        alerts.append("Cyber claim: inherently higher risk category.")
-    elif claim_type == "Auto" and claim_amount > 300000:
-        score += 1
-        alerts.append("High-value auto claim requires additional verification.")
-    elif claim_type == "Property" and claim_amount > 1000000:
-        score += 1
-        alerts.append("High-value property claim - consider site inspection.")
-    
-    score = min(10, score)
-    
+import numpy as np
+
+from utils.fraud_rules import Rule, RuleSet
+
+# Alert bits, in the order their messages appear in the alert text
+HIGH_AMOUNT = 1 << 0
+MODERATE_AMOUNT = 1 << 1
+SUSPICIOUS_DOCS = 1 << 2
+PRIOR_FRAUD = 1 << 3
+CYBER_CLAIM = 1 << 4
+HIGH_VALUE_AUTO = 1 << 5
+HIGH_VALUE_PROPERTY = 1 << 6
+HIGH_RISK = 1 << 7
+MODERATE_RISK = 1 << 8
+LOW_RISK = 1 << 9
+AUTO_CHECKS = 1 << 10
+PROPERTY_CHECKS = 1 << 11
+CYBER_CHECKS = 1 << 12
+HEALTH_CHECKS = 1 << 13
+LIFE_CHECKS = 1 << 14
+CLAIM_VELOCITY = 1 << 15
+DUPLICATE_CLAIM = 1 << 16
+FRAUD_RING = 1 << 17
+
+ALERT_MESSAGES = (
+    (HIGH_AMOUNT, ("High claim amount detected (>₹5 lakhs).",)),
+    (MODERATE_AMOUNT, ("Moderate claim amount (>₹2 lakhs) - requires review.",)),
+    (SUSPICIOUS_DOCS, ("Suspicious documents flagged for verification.",)),
+    (PRIOR_FRAUD, ("Prior fraud history found in records.",)),
+    (DUPLICATE_CLAIM, ("Near-duplicate claim: the claimant filed a claim for about the same amount in the last 30 days.",)),
+    (CLAIM_VELOCITY, ("High claim velocity: repeated recent claims by this claimant or on this policy.",)),
+    (FRAUD_RING, ("Possible fraud ring: claimants linked through shared phones, bank accounts, policies or providers.",)),
+    (CYBER_CLAIM, ("Cyber claim: inherently higher risk category.",)),
+    (HIGH_VALUE_AUTO, ("High-value auto claim requires additional verification.",)),
+    (HIGH_VALUE_PROPERTY, ("High-value property claim - consider site inspection.",)),
+    (HIGH_RISK, (
+        "🚨 POTENTIAL FRAUD DETECTED! Immediate review and investigation recommended.",
+        "Actions: Assign to fraud investigation team, request additional documentation.",
+    )),
+    (MODERATE_RISK, (
+        "⚠️ MODERATE FRAUD RISK. Enhanced review and verification required.",
+        "Actions: Secondary review, verify claim details, contact claimant.",
+    )),
+    (LOW_RISK, (
+        "✅ LOW FRAUD RISK. Standard processing can proceed.",
+        "Actions: Normal claim processing workflow.",
+    )),
+    (AUTO_CHECKS, ("Auto-specific checks: Vehicle registration, accident report, repair estimates.",)),
+    (PROPERTY_CHECKS, ("Property-specific checks: Property ownership, damage assessment, repair quotes.",)),
+    (CYBER_CHECKS, ("Cyber-specific checks: Incident report, forensic analysis, business impact assessment.",)),
+    (HEALTH_CHECKS, ("Health-specific checks: Medical reports, hospital bills, treatment verification.",)),
+    (LIFE_CHECKS, ("Life-specific checks: Death certificate, medical history, beneficiary verification.",)),
+)
+
+CLAIM_TYPE_CHECKS = {
+    "Auto": AUTO_CHECKS,
+    "Property": PROPERTY_CHECKS,
+    "Cyber": CYBER_CHECKS,
+    "Health": HEALTH_CHECKS,
+    "Life": LIFE_CHECKS,
+}
+
+# Earlier claims (see utils/claim_index.py) at which claim velocity is flagged
+VELOCITY_LIMITS = {
+    "claims_24h": 2,
+    "claims_7d": 3,
+    "claims_30d": 5,
+    "policy_claims_30d": 4,
+}
+
+# Rings (see utils/fraud_rings.py) of at least this many claimants, and at
+# least this many links per entity, are flagged
+RING_MIN_SIZE = 3
+RING_MIN_DENSITY = 1.0
+
+# Every claim starts from this score, plus the points of the rules it meets, up to 10
+BASE_SCORE = 5
+
+# Adjust thresholds for Indian market (INR)
+FRAUD_RULES = RuleSet(
+    (
+        Rule("high_amount", HIGH_AMOUNT, 2, ("claim_amount", ">", 500000), group="amount"),  # ₹5 lakh
+        Rule("moderate_amount", MODERATE_AMOUNT, 1, ("claim_amount", ">", 200000), group="amount"),  # ₹2 lakh
+        Rule("suspicious_docs", SUSPICIOUS_DOCS, 2, ("suspicious_docs", "==", True)),
+        Rule("prior_fraud", PRIOR_FRAUD, 1, ("prior_fraud", "==", True)),
+        Rule("duplicate_claim", DUPLICATE_CLAIM, 2, ("duplicate_amounts", ">", 0)),
+        Rule("claim_velocity", CLAIM_VELOCITY, 1,
+             *((name, ">=", limit) for name, limit in VELOCITY_LIMITS.items()), match="any"),
+        Rule("fraud_ring", FRAUD_RING, 2, ("ring_size", ">=", RING_MIN_SIZE), ("ring_density", ">=", RING_MIN_DENSITY)),
+        Rule("cyber_claim", CYBER_CLAIM, 1, ("claim_type", "==", "Cyber"), group="claim_type"),
+        Rule("high_value_auto", HIGH_VALUE_AUTO, 1,
+             ("claim_type", "==", "Auto"), ("claim_amount", ">", 300000), group="claim_type"),
+        Rule("high_value_property", HIGH_VALUE_PROPERTY, 1,
+             ("claim_type", "==", "Property"), ("claim_amount", ">", 1000000), group="claim_type"),
+        # Specific recommendations based on claim type
+        *(Rule(f"{claim_type.lower()}_checks", checks, 0, ("claim_type", "==", claim_type))
+          for claim_type, checks in CLAIM_TYPE_CHECKS.items()),
+    ),
+    # Velocity and ring features are optional: left out, the claim is scored on its own
+    defaults={
+        **{name: 0 for name in VELOCITY_LIMITS},
+        "duplicate_amounts": 0,
+        "ring_size": 0,
+        "ring_density": 0.0,
+    },
+)
+
+
+def _risk_band(score):
     if score >= 8:
-        alerts.append("🚨 POTENTIAL FRAUD DETECTED! Immediate review and investigation recommended.")
-        alerts.append("Actions: Assign to fraud investigation team, request additional documentation.")
-    elif score >= 6:
-        alerts.append("⚠️ MODERATE FRAUD RISK. Enhanced review and verification required.")
-        alerts.append("Actions: Secondary review, verify claim details, contact claimant.")
-    else:
-        alerts.append("✅ LOW FRAUD RISK. Standard processing can proceed.")
-        alerts.append("Actions: Normal claim processing workflow.")
-    
-    # Add specific recommendations based on claim type
-    if claim_type == "Auto":
-        alerts.append("Auto-specific checks: Vehicle registration, accident report, repair estimates.")
-    elif claim_type == "Property":
-        alerts.append("Property-specific checks: Property ownership, damage assessment, repair quotes.")
-    elif claim_type == "Cyber":
-        alerts.append("Cyber-specific checks: Incident report, forensic analysis, business impact assessment.")
-    elif claim_type == "Health":
-        alerts.append("Health-specific checks: Medical reports, hospital bills, treatment verification.")
-    elif claim_type == "Life":
-        alerts.append("Life-specific checks: Death certificate, medical history, beneficiary verification.")
-    
-    return score, "\n".join(alerts)
+        return HIGH_RISK
+    if score >= 6:
+        return MODERATE_RISK
+    return LOW_RISK
+
+
+def detect_fraud(claim_amount, claim_type, suspicious_docs, prior_fraud, **features):
+    score, alerts = score_claim(claim_amount, claim_type, suspicious_docs, prior_fraud, **features)
+    return score, render_alerts(alerts)
+
+
+def score_claim(claim_amount, claim_type, suspicious_docs, prior_fraud,
+                claims_24h=0, claims_7d=0, claims_30d=0, policy_claims_30d=0, duplicate_amounts=0,
+                ring_size=0, ring_density=0.0):
+    """Score one claim with FRAUD_RULES, returning (score, alert bitmask) without any text.
+
+    The keyword arguments are the claim's velocity features, the earlier
+    claims a ClaimIndex found, and its ring features from a ClaimGraph;
+    left at zero, the claim is scored on its own.
+    """
+    points, alerts = FRAUD_RULES.score({
+        "claim_amount": claim_amount,
+        "claim_type": claim_type,
+        "suspicious_docs": suspicious_docs,
+        "prior_fraud": prior_fraud,
+        "claims_24h": claims_24h,
+        "claims_7d": claims_7d,
+        "claims_30d": claims_30d,
+        "policy_claims_30d": policy_claims_30d,
+        "duplicate_amounts": duplicate_amounts,
+        "ring_size": ring_size,
+        "ring_density": ring_density,
+    })
+    score = min(10, BASE_SCORE + points)
+    return score, alerts | _risk_band(score)
+
+
+@lru_cache(maxsize=None)
+def render_alerts(alerts):
+    """Render an alert bitmask as the newline-joined alert text"""
+    alerts = int(alerts)
+    return "\n".join(line for bit, lines in ALERT_MESSAGES if alerts & bit for line in lines)
+
+
+def detect_fraud_batch(data):
+    """Score a table of claims at once with FRAUD_RULES.
+
+    `data` is a pandas DataFrame, or any mapping of column name to array, with
+    claim_amount, claim_type, suspicious_docs and prior_fraud columns, and
+    optionally the velocity columns ClaimIndex.add_batch() returns and the
+    ring columns ClaimGraph.add_batch() returns. Returns
+    (scores, alerts) where scores match detect_fraud row for row and alerts
+    are uint32 bitmasks; pass one to render_alerts() to get its text.
+    """
+    size = len(data["claim_amount"])
+    points, alerts = FRAUD_RULES.score_batch(data, size)
+    score = np.minimum(BASE_SCORE + points, 10)
+    band = np.array([_risk_band(score) for score in range(11)], dtype=np.uint32)
+    alerts |= band[score]
+    return score, alerts
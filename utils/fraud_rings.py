@@ -0,0 +1,212 @@
+"""
+Fraud Rings - connected claimants, policies, providers, phones and accounts
+
+Organized fraud spreads across many small claims that each look clean on
+their own, but share a garage or hospital, a phone number or a bank
+account. ClaimGraph links the entities seen on every claim (each claim
+joins its claimant to the claim's policy, provider, phone and bank
+account) and keeps the connected components, the candidate rings, with a
+union-find over NumPy arrays:
+
+    nodes    one per entity: parent pointer and kind, plus a KeyTable
+             (utils/key_table.py) entry mapping its key hash to the node
+    roots    per component, kept on its root node: entities, claimants
+             and distinct links, summed into the new root whenever
+             components merge (21 bytes a node in all)
+    links    distinct entity pairs, deduplicated in a KeyTable of pair hashes
+
+A batch of claims is merged with vectorized hooking rounds (each root
+hooked under the smallest root it is linked to, then paths compressed)
+rather than one union at a time, so a graph of tens of millions of links
+stays cheap to extend.
+
+Every claim gets two ring features for the fraud rules:
+
+    ring_size     claimants in its component
+    ring_density  distinct links per entity in its component; below 1 for
+                  claims that only share one provider (a tree), higher when
+                  claimants also share phones, accounts or policies
+"""
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.key_table import KeyTable, id_hashes, mix64, table_keys
+
+ENTITIES = ("claimant", "policy", "provider", "phone", "bank_account")
+CLAIMANT = 0
+_SALTS = (0x2545F4914F6CDD1D, 0x5851F42D4C957F2D, 0x14057B7EF767814F, 0x9C6E6B3F2A1D8C47, 0xD1B54A32D192ED03)
+_LINK_SALT = 0x8CB92BA72F3D8DD7
+
+
+class RingFeatures(NamedTuple):
+    """The component a claim belongs to, as detect_fraud() keyword arguments"""
+    ring_size: int = 0
+    ring_density: float = 0.0
+
+
+class ClaimGraph:
+    """Incremental connected components over the entities seen on claims. Thread-safe."""
+
+    def __init__(self, capacity=1 << 16):
+        self.size = 0
+        self.parent = np.empty(capacity, dtype=np.int32)
+        self.kind = np.empty(capacity, dtype=np.int8)
+        self.entities = np.empty(capacity, dtype=np.int32)
+        self.claimants = np.empty(capacity, dtype=np.int32)
+        self.links = np.empty(capacity, dtype=np.int64)
+        self.nodes = KeyTable({"node": (np.int32, -1, None)})
+        self.pairs = KeyTable()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def nbytes(self):
+        """Memory held by the graph arrays"""
+        arrays = (self.parent, self.kind, self.entities, self.claimants, self.links)
+        return sum(array.nbytes for array in arrays) + self.nodes.nbytes() + self.pairs.nbytes()
+
+    def _roots(self, nodes):
+        """Component roots of `nodes`, compressing their paths on the way"""
+        roots = self.parent[nodes]
+        while True:
+            up = self.parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        self.parent[nodes] = roots
+        return roots
+
+    def _node_keys(self, entities):
+        """Table keys and kinds of every entity given, one row per claim and kind"""
+        keys, kinds, rows = [], [], []
+        for kind, name in enumerate(ENTITIES):
+            values = entities.get(name)
+            if values is None:
+                continue
+            values = pd.Series(values, dtype=object)
+            present = np.flatnonzero(values.notna().to_numpy() & (values.astype(str).str.strip() != "").to_numpy())
+            keys.append(table_keys(_SALTS[kind], id_hashes(values.iloc[present].infer_objects().to_numpy())))
+            kinds.append(np.full(len(present), kind, dtype=np.int8))
+            rows.append(present)
+        return np.concatenate(keys), np.concatenate(kinds), np.concatenate(rows)
+
+    def _add_nodes(self, keys, kinds):
+        """Node ids of distinct entity keys, creating the new ones as components of their own"""
+        self.nodes.reserve(len(keys))
+        slots = self.nodes.find(keys, insert=True)
+        nodes = self.nodes["node"][slots].astype(np.int64)
+        new = nodes < 0
+        count = int(new.sum())
+        if self.size + count > len(self.parent):
+            capacity = max(self.size + count, 2 * len(self.parent))
+            for name in ("parent", "kind", "entities", "claimants", "links"):
+                setattr(self, name, np.resize(getattr(self, name), capacity))
+        ids = np.arange(self.size, self.size + count)
+        nodes[new] = ids
+        self.nodes["node"][slots[new]] = ids
+        self.parent[ids] = ids
+        self.kind[ids] = kinds[new]
+        self.entities[ids] = 1
+        self.claimants[ids] = kinds[new] == CLAIMANT
+        self.links[ids] = 0
+        self.size += count
+        return nodes
+
+    def _union(self, a, b):
+        """Merge the components joined by node pairs (a, b), summing their metrics into the new roots"""
+        before = np.unique(self._roots(np.concatenate([a, b])))
+        while len(a):
+            ra, rb = self._roots(a), self._roots(b)
+            apart = ra != rb
+            a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+            # Hook every root under the smallest root it is linked to
+            np.minimum.at(self.parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        after = self._roots(before)
+        merged = after != before
+        if merged.any():
+            roots, inverse = np.unique(after, return_inverse=True)
+            for metric in (self.entities, self.claimants, self.links):
+                metric[roots] = np.bincount(inverse, weights=metric[before], minlength=len(roots)).astype(metric.dtype)
+
+    def _features(self, nodes):
+        roots = self._roots(nodes)
+        return {
+            "ring_size": self.claimants[roots].astype(np.int64),
+            "ring_density": self.links[roots] / self.entities[roots],
+        }
+
+    def add_batch(self, claimants, policies=None, providers=None, phones=None, bank_accounts=None):
+        """Link the entities of a batch of claims, returning each claim's ring features as arrays.
+
+        Entity arrays run parallel to `claimants` and may be omitted or hold
+        None for claims without one. Features are those of the components
+        once the whole batch is linked, so claims in one batch see each
+        other. The result is ready to add to the columns passed to
+        detect_fraud_batch().
+        """
+        entities = dict(zip(ENTITIES, (claimants, policies, providers, phones, bank_accounts)))
+        with self._lock:
+            keys, kinds, rows = self._node_keys(entities)
+            distinct, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            nodes = self._add_nodes(distinct, kinds[first])[inverse]
+
+            claimant = np.full(len(claimants), -1, dtype=np.int64)
+            is_claimant = kinds == CLAIMANT
+            claimant[rows[is_claimant]] = nodes[is_claimant]
+            # Every other entity of a claim links to its claimant
+            others = ~is_claimant & (claimant[rows] >= 0)
+            a, b = claimant[rows[others]], nodes[others]
+            pairs = table_keys(_LINK_SALT, mix64(np.minimum(a, b).astype(np.uint64)), np.maximum(a, b))
+            pairs, unique = np.unique(pairs, return_index=True)
+            self.pairs.reserve(len(pairs))
+            new = self.pairs.find(pairs) < 0
+            self.pairs.find(pairs[new], insert=True)
+            a, b = a[unique[new]], b[unique[new]]
+
+            self._union(a, b)
+            if len(a):
+                roots, counts = np.unique(self._roots(a), return_counts=True)
+                self.links[roots] += counts
+            features = {"ring_size": np.zeros(len(claimants), dtype=np.int64),
+                        "ring_density": np.zeros(len(claimants))}
+            known = claimant >= 0
+            for name, values in self._features(claimant[known]).items():
+                features[name][known] = values
+            return features
+
+    def add(self, claimant, policy=None, provider=None, phone=None, bank_account=None):
+        """Link one claim's entities, returning its RingFeatures"""
+        features = self.add_batch([claimant], [policy], [provider], [phone], [bank_account])
+        return RingFeatures(int(features["ring_size"][0]), float(features["ring_density"][0]))
+
+    def ring(self, claimant):
+        """RingFeatures of a claimant's component, or None for an unknown claimant"""
+        with self._lock:
+            keys, _, _ = self._node_keys({"claimant": [claimant]})
+            slots = self.nodes.find(keys)
+            if not len(slots) or slots[0] < 0:
+                return None
+            features = self._features(self.nodes["node"][slots].astype(np.int64))
+            return RingFeatures(int(features["ring_size"][0]), float(features["ring_density"][0]))
+
+    def components(self):
+        """Number of connected components"""
+        with self._lock:
+            return int((self.parent[:self.size] == np.arange(self.size)).sum())
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def claim_graph():
+    """The process-wide ClaimGraph the Fraud Detection page links claims in"""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = ClaimGraph()
+        return _graph
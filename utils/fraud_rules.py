@@ -0,0 +1,358 @@
+"""
+Fraud Rules - fraud rules declared as data and compiled for claim batches
+
+A Rule names the alert bit it raises, the points it adds to the fraud
+score and the conditions a claim must meet, each a (column, operator,
+value) tuple:
+
+    Rule("high_value_auto", HIGH_VALUE_AUTO, 1,
+         ("claim_type", "==", "Auto"), ("claim_amount", ">", 300000), group="claim_type")
+
+The value decides how the column is read: a bool tests the column's
+truth, a number compares it as a number and a string (or tuple of
+strings, for "in") compares its categories. Rules in the same group are
+alternatives, like an if/elif chain: a claim takes the first one it
+meets.
+
+A RuleSet compiles its rules once. Rules that only test one categorical
+column, like the per-claim-type checks, are folded into one lookup of
+points and alerts by category. Scoring one claim walks the other rules,
+stopping at the first condition that fails. Scoring a batch evaluates each
+condition as one NumPy operation over the batch, converting each column
+once, so a rule costs a few array operations per batch rather than Python
+work per claim. Batches short-circuit too: a rule stops at the first
+condition no claim still meets, grouped rules only look at claims their
+group has not matched yet, and conditions on optional columns a batch
+does not carry are decided once from the column's default.
+
+Every RuleSet counts, per rule, the claims it was evaluated on and its
+hits, and for batches the time spent in it; stats() gives the rows for
+display.
+"""
+import operator
+import threading
+import time
+from collections import Counter
+from functools import partial
+
+import numpy as np
+
+from utils.rating_tables import factorize
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda value, values: value in values,
+}
+
+# The same tests with their operands swapped, so that partial(test, value)
+# tests a claim's value without a Python call frame
+_SWAPPED = {
+    ">": operator.lt,
+    ">=": operator.le,
+    "<": operator.gt,
+    "<=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": operator.contains,
+}
+
+
+class Condition:
+    """One (column, operator, value) test"""
+
+    def __init__(self, column, op, value):
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r} in condition on {column}")
+        self.column = column
+        self.op = op
+        self.value = value
+        sample = value[0] if op == "in" else value
+        if isinstance(sample, (bool, np.bool_)):
+            if op not in ("==", "!="):
+                raise ValueError(f"Yes/no column {column} only takes == and !=")
+            self.kind = "flag"
+        elif isinstance(sample, str):
+            self.kind = "category"
+        else:
+            self.kind = "number"
+        self._test = OPERATORS[op]
+        self.test = self._compile()
+
+    def _compile(self):
+        """The test of one claim's value, as a builtin callable"""
+        if self.kind == "flag":
+            return operator.truth if (self.op == "==") == bool(self.value) else operator.not_
+        return partial(_SWAPPED[self.op], self.value)
+
+    def mask(self, columns):
+        """Test a batch column, returning a bool array or, for an absent optional column, a bool"""
+        if columns.absent(self.column):
+            return bool(self.test(columns.defaults[self.column]))
+        column = columns.get(self.column, self.kind)
+        if self.kind == "category":
+            codes, categories = column
+            # The extra last entry is for missing values
+            table = np.array([bool(self.test(category)) for category in [*categories, None]])
+            return table[codes]
+        if self.op == "in":
+            return np.isin(column, self.value)
+        return self._test(column, self.value)
+
+
+def _any(mask):
+    return mask.any() if isinstance(mask, np.ndarray) else bool(mask)
+
+
+def _all(mask):
+    return mask.all() if isinstance(mask, np.ndarray) else bool(mask)
+
+
+class Rule:
+    """Points and an alert bit for claims that meet all (or any) of its conditions"""
+
+    def __init__(self, name, alert, points, *conditions, match="all", group=None):
+        if match not in ("all", "any"):
+            raise ValueError(f"Rule {name}: match must be 'all' or 'any'")
+        self.name = name
+        self.alert = alert
+        self.points = points
+        self.conditions = tuple(Condition(*condition) for condition in conditions)
+        self.match = match
+        self.group = group
+        self.tests = tuple((condition.column, condition.test) for condition in self.conditions)
+
+    @property
+    def columns(self):
+        return tuple(dict.fromkeys(condition.column for condition in self.conditions))
+
+    def test(self, values):
+        """Whether one claim, a mapping of column name to value, meets the rule"""
+        every = self.match == "all"
+        for column, test in self.tests:
+            if not test(values[column]) if every else test(values[column]):
+                return not every
+        return every
+
+    def mask(self, columns, candidates):
+        """Rows of a batch that meet the rule, among the `candidates` mask (or all rows for None)"""
+        every = self.match == "all"
+        mask = (True if candidates is None else candidates) if every else False
+        last = len(self.conditions) - 1
+        for i, condition in enumerate(self.conditions):
+            test = condition.mask(columns)
+            mask = mask & test if every else mask | test
+            # Stop once no row can still be met (all) or every row is (any)
+            if i < last and (not _any(mask) if every else _all(mask)):
+                break
+        if not every and candidates is not None:
+            mask = mask & candidates
+        return mask
+
+
+class _Columns:
+    """Batch columns, each converted once for the kind of condition reading it"""
+
+    def __init__(self, data, defaults):
+        self.data = data
+        self.defaults = defaults
+        self._converted = {}
+
+    def absent(self, name):
+        """Whether `name` is an optional column the batch leaves out"""
+        return name not in self.data and name in self.defaults
+
+    def get(self, name, kind):
+        key = (name, kind)
+        if key not in self._converted:
+            if kind == "category":
+                self._converted[key] = factorize(self.data[name])
+            elif kind == "flag":
+                self._converted[key] = np.asarray(self.data[name], dtype=bool)
+            else:
+                self._converted[key] = np.asarray(self.data[name], dtype=np.float64)
+        return self._converted[key]
+
+
+# Categories whose folded rule outcomes are kept per column, for single claims
+FOLDED_CATEGORIES = 4096
+
+
+class RuleSet:
+    """An ordered set of rules, compiled once, with per-rule hit and timing counters.
+
+    `defaults` gives the value of optional columns that claims may leave out.
+    """
+
+    def __init__(self, rules, defaults=None):
+        self.rules = tuple(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+        self.defaults = dict(defaults or {})
+        # Ungrouped rules that only read one categorical column are folded
+        # into a lookup by that column's category; the rest run in order
+        self._lookups = {}
+        looped = []
+        for i, rule in enumerate(self.rules):
+            column = rule.columns[0] if len(rule.columns) == 1 else None
+            if (rule.group is None and column is not None and column not in self.defaults
+                    and all(condition.kind == "category" for condition in rule.conditions)):
+                self._lookups.setdefault(column, []).append(i)
+            else:
+                looped.append(i)
+        self._compiled = tuple(
+            (1 << i, self.rules[i].group, self.rules[i].match == "all", self.rules[i].tests,
+             self.rules[i].points, self.rules[i].alert)
+            for i in looped
+        )
+        self._folded = {column: {} for column in self._lookups}
+        self._folded_rules = {i for indices in self._lookups.values() for i in indices}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def columns(self):
+        """Every column the rules read"""
+        return tuple(dict.fromkeys(column for rule in self.rules for column in rule.columns))
+
+    def score(self, values):
+        """(points, alert bitmask) of one claim, a mapping of column name to value"""
+        values = {**self.defaults, **values}
+        points = alerts = hit = skipped = 0
+        for column, indices in self._lookups.items():
+            folded = self._folded[column]
+            value = values[column]
+            try:
+                outcome = folded[value]
+            except (KeyError, TypeError):
+                outcome = self._fold(column, indices, value)
+                if len(folded) < FOLDED_CATEGORIES:
+                    folded[value] = outcome
+            points += outcome[0]
+            alerts |= outcome[1]
+            hit |= outcome[2]
+        taken = set()
+        # Rule.test() inlined: this loop is most of the cost of one claim
+        for bit, group, every, tests, rule_points, alert in self._compiled:
+            if group in taken:
+                skipped |= bit
+                continue
+            for column, test in tests:
+                if not test(values[column]) if every else test(values[column]):
+                    met = not every
+                    break
+            else:
+                met = every
+            if met:
+                hit |= bit
+                points += rule_points
+                alerts |= alert
+                if group is not None:
+                    taken.add(group)
+        # Single claims are tallied by outcome, and spread over the rules in stats()
+        with self._lock:
+            self._claims[hit, skipped] += 1
+        return points, alerts
+
+    def _fold(self, column, indices, value):
+        """(points, alerts, hit bits) of the folded rules on `column` for one category"""
+        points = alerts = hit = 0
+        for i in indices:
+            rule = self.rules[i]
+            if rule.test({column: value}):
+                points += rule.points
+                alerts |= rule.alert
+                hit |= 1 << i
+        return points, alerts, hit
+
+    def score_batch(self, data, size):
+        """(points, alert bitmasks) of a batch of `size` claims, as int64 and uint32 arrays.
+
+        `data` is a pandas DataFrame, or any mapping of column name to array.
+        """
+        columns = _Columns(data, self.defaults)
+        points = np.zeros(size, dtype=np.int64)
+        alerts = np.zeros(size, dtype=np.uint32)
+        taken = {}
+        evaluated = np.zeros(len(self.rules), dtype=np.int64)
+        hits = np.zeros(len(self.rules), dtype=np.int64)
+        seconds = np.zeros(len(self.rules))
+        for column, indices in self._lookups.items():
+            start = time.perf_counter()
+            codes, categories = columns.get(column, "category")
+            # Which rules each category meets, the last column for missing values
+            met = np.array([[self.rules[i].test({column: category}) for category in [*categories, None]]
+                            for i in indices], dtype=bool)
+            rules = [self.rules[i] for i in indices]
+            point_table = np.array([rule.points for rule in rules], dtype=np.int64) @ met
+            alert_table = np.bitwise_or.reduce(
+                np.array([rule.alert for rule in rules], dtype=np.uint32)[:, None] * met, axis=0)
+            points += point_table[codes]
+            alerts |= alert_table[codes]
+            counts = np.bincount(codes + 1, minlength=len(categories) + 1)
+            hits[indices] = met @ np.roll(counts, -1)
+            evaluated[indices] = size
+            seconds[indices] = (time.perf_counter() - start) / len(indices)
+        for i, rule in enumerate(self.rules):
+            if i in self._folded_rules:
+                continue
+            start = time.perf_counter()
+            candidates = None
+            if rule.group in taken:
+                candidates = ~taken[rule.group]
+                evaluated[i] = np.count_nonzero(candidates)
+            else:
+                evaluated[i] = size
+            if evaluated[i]:
+                mask = rule.mask(columns, candidates)
+                if isinstance(mask, np.ndarray):
+                    hits[i] = np.count_nonzero(mask)
+                elif mask:
+                    # Met from column defaults alone, by every row
+                    mask = np.ones(size, dtype=bool)
+                    hits[i] = size
+            if hits[i]:
+                points += mask * np.int64(rule.points)
+                alerts |= mask * np.uint32(rule.alert)
+                if rule.group in taken:
+                    taken[rule.group] |= mask
+                elif rule.group is not None:
+                    taken[rule.group] = mask.copy()
+            seconds[i] = time.perf_counter() - start
+        with self._lock:
+            self._evaluated += evaluated
+            self._hits += hits
+            self._seconds += seconds
+        return points, alerts
+
+    def reset_stats(self):
+        with self._lock:
+            self._claims = Counter()
+            self._evaluated = np.zeros(len(self.rules), dtype=np.int64)
+            self._hits = np.zeros(len(self.rules), dtype=np.int64)
+            self._seconds = np.zeros(len(self.rules))
+
+    def stats(self):
+        """One row per rule: claims evaluated, hits, hit rate and time spent in batches, for display"""
+        with self._lock:
+            claims = dict(self._claims)
+            evaluated, hits, seconds = self._evaluated.copy(), self._hits.copy(), self._seconds.copy()
+        bits = 1 << np.arange(len(self.rules), dtype=object)
+        for (hit, skipped), count in claims.items():
+            evaluated += count * ((skipped & bits) == 0).astype(np.int64)
+            hits += count * ((hit & bits) != 0).astype(np.int64)
+        return [
+            {
+                "Rule": rule.name,
+                "Evaluated": int(evaluated[i]),
+                "Hits": int(hits[i]),
+                "Hit Rate (%)": round(100 * int(hits[i]) / int(evaluated[i]), 2) if evaluated[i] else 0.0,
+                "Batch Time (ms)": round(float(seconds[i]) * 1000, 3),
+            }
+            for i, rule in enumerate(self.rules)
+        ]
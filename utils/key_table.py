@@ -0,0 +1,122 @@
+"""
+Key Table - array-backed hash table for the claim index and the fraud ring graph
+
+KeyTable maps non-zero 64-bit key hashes to slots by open addressing with
+linear probing, done for a whole array of keys at once, and keeps one
+NumPy column per piece of per-key state. Compared to a dict it holds tens
+of millions of keys in a few dozen bytes each.
+
+id_hashes() turns claimant, policy or other ids into stable 64-bit
+hashes, and table_keys() derives the keys of one kind of entry from them.
+"""
+import numpy as np
+import pandas as pd
+
+EMPTY = np.uint64(0)
+
+
+def mix64(h):
+    """splitmix64 finalizer over a uint64 array"""
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def id_hashes(values):
+    """Stable 64-bit hashes of ids: integers by value, anything else by its text"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return mix64(values.astype(np.uint64))
+    return pd.util.hash_array(pd.Series(values, dtype=object).astype(str).to_numpy(dtype=object))
+
+
+def table_keys(salt, hashes, extra=None):
+    """Non-zero table keys for one kind of entry, from id hashes and an optional extra integer"""
+    h = mix64(hashes ^ np.uint64(salt))
+    if extra is not None:
+        h = mix64(h + np.asarray(extra).astype(np.uint64))
+    h[h == EMPTY] = 1
+    return h
+
+
+class KeyTable:
+    """Open-addressing table of uint64 keys with a NumPy column per piece of state.
+
+    `columns` maps a column name to (dtype, fill value, width), width None
+    for one value per key. The table is kept at most half full.
+    """
+
+    def __init__(self, columns=None, slots=1 << 16):
+        self.spec = dict(columns or {})
+        self._allocate(slots)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.used
+
+    def _allocate(self, slots):
+        self.mask = slots - 1
+        self.used = 0
+        self.keys = np.zeros(slots, dtype=np.uint64)
+        self.columns = {
+            name: np.full((slots,) if width is None else (slots, width), fill, dtype=dtype)
+            for name, (dtype, fill, width) in self.spec.items()
+        }
+
+    def nbytes(self):
+        return self.keys.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def find(self, keys, insert=False):
+        """Slots of distinct `keys` by vectorized linear probing.
+
+        Absent keys get -1, or a new slot when inserting; of several new keys
+        probing the same empty slot, the first takes it and the rest probe on.
+        """
+        slots = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.arange(len(keys))
+        probe = 0
+        while len(pending):
+            wanted = keys[pending]
+            position = (wanted + np.uint64(probe)).astype(np.int64) & self.mask
+            found = self.keys[position]
+            done = found == wanted
+            empty = found == EMPTY
+            if insert:
+                candidates = np.flatnonzero(empty)
+                _, first = np.unique(position[candidates], return_index=True)
+                winners = candidates[first]
+                self.keys[position[winners]] = wanted[winners]
+                self.used += len(winners)
+                done[winners] = True
+            else:
+                done |= empty
+                position[empty] = -1
+            slots[pending[done]] = position[done]
+            pending = pending[~done]
+            probe += 1
+        return slots
+
+    def reserve(self, keys, keep=None):
+        """Room for `keys` more keys.
+
+        When the table has to be rebuilt, `keep(slots)` may return a mask of
+        the occupied slots worth keeping; the others are dropped.
+        """
+        if 2 * (self.used + keys) <= self.mask + 1:
+            return
+        occupied = np.flatnonzero(self.keys)
+        if keep is not None:
+            occupied = occupied[keep(occupied)]
+        slots = self.mask + 1
+        while 2 * (len(occupied) + keys) > slots:
+            slots *= 2
+        kept = self.keys[occupied]
+        columns = {name: column[occupied] for name, column in self.columns.items()}
+        self._allocate(slots)
+        moved = self.find(kept, insert=True)
+        for name, values in columns.items():
+            self.columns[name][moved] = values
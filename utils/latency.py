@@ -0,0 +1,77 @@
+"""
+Latency Utility - per-stage latency budgets for the quote pages
+
+A LatencyBudget times the stages of one request (validation, scoring,
+adjustment, rendering) against a budget in milliseconds per stage and logs
+a warning for every stage that runs over. report() gives the rows for a
+debug panel.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Per-stage budgets for one quote, in milliseconds
+QUOTE_BUDGETS_MS = {
+    "validation": 5,
+    "scoring": 10,
+    "adjustment": 10,
+    "rendering": 250,
+}
+
+
+class LatencyBudget:
+    """Measure named stages of one request against their budgets"""
+
+    def __init__(self, name, budgets_ms=None):
+        self.name = name
+        self.budgets_ms = dict(QUOTE_BUDGETS_MS if budgets_ms is None else budgets_ms)
+        self.elapsed_ms = {}
+        self._started = {}
+
+    def start(self, stage):
+        self._started[stage] = time.perf_counter()
+
+    def stop(self, stage):
+        """Finish timing `stage`, warn if it ran over budget, return its time in ms"""
+        elapsed = (time.perf_counter() - self._started.pop(stage)) * 1000
+        self.elapsed_ms[stage] = elapsed
+        budget = self.budgets_ms.get(stage)
+        if budget is not None and elapsed > budget:
+            logger.warning("%s: %s took %.2f ms, over its %s ms budget", self.name, stage, elapsed, budget)
+        return elapsed
+
+    @contextmanager
+    def stage(self, stage):
+        self.start(stage)
+        try:
+            yield
+        finally:
+            self.stop(stage)
+
+    def over_budget(self):
+        """Stages that ran over their budget"""
+        return [
+            stage for stage, elapsed in self.elapsed_ms.items()
+            if stage in self.budgets_ms and elapsed > self.budgets_ms[stage]
+        ]
+
+    def report(self):
+        """One row per measured stage, for display"""
+        rows = []
+        for stage, elapsed in self.elapsed_ms.items():
+            budget = self.budgets_ms.get(stage)
+            rows.append({
+                "Stage": stage.title(),
+                "Elapsed (ms)": round(elapsed, 2),
+                "Budget (ms)": budget,
+                "Status": "⚠️ Over budget" if budget is not None and elapsed > budget else "✅ Within budget",
+            })
+        rows.append({
+            "Stage": "Total",
+            "Elapsed (ms)": round(sum(self.elapsed_ms.values()), 2),
+            "Budget (ms)": sum(self.budgets_ms.get(stage, 0) for stage in self.elapsed_ms),
+            "Status": "⚠️ Over budget" if self.over_budget() else "✅ Within budget",
+        })
+        return rows
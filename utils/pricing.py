@@ -0,0 +1,277 @@
+"""
+Pricing Utility - the full premium chain for every line of business
+
+A PricingPipeline starts from the calculator's base premium and applies an
+ordered list of adjustment stages (vehicle and city multipliers, security
+discounts, age bands, ...), then truncates to whole rupees. The same stages
+price a single quote with quote() or a whole DataFrame with price(), and the
+vectorized path gives exactly the premiums the per-quote path gives.
+
+    from utils.pricing import PIPELINES
+    PIPELINES["auto"].quote(vehicle_age=3, driver_age=35, accident_history=0,
+                            mileage=12000, vehicle_type="SUV", city_tier="Tier 1 (Metro)",
+                            violations=1)["premium"]
+    PIPELINES["auto"].price(portfolio)  # DataFrame with a premium column
+
+Inputs that the pages collect as lists (security features, health
+conditions) are passed to the pipelines as counts.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.rating_tables import factorize, rating_tables
+from utils.risk_calculator import (
+    calculate_auto_risk,
+    calculate_cyber_risk,
+    calculate_health_risk,
+    calculate_life_risk,
+    calculate_property_risk,
+    risk_tier,
+    risk_tier_batch,
+    score_auto_batch,
+    score_cyber_batch,
+    score_health_batch,
+    score_life_batch,
+    score_property_batch,
+)
+
+
+class Lookup:
+    """Multiply by the factor a rating table gives the column's category"""
+
+    def __init__(self, column, table):
+        self.column = column
+        self.table = table
+
+    def factor(self, value):
+        return rating_tables()[self.table].factor(value)
+
+    def factors(self, column):
+        return rating_tables()[self.table].lookup(column)
+
+
+class Match:
+    """Multiply by the factor of the first rule whose text appears in the column"""
+
+    def __init__(self, column, rules):
+        self.column = column
+        self.rules = rules
+
+    def factor(self, value):
+        for text, factor in self.rules:
+            if text in value:
+                return factor
+        return 1.0
+
+    def factors(self, column):
+        codes, categories = factorize(column)
+        return np.array([self.factor(category) for category in categories] + [1.0])[codes]
+
+
+class Bands:
+    """Multiply by the factor of the first (threshold, factor) band the value is above"""
+
+    def __init__(self, column, bands):
+        self.column = column
+        self.bands = bands
+
+    def factor(self, value):
+        for threshold, factor in self.bands:
+            if value > threshold:
+                return factor
+        return 1.0
+
+    def factors(self, column):
+        values = np.asarray(column, dtype=np.float64)
+        return np.select([values > threshold for threshold, _ in self.bands],
+                         [factor for _, factor in self.bands], 1.0)
+
+
+class PerUnit:
+    """Load the premium by `rate` for every unit above `above`"""
+
+    def __init__(self, column, rate, above=0):
+        self.column = column
+        self.rate = rate
+        self.above = above
+
+    def factor(self, value):
+        if value > self.above:
+            return 1 + (value - self.above) * self.rate
+        return 1.0
+
+    def factors(self, column):
+        values = np.asarray(column, dtype=np.float64)
+        result = values - self.above
+        result *= self.rate
+        result += 1
+        result[values <= self.above] = 1.0
+        return result
+
+
+class Discount:
+    """Discount the premium by `rate` per unit, up to `cap`"""
+
+    def __init__(self, column, rate, cap):
+        self.column = column
+        self.rate = rate
+        self.cap = cap
+
+    def factor(self, value):
+        return 1 - min(value * self.rate, self.cap)
+
+    def factors(self, column):
+        result = np.asarray(column, dtype=np.float64) * self.rate
+        np.minimum(result, self.cap, out=result)
+        return np.subtract(1, result, out=result)
+
+
+class Flag:
+    """Multiply by `factor` where a yes/no column is set"""
+
+    def __init__(self, column, factor):
+        self.column = column
+        self.multiplier = factor
+
+    def factor(self, value):
+        return self.multiplier if value else 1.0
+
+    def factors(self, column):
+        return np.array([1.0, self.multiplier])[np.asarray(column, dtype=bool).view(np.uint8)]
+
+
+class PricingPipeline:
+    """Base calculator plus ordered premium adjustment stages for one line"""
+
+    def __init__(self, line, calculator, batch_scorer, inputs, stages, extra_outputs=()):
+        self.line = line
+        self.calculator = calculator
+        self.batch_scorer = batch_scorer
+        self.inputs = inputs
+        self.stages = stages
+        self.extra_outputs = extra_outputs
+
+    @property
+    def columns(self):
+        """Every input column a quote needs"""
+        names = list(self.inputs)
+        for stage in self.stages:
+            if stage.column not in names:
+                names.append(stage.column)
+        return tuple(names)
+
+    def quote(self, **inputs):
+        """Price one quote, returning a dict with risk_score, risk_tier,
+        recommendation, base_premium, premium and any extra calculator outputs"""
+        risk_score, recommendation, base_premium, *extra = self.score(**inputs)
+        result = {
+            "risk_score": risk_score,
+            "risk_tier": risk_tier(risk_score),
+            "recommendation": recommendation,
+            "base_premium": base_premium,
+            "premium": self.adjust(base_premium, inputs),
+        }
+        result.update(zip(self.extra_outputs, extra))
+        return result
+
+    def score(self, **inputs):
+        """Run the base calculator alone, returning its result tuple"""
+        return self.calculator(*(inputs[name] for name in self.inputs))
+
+    def adjust(self, base_premium, inputs):
+        """Apply the adjustment stages to a base premium, in whole rupees"""
+        premium = base_premium
+        for stage in self.stages:
+            premium *= stage.factor(inputs[stage.column])
+        return int(premium)
+
+    def price(self, data):
+        """Price a DataFrame (or mapping of column name to array) of quotes.
+
+        Returns a DataFrame with risk_score, risk_tier, base_premium, premium
+        and any extra calculator outputs, matching quote() row for row.
+        Recommendations stay as tier codes; resolve one with
+        risk_calculator.recommendation_text() when it is displayed.
+        """
+        return pd.DataFrame(self.price_arrays(data), index=getattr(data, "index", None))
+
+    def price_arrays(self, data):
+        """Same as price(), as a dict of NumPy arrays (cheaper for small batches)"""
+        risk_score, base_premium, *extra = self.batch_scorer(data)
+        premium = base_premium.astype(np.float64)
+        for stage in self.stages:
+            premium *= stage.factors(data[stage.column])
+        result = {
+            "risk_score": risk_score,
+            "risk_tier": risk_tier_batch(risk_score),
+            "base_premium": base_premium,
+            "premium": np.trunc(premium).astype(np.int64),
+        }
+        result.update(zip(self.extra_outputs, extra))
+        return result
+
+
+AUTO_PRICING = PricingPipeline(
+    "auto", calculate_auto_risk, score_auto_batch,
+    ("vehicle_age", "driver_age", "accident_history", "mileage"),
+    (
+        Lookup("vehicle_type", "auto.vehicle_multiplier"),
+        Lookup("city_tier", "auto.city_multiplier"),
+        PerUnit("violations", 0.1),  # 10% per traffic violation
+    ),
+)
+
+PROPERTY_PRICING = PricingPipeline(
+    "property", calculate_property_risk, score_property_batch,
+    ("property_age", "location_risk", "construction_type", "flood_zone"),
+    (
+        Bands("property_value", ((100, 1.3), (75, 1.2), (50, 1.1))),  # ₹ lakhs
+        Discount("security_features", 0.02, 0.15),  # 2% per feature, max 15%
+        Match("floor_level", (("Ground Floor", 1.1), ("8th Floor", 1.05))),
+    ),
+)
+
+CYBER_PRICING = PricingPipeline(
+    "cyber", calculate_cyber_risk, score_cyber_batch,
+    ("num_employees", "has_security_policy", "past_incidents", "uses_mfa"),
+    (
+        Lookup("business_type", "cyber.business_risk"),
+        Lookup("annual_revenue", "cyber.revenue_multiplier"),
+        Discount("security_measures", 0.03, 0.20),  # 3% per security measure, max 20%
+        PerUnit("past_incidents", 0.15),  # 15% per incident
+    ),
+)
+
+HEALTH_PRICING = PricingPipeline(
+    "health", calculate_health_risk, score_health_batch,
+    ("age", "bmi", "smoking", "exercise_frequency", "chronic_conditions", "family_history"),
+    (
+        Bands("age", ((60, 2.0), (45, 1.5), (35, 1.2))),
+        Match("smoking_habit", (("Regular smoker", 1.5), ("Occasional smoker", 1.3))),
+        Match("alcohol", (("Heavy drinking", 1.3), ("Regular", 1.1))),
+        Match("exercise_frequency", (("Daily", 0.9), ("Often", 0.95))),
+        Lookup("coverage_amount", "health.coverage_multiplier"),
+        PerUnit("family_members", 0.7, above=1),  # 70% for each additional member
+    ),
+)
+
+LIFE_PRICING = PricingPipeline(
+    "life", calculate_life_risk, score_life_batch,
+    ("age", "gender", "occupation", "lifestyle", "coverage_amount", "medical_exams"),
+    (
+        Lookup("gender", "life.gender_adjustment"),
+        Lookup("occupation", "life.occupation_adjustment"),
+        PerUnit("health_conditions", 0.2),  # 20% per health condition
+        Flag("medical_exams", 0.9),
+        Lookup("lifestyle", "life.lifestyle_adjustment"),
+    ),
+    extra_outputs=("mortality_rate",),
+)
+
+PIPELINES = {
+    "auto": AUTO_PRICING,
+    "property": PROPERTY_PRICING,
+    "cyber": CYBER_PRICING,
+    "health": HEALTH_PRICING,
+    "life": LIFE_PRICING,
+}
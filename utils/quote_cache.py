@@ -0,0 +1,116 @@
+"""
+Quote Cache Utility - process-wide memoization of quotes
+
+Streamlit reruns a page script on every interaction, and users resubmit the
+same forms constantly. QUOTE_CACHE is a bounded LRU cache with a time to
+live, shared by every session in the process, that remembers scores,
+premiums and derived tables keyed on a canonical hash of their inputs.
+
+The cache is cleared whenever reload_rating_tables() swaps in new rating
+tables, so no quote outlives the rates it was priced with.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils.rating_tables import on_reload
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 15 * 60  # seconds
+
+
+def _canonical(value):
+    """JSON fallback for NumPy scalars and other non-JSON inputs"""
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def cache_key(name, **inputs):
+    """Canonical hash of `name` and its inputs, independent of argument order"""
+    text = json.dumps([name, inputs], sort_keys=True, separators=(",", ":"), default=_canonical)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class QuoteCache:
+    """Thread-safe LRU cache with a time to live and hit/miss counters"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by invalidate(), so a value computed before it is not cached
+        self._generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+        # Compute outside the lock; two sessions missing on the same key at
+        # once both compute, which is cheaper than serializing every miss
+        value = compute()
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while computing: the value may be stale
+                return value
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+QUOTE_CACHE = QuoteCache()
+on_reload(lambda tables: QUOTE_CACHE.invalidate())
+
+
+def cached(name, compute, **inputs):
+    """Memoize compute() in QUOTE_CACHE under `name` and its inputs.
+
+    Cached values are shared between sessions, so callers must not mutate them.
+    """
+    return QUOTE_CACHE.get_or_compute(cache_key(name, **inputs), compute)
+
+
+def cached_quote(pipeline, **inputs):
+    """PricingPipeline.quote() through QUOTE_CACHE, as a fresh dict"""
+    return dict(cached(f"{pipeline.line}.quote", lambda: pipeline.quote(**inputs), **inputs))
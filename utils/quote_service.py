@@ -0,0 +1,319 @@
+"""
+Quote Service - headless HTTP API for quotes and fraud scores
+
+A small asyncio HTTP/1.1 server on top of the pricing pipelines and the
+fraud rules. It uses only the standard library (plus the NumPy/pandas the
+calculators already need) and never imports the UI stack, so it starts in
+well under a second and answers each request straight from the event loop.
+
+    POST /quote/{auto,property,cyber,health,life}   JSON body with the pipeline's columns
+    POST /fraud/score                               claim_amount, claim_type, suspicious_docs, prior_fraud
+    GET  /health
+    GET  /metrics                                   coalescer batch size and queue wait
+
+    python -m utils.quote_service --port 8080 --workers 4
+
+With --batch-size, concurrent requests for the same endpoint are coalesced
+into micro-batches (see utils/coalescer.py) and scored through the
+vectorized pricing and fraud functions.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+
+from utils.coalescer import Coalescer
+from utils.fraud_detector import detect_fraud_batch, render_alerts, score_claim
+from utils.pricing import PIPELINES
+from utils.risk_calculator import RECOMMENDATIONS
+
+FRAUD_FIELDS = ("claim_amount", "claim_type", "suspicious_docs", "prior_fraud")
+MAX_BODY = 64 * 1024
+# Seconds a connection may take to send the headers of its next request, and
+# then its body, before it is closed
+READ_TIMEOUT = 10.0
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """A request the service answers with an HTTP error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _required(payload, fields):
+    """Check that a JSON payload has every field, or raise a 400 naming the missing ones"""
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Request body must be a JSON object")
+    missing = [field for field in fields if field not in payload]
+    if missing:
+        raise RequestError(400, f"Missing fields: {', '.join(missing)}")
+    empty = [field for field in fields if payload[field] is None]
+    if empty:
+        raise RequestError(400, f"Fields must not be null: {', '.join(empty)}")
+    return payload
+
+
+def quote(line, payload):
+    """Price one quote for `line`"""
+    pipeline = PIPELINES[line]
+    inputs = _required(payload, pipeline.columns)
+    try:
+        result = pipeline.quote(**{name: inputs[name] for name in pipeline.columns})
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"Invalid input: {e}")
+    # Clipped scores come back from the calculators as int 1 or 10
+    result["risk_score"] = float(result["risk_score"])
+    result["line"] = line
+    return result
+
+
+def fraud_score(payload):
+    """Score one claim with the fraud rules"""
+    claim = _required(payload, FRAUD_FIELDS)
+    try:
+        score, alerts = score_claim(*(claim[field] for field in FRAUD_FIELDS))
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"Invalid input: {e}")
+    return {"fraud_score": score, "alert_mask": alerts, "alerts": render_alerts(alerts).split("\n")}
+
+
+def quote_batch(line, payloads):
+    """Price a batch of already validated quotes for `line`, one result per payload"""
+    pipeline = PIPELINES[line]
+    columns = {name: [payload[name] for payload in payloads] for name in pipeline.columns}
+    try:
+        priced = pipeline.price_arrays(columns)
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"Invalid input: {e}")
+    outputs = {name: priced[name].tolist() for name in pipeline.extra_outputs}
+    texts = RECOMMENDATIONS[line]
+    results = []
+    for i, (risk_score, tier, base_premium, premium) in enumerate(zip(
+            priced["risk_score"].tolist(), priced["risk_tier"].tolist(),
+            priced["base_premium"].tolist(), priced["premium"].tolist())):
+        result = {
+            "risk_score": risk_score,
+            "risk_tier": tier,
+            "recommendation": texts[tier],
+            "base_premium": base_premium,
+            "premium": premium,
+        }
+        for name, values in outputs.items():
+            result[name] = values[i]
+        result["line"] = line
+        results.append(result)
+    return results
+
+
+def fraud_score_batch(payloads):
+    """Score a batch of already validated claims, one result per payload"""
+    columns = {field: [payload[field] for payload in payloads] for field in FRAUD_FIELDS}
+    try:
+        scores, alerts = detect_fraud_batch(columns)
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"Invalid input: {e}")
+    return [
+        {"fraud_score": score, "alert_mask": mask, "alerts": render_alerts(mask).split("\n")}
+        for score, mask in zip(scores.tolist(), alerts.tolist())
+    ]
+
+
+class QuoteService:
+    """Routes requests to the quoting functions"""
+
+    async def handle(self, method, path, body):
+        """Return (status, payload) for one request"""
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path.startswith("/quote/"):
+            line = path[len("/quote/"):]
+            if line not in PIPELINES:
+                raise RequestError(404, f"Unknown line of business: {line}")
+            return 200, await self.quote(line, self._json(method, body))
+        if path == "/fraud/score":
+            return 200, await self.fraud_score(self._json(method, body))
+        if path == "/metrics":
+            return 200, self.metrics()
+        raise RequestError(404, f"No route for {path}")
+
+    async def quote(self, line, payload):
+        return quote(line, payload)
+
+    async def fraud_score(self, payload):
+        return fraud_score(payload)
+
+    def metrics(self):
+        return {}
+
+    @staticmethod
+    def _json(method, body):
+        if method != "POST":
+            raise RequestError(405, "Use POST")
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise RequestError(400, "Request body is not valid JSON")
+
+
+class BatchingQuoteService(QuoteService):
+    """QuoteService that coalesces concurrent requests into vectorized batches"""
+
+    def __init__(self, max_batch=64, max_wait_us=200):
+        self.coalescers = {
+            line: Coalescer(
+                lambda payloads, line=line: quote_batch(line, payloads),
+                max_batch, max_wait_us,
+                score_one=lambda payload, line=line: quote(line, payload),
+            )
+            for line in PIPELINES
+        }
+        self.coalescers["fraud"] = Coalescer(fraud_score_batch, max_batch, max_wait_us, score_one=fraud_score)
+
+    async def quote(self, line, payload):
+        _required(payload, PIPELINES[line].columns)
+        return await self.coalescers[line].submit(payload)
+
+    async def fraud_score(self, payload):
+        _required(payload, FRAUD_FIELDS)
+        return await self.coalescers["fraud"].submit(payload)
+
+    def metrics(self):
+        return {name: coalescer.metrics.snapshot() for name, coalescer in self.coalescers.items()}
+
+
+async def _read_request(reader, timeout=READ_TIMEOUT):
+    """Read one request, returning (method, path, headers, body), or None at EOF or after `timeout`"""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError(413, "Request headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise RequestError(413, f"Request body over {MAX_BODY} bytes")
+    try:
+        body = await asyncio.wait_for(reader.readexactly(length), timeout) if length else b""
+    except asyncio.TimeoutError:
+        return None
+    headers[":version"] = version
+    return method, target.split("?", 1)[0], headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except RequestError as e:
+                # The stream position is unknown after a bad request, so close
+                writer.write(_response(e.status, {"error": str(e)}, False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if headers[":version"] == "HTTP/1.1" else connection == "keep-alive"
+            try:
+                status, payload = await service.handle(method, path, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:  # keep the worker alive, report the failure
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, service=None, reuse_port=False):
+    """Run the service until cancelled"""
+    service = service or QuoteService()
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer),
+        host, port, reuse_port=reuse_port, backlog=1024,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def _run_worker(host, port, reuse_port, max_batch, max_wait_us):
+    service = BatchingQuoteService(max_batch, max_wait_us) if max_batch else QuoteService()
+    try:
+        asyncio.run(serve(host, port, service, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve quotes and fraud scores over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to bind (default: 8080)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the port (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="coalesce concurrent requests into batches of up to N items (default: off)")
+    parser.add_argument("--batch-wait-us", type=int, default=200,
+                        help="longest a request waits for its batch to fill, in microseconds (default: 200)")
+    args = parser.parse_args(argv)
+
+    print(f"Serving quotes on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    options = (args.batch_size, args.batch_wait_us)
+    if args.workers == 1:
+        _run_worker(args.host, args.port, False, *options)
+        return
+    workers = [
+        multiprocessing.Process(target=_run_worker, args=(args.host, args.port, True, *options))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Rating Tables Utility - versioned multiplier tables for scoring and pricing
+
+Every categorical factor the calculators and pages apply (location and
+construction multipliers, exercise scores, occupation and lifestyle
+factors, vehicle/city, business/revenue and coverage multipliers) lives in
+data/rating_tables.json. The file is loaded once and each table compiled
+into a dict for scalar lookups and a float64 array for vectorized ones, so
+scoring a quote allocates nothing and a rate change is a file edit plus
+reload_rating_tables() instead of a code deploy.
+
+Set RISKSHIELD_RATING_TABLES to load a different table file.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Lists up to this length are factorized with a dict instead of pandas
+SMALL_BATCH = 1024
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "rating_tables.json")
+
+
+def factorize(values):
+    """Factorize a categorical column once into (codes, categories).
+
+    Columns with a pandas ``category`` dtype factorize almost for free, so
+    large portfolios should be loaded that way. Short lists (micro-batches
+    of API requests) skip pandas, whose per-call overhead dominates there.
+    """
+    if not hasattr(values, "dtype"):
+        if len(values) <= SMALL_BATCH:
+            index = {}
+            codes = [index.setdefault(value, len(index)) for value in values]
+            return np.array(codes, dtype=np.intp), list(index)
+        values = np.asarray(values, dtype=object)
+    return pd.factorize(values)
+
+
+class RatingTable:
+    """One compiled factor table: category -> factor, with a default"""
+
+    def __init__(self, name, factors, default):
+        self.name = name
+        self.default = default
+        self.categories = tuple(factors)
+        self._factors = dict(factors)
+        self._index = {category: i for i, category in enumerate(self.categories)}
+        # Last slot holds the default, for unknown categories and missing values
+        self.values = np.array(list(self._factors.values()) + [default], dtype=np.float64)
+        self.values.flags.writeable = False
+
+    def factor(self, category):
+        """Scalar lookup, same as dict.get(category, default)"""
+        return self._factors.get(category, self.default)
+
+    def encode(self, categories):
+        """Map a list of category labels to indexes into `values`"""
+        missing = len(self.categories)
+        return np.array([self._index.get(category, missing) for category in categories] + [missing], dtype=np.intp)
+
+    def lookup(self, column):
+        """Vectorized lookup of a column, or of a (codes, categories) pair from factorize()"""
+        codes, categories = column if isinstance(column, tuple) else factorize(column)
+        return self.values[self.encode(categories)[codes]]
+
+    def __repr__(self):
+        return f"RatingTable({self.name!r}, {len(self.categories)} categories)"
+
+
+class RatingTables:
+    """A loaded, versioned set of rating tables"""
+
+    def __init__(self, version, tables, path=None):
+        self.version = version
+        self.path = path
+        self._tables = tables
+
+    def __getitem__(self, name):
+        return self._tables[name]
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def __iter__(self):
+        return iter(self._tables)
+
+    def __repr__(self):
+        return f"RatingTables(version={self.version!r}, {len(self._tables)} tables)"
+
+
+def load_rating_tables(path=None):
+    """Load and compile a rating table file"""
+    path = path or os.environ.get("RISKSHIELD_RATING_TABLES") or DEFAULT_PATH
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    tables = {}
+    for name, table in spec["tables"].items():
+        factors = table.get("factors")
+        default = table.get("default", 1.0)
+        if not isinstance(factors, dict) or not all(_is_number(v) for v in [default, *factors.values()]):
+            raise ValueError(f"Rating table {name!r} in {path} needs numeric 'factors' and 'default'")
+        tables[name] = RatingTable(name, factors, default)
+    return RatingTables(str(spec.get("version", "unversioned")), tables, path)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_current = None
+_lock = threading.Lock()
+_reload_hooks = []
+
+
+def rating_tables():
+    """The process-wide rating tables, loaded on first use"""
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _install(load_rating_tables())
+    return _current
+
+
+def reload_rating_tables(path=None):
+    """Reload the rating table file and swap it in for every caller"""
+    tables = load_rating_tables(path)
+    with _lock:
+        _install(tables)
+    for hook in list(_reload_hooks):
+        hook(tables)
+    return tables
+
+
+def on_reload(hook):
+    """Register hook(tables) to run after every reload_rating_tables()"""
+    _reload_hooks.append(hook)
+    return hook
+
+
+def _install(tables):
+    global _current
+    _current = tables